@@ -1,8 +1,10 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
-import pandas as pd
-import tempfile
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from preview import preview_upload, preview_lines
 
 app = Flask(__name__)
 CORS(app)
@@ -14,34 +16,26 @@ MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def read_file_first_three_lines(file_path, file_type):
+def read_file_first_three_lines(stream, file_type):
+    """
+    Read the first three lines/rows of an uploaded file
+
+    Uses the backend's stream preview (backend/preview.py, bundled through
+    vercel.json includeFiles), so this app reports the same columns, dtypes
+    and row counts as the main app.
+
+    Returns:
+        tuple: (lines, header-only preview or None on error)
+    """
     try:
-        if file_type == 'csv':
-            df = pd.read_csv(file_path, nrows=3)
-            if len(df) > 0:
-                lines = []
-                for i in range(len(df)):
-                    line = ' '.join(str(value) for value in df.iloc[i].values)
-                    lines.append(line)
-                return lines
-            else:
-                return ["CSV file is empty"]
-        
-        elif file_type in ['xlsx', 'xls']:
-            df = pd.read_excel(file_path, nrows=3)
-            if len(df) > 0:
-                lines = []
-                for i in range(len(df)):
-                    line = ' '.join(str(value) for value in df.iloc[i].values)
-                    lines.append(line)
-                return lines
-            else:
-                return ["Excel file is empty"]
-        
-        return ["Unable to read file"]
-    
+        preview = preview_upload(stream, f"upload.{file_type}")
     except Exception as e:
-        return [f"Error reading file: {str(e)}"]
+        return [f"Error reading file: {str(e)}"], None
+    
+    lines = preview_lines(preview)
+    if not lines:
+        return ["CSV file is empty" if file_type == 'csv' else "Excel file is empty"], preview
+    return lines, preview
 
 @app.route('/api/process-files', methods=['POST'])
 def process_files():
@@ -56,7 +50,6 @@ def process_files():
             return jsonify({'error': 'Please upload at least 1 file'}), 400
         
         results = []
-        temp_files = []
         
         for file in valid_files:
             if allowed_file(file.filename):
@@ -73,14 +66,11 @@ def process_files():
                     continue
                 
                 file_ext = file.filename.rsplit('.', 1)[1].lower()
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_ext}')
-                file.save(temp_file.name)
-                temp_files.append(temp_file.name)
-                
-                lines = read_file_first_three_lines(temp_file.name, file_ext)
+                lines, preview = read_file_first_three_lines(file.stream, file_ext)
                 results.append({
                     'filename': file.filename,
                     'lines': lines,
+                    'preview': preview,
                     'error': False
                 })
             else:
@@ -90,12 +80,6 @@ def process_files():
                     'error': True
                 })
         
-        for temp_file in temp_files:
-            try:
-                os.unlink(temp_file)
-            except:
-                pass
-        
         return jsonify({
             'success': True,
             'results': results,
@@ -1,8 +1,8 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
-import pandas as pd
-import tempfile
+
+from preview import preview_upload, preview_lines
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend communication
@@ -16,37 +16,25 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def read_file_first_three_lines(file_path, file_type):
-    """Read the first three lines/rows of different file types"""
+def read_file_first_three_lines(stream, file_type):
+    """
+    Read the first three lines/rows of an uploaded file
+
+    Only the first rows of the first sheet are read from the stream (see
+    preview.py), so no temporary file is needed.
+
+    Returns:
+        tuple: (lines, header-only preview or None on error)
+    """
     try:
-        if file_type == 'csv':
-            df = pd.read_csv(file_path, nrows=3)
-            if len(df) > 0:
-                lines = []
-                for i in range(len(df)):
-                    # Convert each row to string and join with spaces
-                    line = ' '.join(str(value) for value in df.iloc[i].values)
-                    lines.append(line)
-                return lines
-            else:
-                return ["CSV file is empty"]
-        
-        elif file_type in ['xlsx', 'xls']:
-            df = pd.read_excel(file_path, nrows=3)
-            if len(df) > 0:
-                lines = []
-                for i in range(len(df)):
-                    # Convert each row to string and join with spaces
-                    line = ' '.join(str(value) for value in df.iloc[i].values)
-                    lines.append(line)
-                return lines
-            else:
-                return ["Excel file is empty"]
-        
-        return ["Unable to read file"]
-    
+        preview = preview_upload(stream, f"upload.{file_type}")
     except Exception as e:
-        return [f"Error reading file: {str(e)}"]
+        return [f"Error reading file: {str(e)}"], None
+    
+    lines = preview_lines(preview)
+    if not lines:
+        return ["CSV file is empty" if file_type == 'csv' else "Excel file is empty"], preview
+    return lines, preview
 
 @app.route('/api/process-files', methods=['POST'])
 def process_files():
@@ -64,7 +52,6 @@ def process_files():
             return jsonify({'error': 'Please upload at least 1 file'}), 400
         
         results = []
-        temp_files = []
         
         for file in valid_files:
             if allowed_file(file.filename):
@@ -84,17 +71,13 @@ def process_files():
                 # Get file extension
                 file_ext = file.filename.rsplit('.', 1)[1].lower()
                 
-                # Save file temporarily
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_ext}')
-                file.save(temp_file.name)
-                temp_files.append(temp_file.name)
-                
-                # Read first three lines
-                lines = read_file_first_three_lines(temp_file.name, file_ext)
+                # Read first three lines straight from the upload stream
+                lines, preview = read_file_first_three_lines(file.stream, file_ext)
                 print(f"DEBUG: Processing {file.filename}, lines: {lines}")  # Debug log
                 results.append({
                     'filename': file.filename,
                     'lines': lines,
+                    'preview': preview,
                     'error': False
                 })
             
@@ -105,13 +88,6 @@ def process_files():
                     'error': True
                 })
         
-        # Clean up temporary files
-        for temp_file in temp_files:
-            try:
-                os.unlink(temp_file)
-            except:
-                pass
-        
         print(f"DEBUG: Final results: {results}")  # Debug log
         
         return jsonify({
@@ -19,8 +19,9 @@ Architecture Assumptions:
 - Fallback mechanisms ensure system reliability when AI services are unavailable
 """
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Request, request, jsonify, send_file, Response, stream_with_context, g
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 import os
 import sys
 import pandas as pd
@@ -31,6 +32,17 @@ from datetime import datetime
 import numpy as np
 import uuid
 
+import hashlib
+
+from disk_cache import register_file_hash
+from output_writer import OUTPUT_FORMATS, DEFAULT_OUTPUT_FORMAT, write_dataframe
+from intermediate import INTERMEDIATE_EXTENSION, is_arrow_path, read_frames, load_converted_data, remove_intermediate
+from workspaces import UPLOADS_SUBDIR, INTERMEDIATES_SUBDIR, OUTPUTS_SUBDIR, new_run_id, workspace_root, workspace_path, ensure_workspace, remove_workspace
+from jobs import STATUS_QUEUED, STATUS_COMPLETED, STATUS_FAILED, init_job_store, submit_job, get_job, get_job_timings, get_job_events, job_stage, get_stage_metric_totals, count_jobs_by_status
+from instrumentation import render_prometheus
+from preview import preview_upload
+from progress import report_progress
+
 # Initialize Flask application with CORS support
 # CORS is essential for frontend-backend communication in web applications
 app = Flask(__name__)
@@ -46,11 +58,28 @@ app.config['PORT'] = int(os.environ.get('PORT', 5001))  # Dynamic port for produ
 # These limits balance functionality with security and performance
 ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'xls'}  # Supported file formats for financial data
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB limit to prevent memory issues with large datasets
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Uploads are copied to disk in chunks of this size
+UPLOAD_SPOOL_MEMORY_SIZE = 500 * 1024  # File parts above this are spooled to a temp file
+# Whole upload requests above this are rejected while the body is being read;
+# single files are capped at MAX_FILE_SIZE while the form is parsed
+MAX_UPLOAD_REQUEST_SIZE = int(os.environ.get('MAX_UPLOAD_REQUEST_SIZE', 20 * MAX_FILE_SIZE))
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_REQUEST_SIZE
+
+# Progress event stream configuration
+EVENT_POLL_INTERVAL = 0.5  # Seconds between job event log polls
+EVENT_KEEPALIVE_INTERVAL = 15  # Seconds between SSE keep-alive comments
+# Seconds an event stream stays open before the client has to reconnect; kept
+# below gunicorn's 30s worker timeout, since a sync worker serves nothing else
+# while a stream is open
+EVENT_STREAM_WINDOW = int(os.environ.get('EVENT_STREAM_WINDOW', 20))
+EVENT_RECONNECT_DELAY_MS = 500  # SSE retry delay sent to the browser
 
 # Directory structure for file organization
-# This structure supports the bank-to-bank mapping workflow
-UPLOAD_STORAGE_DIR = 'uploaded_files'  # Original uploaded files storage
-EXCEL_OUTPUT_DIR = 'generated_excel_files'  # Processed Excel files for download
+# This structure supports the bank-to-bank mapping workflow. Requests with a
+# run ID use the same layout inside their own workspace (see workspaces.py);
+# these are the shared directories used by requests without one.
+UPLOAD_STORAGE_DIR = UPLOADS_SUBDIR  # Original uploaded files storage
+EXCEL_OUTPUT_DIR = OUTPUTS_SUBDIR  # Processed Excel files for download
 
 # Ensure required directories exist
 # Directory creation is idempotent - safe to run multiple times
@@ -62,22 +91,123 @@ if not os.path.exists(EXCEL_OUTPUT_DIR):
 
 # Temporary JSON files directory for intermediate processing
 # JSON format is used for schema analysis and OpenAI API communication
-JSON_TEMP_DIR = 'temp_json_files'
+JSON_TEMP_DIR = INTERMEDIATES_SUBDIR
 if not os.path.exists(JSON_TEMP_DIR):
     os.makedirs(JSON_TEMP_DIR)
 
+# Background job store for /api/trigger-main-processing
+init_job_store()
+
 # Note: Removed convert_to_json_serializable function
 # This was part of an earlier architecture that converted all files to JSON
 # Current approach maintains original file formats for better performance
 
-def save_uploaded_file(file_data, filename, is_schema=False, box_number=1):
-    """Save uploaded file with original filename in organized subdirectories"""
+@app.before_request
+def resolve_run_workspace():
+    """
+    Resolve the run workspace of the request into g.run_id and g.workspace_root
+    
+    The run ID is read from the "run_id" query parameter, the "X-Run-ID"
+    header or the "run_id" field of a JSON body. Requests without one use the
+    shared directories.
+    """
+    run_id = request.args.get('run_id') or request.headers.get('X-Run-ID')
+    if not run_id and request.is_json:
+        run_id = (request.get_json(silent=True) or {}).get('run_id')
+    try:
+        g.workspace_root = workspace_root(run_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    g.run_id = run_id or None
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds MAX_FILE_SIZE while it is being saved"""
+
+def stream_upload_to_file(file_data, target_path, max_size=None):
+    """
+    Copy an uploaded file to disk in chunks, hashing and measuring it on the fly
+
+    The upload is written to a temporary name and only moved into place when
+    complete, so an aborted or oversized upload never replaces a saved file.
+
+    Args:
+        file_data (FileStorage): Uploaded file
+        target_path (str): Destination path
+        max_size (int): Maximum size in bytes (default MAX_FILE_SIZE)
+
+    Returns:
+        tuple: (size in bytes, SHA-256 hex digest)
+
+    Raises:
+        UploadTooLargeError: As soon as more than max_size bytes have been read
+    """
+    max_size = max_size or MAX_FILE_SIZE
+    partial_path = f"{target_path}.{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(partial_path, 'wb') as out:
+            for chunk in iter(lambda: file_data.stream.read(UPLOAD_CHUNK_SIZE), b''):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(f"File too large (max {max_size // (1024*1024)}MB)")
+                digest.update(chunk)
+                out.write(chunk)
+        os.replace(partial_path, target_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    return size, digest.hexdigest()
+
+class BoundedUploadSpool(tempfile.SpooledTemporaryFile):
+    """
+    Spool for one multipart file part that keeps at most limit + 1 bytes
+
+    The form parser writes every file part to a spool before the request
+    handler runs. Bytes past the limit are read off the request and dropped,
+    so an oversized file never takes more than MAX_FILE_SIZE of memory or
+    disk, and stream_upload_to_file still sees it as too large.
+    """
+
+    def __init__(self, limit):
+        super().__init__(max_size=UPLOAD_SPOOL_MEMORY_SIZE, mode='w+b')
+        self.limit = limit
+        self.received = 0
+
+    def write(self, data):
+        keep = min(len(data), max(self.limit + 1 - self.received, 0))
+        self.received += len(data)
+        if keep:
+            super().write(data[:keep])
+        return len(data)
+
+class UploadRequest(Request):
+    """Request that spools multipart file parts into BoundedUploadSpool"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return BoundedUploadSpool(MAX_FILE_SIZE)
+
+app.request_class = UploadRequest
+
+def save_uploaded_file(file_data, filename, is_schema=False, box_number=1, workspace_root="."):
+    """
+    Save uploaded file with original filename in organized subdirectories
+    
+    The file is streamed to disk in chunks while its SHA-256 hash and size are
+    computed, and is rejected once it grows past MAX_FILE_SIZE.
+    
+    Args:
+        workspace_root (str): Workspace of the run the file belongs to
+    
+    Returns:
+        tuple: (saved_filename, unique_id, subdirectory, sha256, file_size)
+    """
     # Generate unique ID for this file
     unique_id = str(uuid.uuid4())
     
     # Create subdirectory based on box number
     subdirectory = f"bank{box_number}"
-    bank_dir = os.path.join(UPLOAD_STORAGE_DIR, subdirectory)
+    bank_dir = workspace_path(workspace_root, UPLOAD_STORAGE_DIR, subdirectory)
     
     # Create the subdirectory if it doesn't exist
     if not os.path.exists(bank_dir):
@@ -102,27 +232,35 @@ def save_uploaded_file(file_data, filename, is_schema=False, box_number=1):
             saved_filename = f"{base_name}_{timestamp}{extension}"
             saved_filepath = os.path.join(bank_dir, saved_filename)
     
-    # Save the original file
-    file_data.save(saved_filepath)
+    # Save the original file, hashing it as it is written so the parse cache
+    # can key on its content later without reading it again
+    file_size, content_hash = stream_upload_to_file(file_data, saved_filepath)
+    register_file_hash(saved_filepath, content_hash)
+    print(f"Saved {saved_filename} (sha256 {content_hash[:12]})")
+    
+    # The bank's files changed, so the category index must be rebuilt
+    from main import invalidate_category_index
+    invalidate_category_index(box_number, workspace_root)
     
-    return saved_filename, unique_id, subdirectory
+    return saved_filename, unique_id, subdirectory, content_hash, file_size
 
-def cleanup_temp_json_files():
-    """Clean up temporary JSON files"""
+def cleanup_temp_json_files(workspace_root="."):
+    """Clean up temporary JSON files and Arrow intermediates of a workspace"""
     try:
-        if os.path.exists(JSON_TEMP_DIR):
-            for filename in os.listdir(JSON_TEMP_DIR):
-                if filename.endswith('.json'):
-                    file_path = os.path.join(JSON_TEMP_DIR, filename)
-                    os.remove(file_path)
-                    print(f"Cleaned up JSON: {filename}")
+        json_dir = workspace_path(workspace_root, JSON_TEMP_DIR)
+        if os.path.exists(json_dir):
+            for filename in os.listdir(json_dir):
+                if filename.endswith(('.json', '.arrow')):
+                    file_path = os.path.join(json_dir, filename)
+                    remove_intermediate(file_path)
+                    print(f"Cleaned up intermediate: {filename}")
         return True
     except Exception as e:
         print(f"Error cleaning up JSON files: {str(e)}")
         return False
 
-def cleanup_uploaded_files():
-    """Clean up all uploaded XLSX/CSV files from bank1 and bank2"""
+def cleanup_uploaded_files(workspace_root="."):
+    """Clean up all uploaded XLSX/CSV files from bank1 and bank2 of a workspace"""
     try:
         cleaned_files = []
         failed_files = []
@@ -132,7 +270,7 @@ def cleanup_uploaded_files():
         gc.collect()
         
         # Clean bank1 directory
-        bank1_dir = os.path.join(UPLOAD_STORAGE_DIR, 'bank1')
+        bank1_dir = workspace_path(workspace_root, UPLOAD_STORAGE_DIR, 'bank1')
         if os.path.exists(bank1_dir):
             for filename in os.listdir(bank1_dir):
                 if filename.endswith(('.xlsx', '.csv', '.xls')):
@@ -157,7 +295,7 @@ def cleanup_uploaded_files():
                         print(f"Failed to clean: bank1/{filename} - {str(e)}")
         
         # Clean bank2 directory
-        bank2_dir = os.path.join(UPLOAD_STORAGE_DIR, 'bank2')
+        bank2_dir = workspace_path(workspace_root, UPLOAD_STORAGE_DIR, 'bank2')
         if os.path.exists(bank2_dir):
             for filename in os.listdir(bank2_dir):
                 if filename.endswith(('.xlsx', '.csv', '.xls')):
@@ -181,26 +319,30 @@ def cleanup_uploaded_files():
                         failed_files.append(f"bank2/{filename} ({str(e)})")
                         print(f"Failed to clean: bank2/{filename} - {str(e)}")
         
+        from main import invalidate_category_index
+        invalidate_category_index(workspace_root=workspace_root)
+        
         return len(failed_files) == 0, cleaned_files, failed_files
     except Exception as e:
         print(f"Error cleaning up uploaded files: {str(e)}")
         return False, [], [f"General error: {str(e)}"]
 
-def cleanup_all_files():
-    """Clean up both JSON files and uploaded files"""
+def cleanup_all_files(workspace_root="."):
+    """Clean up both JSON files and uploaded files of a workspace"""
     try:
         # Clean JSON files
-        json_success = cleanup_temp_json_files()
+        json_success = cleanup_temp_json_files(workspace_root)
         
         # Clean uploaded files
-        upload_success, cleaned_files, failed_files = cleanup_uploaded_files()
+        upload_success, cleaned_files, failed_files = cleanup_uploaded_files(workspace_root)
         
         # Combine all cleaned files
         all_cleaned_files = cleaned_files.copy()
         
         # Add JSON files to the list if they exist
-        if os.path.exists(JSON_TEMP_DIR):
-            json_files = [f for f in os.listdir(JSON_TEMP_DIR) if f.endswith('.json')]
+        json_dir = workspace_path(workspace_root, JSON_TEMP_DIR)
+        if os.path.exists(json_dir):
+            json_files = [f for f in os.listdir(json_dir) if f.endswith(('.json', '.arrow'))]
             all_cleaned_files.extend([f"temp_json/{f}" for f in json_files])
         
         return upload_success, all_cleaned_files, failed_files
@@ -209,7 +351,7 @@ def cleanup_all_files():
         return False, [], [f"General error: {str(e)}"]
 
 def create_fallback_excel_file(json_files, output_path):
-    """Create a fallback Excel file with all JSON data combined"""
+    """Create a fallback Excel file with all converted data (JSON or Arrow intermediates) combined"""
     try:
         import pandas as pd
         from openpyxl import Workbook
@@ -228,15 +370,18 @@ def create_fallback_excel_file(json_files, output_path):
         for json_file in json_files:
             if os.path.exists(json_file):
                 try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
+                    # Arrow intermediates are read straight into DataFrames
+                    if is_arrow_path(json_file):
+                        data = read_frames(json_file)
+                    else:
+                        data = load_converted_data(json_file)
                     
                     # Extract sheet names and data
                     for sheet_name, sheet_data in data.items():
                         if sheet_name.startswith('_') or sheet_name.lower() in ['metadata', 'data']:
                             continue
                         
-                        if isinstance(sheet_data, list) and len(sheet_data) > 0:
+                        if isinstance(sheet_data, (list, pd.DataFrame)) and len(sheet_data) > 0:
                             # Convert to DataFrame
                             df = pd.DataFrame(sheet_data)
                             
@@ -254,8 +399,8 @@ def create_fallback_excel_file(json_files, output_path):
             # Combine all data
             combined_df = pd.concat(all_data, ignore_index=True, sort=False)
             
-            # Write to Excel
-            combined_df.to_excel(output_path, index=False, sheet_name="Combined Data")
+            # Write to Excel (or CSV/Parquet, from the output extension)
+            write_dataframe(combined_df, output_path, sheet_name="Combined Data")
             
             print(f"Created fallback Excel file with {len(combined_df)} rows from {len(all_data)} data sources")
             return output_path
@@ -309,13 +454,45 @@ def extract_schema_title_from_excel(file_path, sheet_name):
 
 # Removed convert_file_to_json - no longer converting files to JSON
 
+def download_url(filename, run_id=None):
+    """Download URL of an output file, scoped to its run"""
+    url = f'/api/download-excel/{filename}'
+    return f'{url}?run_id={run_id}' if run_id else url
+
+@app.route('/api/runs', methods=['POST'])
+def create_run():
+    """Create an isolated workspace for one pipeline run and return its run ID"""
+    try:
+        run_id = new_run_id()
+        ensure_workspace(workspace_root(run_id))
+        return jsonify({'success': True, 'run_id': run_id}), 201
+    except Exception as e:
+        return jsonify({'error': f'Error creating run: {str(e)}'}), 500
+
+@app.route('/api/runs/<run_id>', methods=['DELETE'])
+def delete_run(run_id):
+    """Delete every upload, intermediate and output file of a run"""
+    try:
+        if not remove_workspace(run_id):
+            return jsonify({'error': 'Run not found'}), 404
+        from main import invalidate_category_index
+        invalidate_category_index(workspace_root=workspace_root(run_id))
+        return jsonify({'success': True, 'message': f'Run {run_id} deleted'})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Error deleting run: {str(e)}'}), 500
+
 @app.route('/api/download-files', methods=['POST'])
 def download_files():
-    """Download the latest generated Excel file"""
+    """Download the latest generated output file (Excel, CSV or Parquet)"""
     try:
-        # Find the most recent Excel file in the designated directory
+        # Find the most recent output file in the designated directory
         import glob
-        excel_files = glob.glob(os.path.join(EXCEL_OUTPUT_DIR, "*.xlsx"))
+        excel_files = [
+            path for output_format in OUTPUT_FORMATS
+            for path in glob.glob(os.path.join(workspace_path(g.workspace_root, EXCEL_OUTPUT_DIR), f"*.{output_format}"))
+        ]
         
         if not excel_files:
             return jsonify({'error': 'No Excel file found'}), 404
@@ -327,7 +504,7 @@ def download_files():
         return jsonify({
             'success': True,
             'filename': filename,
-            'download_url': f'/api/download-excel/{filename}'
+            'download_url': download_url(filename, g.run_id)
         })
         
     except Exception as e:
@@ -347,6 +524,9 @@ def process_files():
         # Get box number (1 or 2) to determine subdirectory
         box_number = int(request.args.get('box', 1))
         
+        # Optionally return a header-only preview of each upload
+        include_preview = request.args.get('preview', 'false').lower() == 'true'
+        
         files = request.files.getlist('files')
         
         # Filter out empty files
@@ -359,39 +539,45 @@ def process_files():
         
         for file in valid_files:
             if allowed_file(file.filename):
-                # Check file size
-                file.seek(0, 2)  # Seek to end
-                file_size = int(file.tell())
-                file.seek(0)  # Reset to beginning
-                
-                if file_size > MAX_FILE_SIZE:
-                    results.append({
-                        'filename': file.filename,
-                        'error': True,
-                        'message': f"File too large (max {MAX_FILE_SIZE // (1024*1024)}MB)"
-                    })
-                    continue
-                
-                # Reset file pointer to beginning for saving
-                file.seek(0)
-                
-                # Save the original file
+                # Save the original file (size is enforced while streaming)
                 saved_filename = None
                 unique_id = None
                 try:
-                    saved_filename, unique_id, subdirectory = save_uploaded_file(file, file.filename, is_schema, box_number)
+                    preview = None
+                    preview_error = None
+                    if include_preview:
+                        # Read from the upload stream before it is saved
+                        try:
+                            preview = preview_upload(file.stream, file.filename)
+                        except Exception as e:
+                            preview_error = f"Error reading file: {str(e)}"
+                    
+                    saved_filename, unique_id, subdirectory, sha256, file_size = save_uploaded_file(file, file.filename, is_schema, box_number, g.workspace_root)
                     print(f"DEBUG: Saved original file {file.filename} as {saved_filename}")
                     
-                    results.append({
+                    result = {
                         'filename': file.filename,
                         'saved_filename': saved_filename,
                         'unique_id': unique_id,
                         'file_size': file_size,
+                        'sha256': sha256,
                         'file_type': 'schema' if is_schema else 'data',
                         'subdirectory': subdirectory,
                         'error': False
-                    })
+                    }
+                    if include_preview:
+                        result['preview'] = preview
+                        if preview_error:
+                            result['preview_error'] = preview_error
+                    results.append(result)
                     
+                except UploadTooLargeError as size_error:
+                    results.append({
+                        'filename': file.filename,
+                        'error': True,
+                        'message': str(size_error)
+                    })
+                
                 except Exception as save_error:
                     results.append({
                         'filename': file.filename,
@@ -412,12 +598,75 @@ def process_files():
             'success': True,
             'results': results,
             'file_count': len(valid_files),
-            'is_schema': is_schema
+            'is_schema': is_schema,
+            'run_id': g.run_id
         })
     
+    except RequestEntityTooLarge as e:
+        return request_too_large(e)
     except Exception as e:
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
+@app.route('/api/preview-files', methods=['POST'])
+def preview_files():
+    """
+    Preview uploaded files without storing them
+    
+    Only the first rows of the first sheet are read, straight from the upload
+    stream, so the response time does not depend on the file size. Each
+    result holds the column names, inferred dtypes, sampled rows and a
+    row-count estimate (see preview.py).
+    
+    Query parameters:
+        rows: Data rows to sample (default PREVIEW_ROWS)
+    """
+    try:
+        if 'files' not in request.files:
+            return jsonify({'error': 'No files uploaded'}), 400
+        
+        max_rows = request.args.get('rows', type=int)
+        files = [file for file in request.files.getlist('files') if file and file.filename != '']
+        if len(files) == 0:
+            return jsonify({'error': 'Please upload at least 1 file'}), 400
+        
+        results = []
+        for file in files:
+            if not allowed_file(file.filename):
+                results.append({
+                    'filename': file.filename,
+                    'error': True,
+                    'message': "Invalid file type. Only CSV and Excel files are supported."
+                })
+                continue
+            try:
+                results.append({
+                    'filename': file.filename,
+                    'preview': preview_upload(file.stream, file.filename, max_rows),
+                    'error': False
+                })
+            except Exception as preview_error:
+                results.append({
+                    'filename': file.filename,
+                    'error': True,
+                    'message': f"Error reading file: {str(preview_error)}"
+                })
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'file_count': len(files)
+        })
+    
+    except RequestEntityTooLarge as e:
+        return request_too_large(e)
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+@app.errorhandler(413)
+def request_too_large(error):
+    """Reject upload requests larger than MAX_UPLOAD_REQUEST_SIZE"""
+    return jsonify({'error': f'Upload too large (max {MAX_UPLOAD_REQUEST_SIZE // (1024*1024)}MB per request)'}), 413
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -427,13 +676,14 @@ def health_check():
 def list_uploaded_files():
     """List all saved uploaded files"""
     try:
-        if not os.path.exists(UPLOAD_STORAGE_DIR):
+        upload_dir = workspace_path(g.workspace_root, UPLOAD_STORAGE_DIR)
+        if not os.path.exists(upload_dir):
             return jsonify({'files': []})
         
         files = []
-        for filename in os.listdir(UPLOAD_STORAGE_DIR):
+        for filename in os.listdir(upload_dir):
             if filename.endswith(('.csv', '.xlsx', '.xls')):
-                filepath = os.path.join(UPLOAD_STORAGE_DIR, filename)
+                filepath = os.path.join(upload_dir, filename)
                 file_stats = os.stat(filepath)
                 files.append({
                     'filename': filename,
@@ -454,7 +704,7 @@ def list_uploaded_files():
 def get_uploaded_file(filename):
     """Get a specific uploaded file by filename"""
     try:
-        filepath = os.path.join(UPLOAD_STORAGE_DIR, filename)
+        filepath = workspace_path(g.workspace_root, UPLOAD_STORAGE_DIR, filename)
         
         if not os.path.exists(filepath):
             return jsonify({'error': 'File not found'}), 404
@@ -476,7 +726,7 @@ def get_uploaded_file(filename):
 def delete_uploaded_file(filename):
     """Delete a specific uploaded file"""
     try:
-        filepath = os.path.join(UPLOAD_STORAGE_DIR, filename)
+        filepath = workspace_path(g.workspace_root, UPLOAD_STORAGE_DIR, filename)
         
         if not os.path.exists(filepath):
             return jsonify({'error': 'File not found'}), 404
@@ -501,9 +751,9 @@ def process_with_main():
         action = data['action']
         
         if action == 'analyze_schemas':
-            return analyze_schemas_with_main()
+            return analyze_schemas_with_main(g.workspace_root)
         elif action == 'compare_schemas':
-            return compare_schemas_with_main()
+            return compare_schemas_with_main(g.workspace_root)
         elif action == 'process_file':
             file_path = data.get('file_path')
             if not file_path:
@@ -515,19 +765,38 @@ def process_with_main():
     except Exception as e:
         return jsonify({'error': f'Error processing with main.py: {str(e)}'}), 500
 
-def analyze_schemas_with_main():
-    """Process uploaded XLSX/CSV files using main.py and analyze schemas"""
+def converted_file_path(file_info, workspace_root="."):
+    """
+    Intermediate path for an uploaded file (bank-prefixed so equal names cannot collide)
+    
+    The extension selects the format: ".arrow" intermediates when pyarrow is
+    available, JSON otherwise (see intermediate.py).
+    """
+    base_name = os.path.splitext(file_info['file'])[0]
+    return workspace_path(workspace_root, JSON_TEMP_DIR, f"{file_info['directory']}_{base_name}_converted{INTERMEDIATE_EXTENSION}")
+
+def interleave_bank_files(file_infos):
+    """Alternate Bank 1 and Bank 2 files so parallel conversion works on both halves at once"""
+    bank1 = [f for f in file_infos if f['directory'] == 'bank1']
+    bank2 = [f for f in file_infos if f['directory'] != 'bank1']
+    ordered = []
+    for index in range(max(len(bank1), len(bank2))):
+        ordered.extend(bank[index] for bank in (bank1, bank2) if index < len(bank))
+    return ordered
+
+def analyze_schemas_with_main(workspace_root="."):
+    """Process uploaded XLSX/CSV files of a workspace using main.py and analyze schemas"""
     try:
         # Import main.py functions
         sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-        from main import process_file, count_schemas_in_json
+        from main import convert_files, count_schemas_in_json
         
         # Find XLSX/CSV files in bank1 and bank2 directories
         bank1_files = []
         bank2_files = []
         
-        bank1_dir = os.path.join(UPLOAD_STORAGE_DIR, 'bank1')
-        bank2_dir = os.path.join(UPLOAD_STORAGE_DIR, 'bank2')
+        bank1_dir = workspace_path(workspace_root, UPLOAD_STORAGE_DIR, 'bank1')
+        bank2_dir = workspace_path(workspace_root, UPLOAD_STORAGE_DIR, 'bank2')
         
         if os.path.exists(bank1_dir):
             bank1_files = [f for f in os.listdir(bank1_dir) if f.lower().endswith(('.xlsx', '.csv', '.xls'))]
@@ -540,35 +809,27 @@ def analyze_schemas_with_main():
         processed_files = []
         json_files = []
         
-        # Process bank1 files
-        for filename in bank1_files:
-            file_path = os.path.join(bank1_dir, filename)
-            try:
-                # Process file with main.py - this creates JSON files
-                result = process_file(file_path, clean_data=True, include_metadata=True)
-                processed_files.append({
-                    'original_file': filename,
-                    'directory': 'bank1',
-                    'json_file': result.get('output_file', f"{os.path.splitext(filename)[0]}_converted.json")
-                })
-                json_files.append(result.get('output_file', f"{os.path.splitext(filename)[0]}_converted.json"))
-            except Exception as e:
-                print(f"Error processing {filename}: {str(e)}")
-        
-        # Process bank2 files
-        for filename in bank2_files:
-            file_path = os.path.join(bank2_dir, filename)
-            try:
-                # Process file with main.py - this creates JSON files
-                result = process_file(file_path, clean_data=True, include_metadata=True)
-                processed_files.append({
-                    'original_file': filename,
-                    'directory': 'bank2',
-                    'json_file': result.get('output_file', f"{os.path.splitext(filename)[0]}_converted.json")
-                })
-                json_files.append(result.get('output_file', f"{os.path.splitext(filename)[0]}_converted.json"))
-            except Exception as e:
-                print(f"Error processing {filename}: {str(e)}")
+        # Convert Bank 1 and Bank 2 files in parallel
+        file_infos = interleave_bank_files(
+            [{'file': f, 'path': os.path.join(bank1_dir, f), 'directory': 'bank1'} for f in bank1_files] +
+            [{'file': f, 'path': os.path.join(bank2_dir, f), 'directory': 'bank2'} for f in bank2_files]
+        )
+        conversions = convert_files(
+            [(file_info['path'], converted_file_path(file_info, workspace_root)) for file_info in file_infos],
+            clean_data=True,
+            include_metadata=True
+        )
+        
+        for file_info, conversion in zip(file_infos, conversions):
+            if not conversion['success']:
+                print(f"Error processing {file_info['file']}: {conversion['error']}")
+                continue
+            processed_files.append({
+                'original_file': file_info['file'],
+                'directory': file_info['directory'],
+                'json_file': conversion['output_file']
+            })
+            json_files.append(conversion['output_file'])
         
         # Count schemas in JSON files
         schema_counts = []
@@ -592,115 +853,108 @@ def analyze_schemas_with_main():
     except Exception as e:
         return jsonify({'error': f'Error processing files with main.py: {str(e)}'}), 500
 
-@app.route('/api/trigger-main-processing', methods=['POST'])
-def trigger_main_processing():
-    """Process all uploaded XLSX/CSV files with main.py and return results"""
-    try:
-        # Temporarily redirect stdout to suppress Unicode print statements
-        from io import StringIO
-        import time
-        import json
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        sys.stdout = StringIO()
-        sys.stderr = StringIO()
-        
-        # Import main.py functions
-        sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-        from main import process_file, count_schemas_in_json, send_json_to_chatgpt, process_chatgpt_schema_analysis, create_combined_customer_data
-        
-        # Find all XLSX/CSV files in uploaded_files directories
-        all_files = []
-        
-        # Check bank1 directory
-        bank1_dir = os.path.join(UPLOAD_STORAGE_DIR, 'bank1')
-        if os.path.exists(bank1_dir):
-            for filename in os.listdir(bank1_dir):
-                if filename.lower().endswith(('.xlsx', '.csv', '.xls')):
-                    all_files.append({
-                        'file': filename,
-                        'path': os.path.join(bank1_dir, filename),
-                        'directory': 'bank1'
-                    })
-        
-        # Check bank2 directory
-        bank2_dir = os.path.join(UPLOAD_STORAGE_DIR, 'bank2')
-        if os.path.exists(bank2_dir):
-            for filename in os.listdir(bank2_dir):
-                if filename.lower().endswith(('.xlsx', '.csv', '.xls')):
-                    all_files.append({
-                        'file': filename,
-                        'path': os.path.join(bank2_dir, filename),
-                        'directory': 'bank2'
-                    })
-        
-        if len(all_files) == 0:
-            return jsonify({
-                'success': False,
-                'message': 'No XLSX/CSV files found in uploaded_files directories',
-                'files_found': 0
-            })
-        
-        # Process each file with main.py
+def run_main_processing(job_id=None, use_llm_cache=True, matcher='llm', output_format=DEFAULT_OUTPUT_FORMAT, run_id=None):
+    """
+    Run the full pipeline over all uploaded XLSX/CSV files
+    
+    Converts every upload to JSON, counts schemas, matches the Bank 1 and
+    Bank 2 schemas and creates the combined Excel file. Runs inside a job
+    worker, so stage durations are recorded against job_id.
+    
+    Args:
+        job_id (str): Job ID for stage timings (None when run directly)
+        use_llm_cache (bool): Serve the schema matching from the LLM cache
+        matcher (str): 'llm' (ChatGPT, local matcher if it fails), 'local'
+            (offline only) or 'hybrid' (local, ChatGPT for low-confidence pairs);
+            the result's matcher_used says which one produced the matches
+        output_format (str): Combined output format: 'xlsx', 'csv' or 'parquet'
+        run_id (str): Run whose workspace holds the uploads and receives the
+            intermediates and output (None for the shared directories)
+    
+    Returns:
+        dict: Processing summary returned by the job result endpoint
+    """
+    import time
+    
+    root = ensure_workspace(workspace_root(run_id))
+    
+    # Import main.py functions
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from main import convert_files, count_schemas_in_json, match_schemas_with_chatgpt, match_schemas_locally, create_schema_json_files, create_combined_customer_data
+    
+    # Find all XLSX/CSV files in uploaded_files directories
+    all_files = []
+    
+    # Check bank1 directory
+    bank1_dir = workspace_path(root, UPLOAD_STORAGE_DIR, 'bank1')
+    if os.path.exists(bank1_dir):
+        for filename in os.listdir(bank1_dir):
+            if filename.lower().endswith(('.xlsx', '.csv', '.xls')):
+                all_files.append({
+                    'file': filename,
+                    'path': os.path.join(bank1_dir, filename),
+                    'directory': 'bank1'
+                })
+    
+    # Check bank2 directory
+    bank2_dir = workspace_path(root, UPLOAD_STORAGE_DIR, 'bank2')
+    if os.path.exists(bank2_dir):
+        for filename in os.listdir(bank2_dir):
+            if filename.lower().endswith(('.xlsx', '.csv', '.xls')):
+                all_files.append({
+                    'file': filename,
+                    'path': os.path.join(bank2_dir, filename),
+                    'directory': 'bank2'
+                })
+    
+    if len(all_files) == 0:
+        return {
+            'success': False,
+            'message': 'No XLSX/CSV files found in uploaded_files directories',
+            'files_found': 0,
+            'run_id': run_id
+        }
+    
+    # Convert every file with main.py, Bank 1 and Bank 2 files in parallel
+    with job_stage(job_id, 'convert_files') as stage:
         results = []
         json_files_created = []
+        converted_json = {}
         
-        for file_info in all_files:
-            try:
-                print(f"Processing {file_info['file']} from {file_info['directory']}")
-                
-                # Create output file in temp directory
-                base_name = os.path.splitext(file_info['file'])[0]
-                temp_output_file = os.path.join(JSON_TEMP_DIR, f"{base_name}_converted.json")
-                
-                # Process file with better error handling
-                try:
-                    result = process_file(file_info['path'], output_file=temp_output_file, clean_data=True, include_metadata=True)
-                    
-                    # Check if result is valid
-                    if result is None:
-                        raise Exception("process_file returned None")
-                    
-                    results.append({
-                        'original_file': file_info['file'],
-                        'directory': file_info['directory'],
-                        'json_file': temp_output_file,
-                        'success': True,
-                        'metadata': result.get('metadata', {}) if isinstance(result, dict) else {}
-                    })
-                    
-                    json_files_created.append(temp_output_file)
-                    
-                except UnicodeEncodeError as ue:
-                    # Handle Unicode encoding errors specifically
-                    error_msg = f"Unicode encoding error: {str(ue)}"
-                    print(f"Unicode error processing {file_info['file']}: {error_msg}")
-                    results.append({
-                        'original_file': file_info['file'],
-                        'directory': file_info['directory'],
-                        'success': False,
-                        'error': error_msg
-                    })
-                except Exception as pe:
-                    # Handle other processing errors
-                    error_msg = f"Processing error: {str(pe)}"
-                    print(f"Error processing {file_info['file']}: {error_msg}")
-                    results.append({
-                        'original_file': file_info['file'],
-                        'directory': file_info['directory'],
-                        'success': False,
-                        'error': error_msg
-                    })
-                
-            except Exception as e:
+        ordered_files = interleave_bank_files(all_files)
+        conversions = convert_files(
+            [(file_info['path'], converted_file_path(file_info, root)) for file_info in ordered_files],
+            clean_data=True,
+            include_metadata=True
+        )
+        
+        for file_info, conversion in zip(ordered_files, conversions):
+            if conversion['success']:
+                results.append({
+                    'original_file': file_info['file'],
+                    'directory': file_info['directory'],
+                    'json_file': conversion['output_file'],
+                    'success': True,
+                    'metadata': conversion['metadata']
+                })
+                json_files_created.append(conversion['output_file'])
+                converted_json[file_info['path']] = conversion['output_file']
+            else:
+                print(f"Error processing {file_info['file']}: {conversion['error']}")
                 results.append({
                     'original_file': file_info['file'],
                     'directory': file_info['directory'],
                     'success': False,
-                    'error': str(e)
+                    'error': f"Processing error: {conversion['error']}"
                 })
         
-        # Count schemas in created JSON files
+        stage['rows'] = sum(
+            result['metadata'].get('total_rows', result['metadata'].get('rows', 0))
+            for result in results if result['success']
+        )
+    
+    # Count schemas in created JSON files
+    with job_stage(job_id, 'count_schemas'):
         schema_counts = []
         for json_file in json_files_created:
             if os.path.exists(json_file):
@@ -720,45 +974,37 @@ def trigger_main_processing():
                         'full_path': json_file,
                         'schema_count': 0
                     })
+    
+    # Perform full schema analysis to create Excel file
+    excel_file_path = None
+    matcher_used = None
+    try:
+        # Find schema files for analysis
+        schema_files = []
+        for file_info in all_files:
+            if 'schema' in file_info['file'].lower():
+                schema_files.append(file_info)
         
-        # Perform full schema analysis to create Excel file
-        excel_file_path = None
-        try:
-            # Find schema files for analysis
-            schema_files = []
-            for file_info in all_files:
-                if 'schema' in file_info['file'].lower():
-                    schema_files.append(file_info)
+        if len(schema_files) >= 2:  # Need at least 2 schema files
+            # Schema files were converted with the other uploads; reuse their JSON
+            bank1_schema_json = None
+            bank2_schema_json = None
             
-            if len(schema_files) >= 2:  # Need at least 2 schema files
-                # Process schema files to JSON
-                bank1_schema_json = None
-                bank2_schema_json = None
-                
-                for schema_file in schema_files:
-                    if schema_file['directory'] == 'bank1':
-                        base_name = os.path.splitext(schema_file['file'])[0]
-                        temp_json = os.path.join(JSON_TEMP_DIR, f"{base_name}_converted.json")
-                        try:
-                            process_file(schema_file['path'], output_file=temp_json, clean_data=True, include_metadata=True)
-                            bank1_schema_json = temp_json
-                        except Exception as e:
-                            print(f"Error processing bank1 schema: {e}")
-                    elif schema_file['directory'] == 'bank2':
-                        base_name = os.path.splitext(schema_file['file'])[0]
-                        temp_json = os.path.join(JSON_TEMP_DIR, f"{base_name}_converted.json")
-                        try:
-                            process_file(schema_file['path'], output_file=temp_json, clean_data=True, include_metadata=True)
-                            bank2_schema_json = temp_json
-                        except Exception as e:
-                            print(f"Error processing bank2 schema: {e}")
+            for schema_file in schema_files:
+                schema_json = converted_json.get(schema_file['path'])
+                if not schema_json:
+                    print(f"Error processing {schema_file['directory']} schema: {schema_file['file']} was not converted")
+                elif schema_file['directory'] == 'bank1':
+                    bank1_schema_json = schema_json
+                elif schema_file['directory'] == 'bank2':
+                    bank2_schema_json = schema_json
+            
+            # Perform schema analysis if we have both schema files
+            if bank1_schema_json and bank2_schema_json:
+                print("Starting full schema analysis...")
                 
-                # Perform schema analysis if we have both schema files
-                if bank1_schema_json and bank2_schema_json:
-                    print("Starting full schema analysis...")
-                    
-                    # Send to ChatGPT for schema comparison
-                    prompt = """compare the schemas from the two banks provided in the JSON files. For each schema, evaluate all possible combinations and identify the best corresponding schemas based on their descriptions.
+                # Send to ChatGPT for schema comparison
+                prompt = """compare the schemas from the two banks provided in the JSON files. For each schema, evaluate all possible combinations and identify the best corresponding schemas based on their descriptions.
 
 MAKE THE MAX NUMBER OF MATCHES AS POSSIBLE, HENCE LEAVE A FEW UN MATCHED SCHEMAS AS POSSIBLE. but do not force connections — if a schema really does not correspond to any other, leave it unmatched.
 
@@ -773,46 +1019,55 @@ For each schema, provide the following information:
 - Whether it matches with another schema (and which one)
 
 Return the result in a structured JSON format with matched and unmatched schemas."""
-                    
-                    try:
-                        response = send_json_to_chatgpt(bank1_schema_json, prompt, bank2_schema_json)
-                    except Exception as api_error:
-                        print(f"OpenAI API error: {api_error}")
-                        print("Creating fallback Excel file without AI analysis...")
-                        response = None
-                    
-                    if response:
-                        # Parse response and create files
-                        with open(bank1_schema_json, 'r', encoding='utf-8') as f:
-                            bank1_data = json.load(f)
-                        with open(bank2_schema_json, 'r', encoding='utf-8') as f:
-                            bank2_data = json.load(f)
+                
+                with job_stage(job_id, 'schema_matching'):
+                    parsed_data = None
+                    matcher_used = matcher
+                    if matcher in ('local', 'hybrid'):
+                        parsed_data = match_schemas_locally(
+                            bank1_schema_json, bank2_schema_json, prompt,
+                            refine_with_llm=(matcher == 'hybrid'),
+                            use_cache=use_llm_cache
+                        )
+                    else:
+                        try:
+                            parsed_data = match_schemas_with_chatgpt(bank1_schema_json, bank2_schema_json, prompt, use_cache=use_llm_cache)
+                        except Exception as api_error:
+                            print(f"OpenAI API error: {api_error}")
                         
-                        parsed_data = process_chatgpt_schema_analysis(response, bank1_schema_json, bank2_schema_json, JSON_TEMP_DIR)
+                        if not parsed_data:
+                            # Match offline rather than merging without any matches
+                            print("ChatGPT schema matching unavailable - using the local matcher...")
+                            matcher_used = 'local'
+                            report_progress("matcher_fallback", requested=matcher, used=matcher_used)
+                            parsed_data = match_schemas_locally(bank1_schema_json, bank2_schema_json)
+                
+                with job_stage(job_id, 'merge'):
+                    if parsed_data and parsed_data["matched_schemas"]:
+                        # Write matched/unmatched schema files alongside the JSON
+                        create_schema_json_files(parsed_data, workspace_path(root, JSON_TEMP_DIR))
                         
-                        if parsed_data:
-                            # Create combined Excel file
-                            excel_filename = f"combined_customer_data_{int(time.time())}.xlsx"
-                            excel_file_path = os.path.join(EXCEL_OUTPUT_DIR, excel_filename)
-                            
-                            combined_file = create_combined_customer_data(
-                                parsed_data["matched_schemas"], 
-                                excel_file_path
-                            )
-                            
-                            if combined_file:
-                                excel_file_path = combined_file
-                                print(f"Created Excel file: {excel_file_path}")
-                            else:
-                                excel_file_path = None
-                                print("Failed to create Excel file")
+                        # Create combined Excel file
+                        excel_filename = f"combined_customer_data_{int(time.time())}.{output_format}"
+                        excel_file_path = workspace_path(root, EXCEL_OUTPUT_DIR, excel_filename)
+                        
+                        combined_file = create_combined_customer_data(
+                            parsed_data["matched_schemas"], 
+                            excel_file_path,
+                            workspace_root=root
+                        )
+                        
+                        if combined_file:
+                            excel_file_path = combined_file
+                            print(f"Created Excel file: {excel_file_path}")
                         else:
-                            print("Failed to parse ChatGPT response")
+                            excel_file_path = None
+                            print("Failed to create Excel file")
                     else:
-                        print("No response from ChatGPT - creating fallback Excel file...")
+                        print("No schema matches found - creating fallback Excel file...")
                         # Create a fallback Excel file with all data combined
-                        excel_filename = f"combined_customer_data_fallback_{int(time.time())}.xlsx"
-                        excel_file_path = os.path.join(EXCEL_OUTPUT_DIR, excel_filename)
+                        excel_filename = f"combined_customer_data_fallback_{int(time.time())}.{output_format}"
+                        excel_file_path = workspace_path(root, EXCEL_OUTPUT_DIR, excel_filename)
                         
                         # Create a simple combined Excel file with all data
                         try:
@@ -821,48 +1076,192 @@ Return the result in a structured JSON format with matched and unmatched schemas
                         except Exception as fallback_error:
                             print(f"Failed to create fallback Excel file: {fallback_error}")
                             excel_file_path = None
-                else:
-                    print("Missing schema files for analysis")
             else:
-                print("Not enough schema files for analysis")
-                
-        except Exception as e:
-            print(f"Error in schema analysis: {e}")
-            excel_file_path = None
+                print("Missing schema files for analysis")
+        else:
+            print("Not enough schema files for analysis")
+    
+    except Exception as e:
+        print(f"Error in schema analysis: {e}")
+        excel_file_path = None
+
+    return {
+        'success': True,
+        'message': f'Processed {len(all_files)} files with main.py',
+        'files_processed': len([r for r in results if r['success']]),
+        'files_failed': len([r for r in results if not r['success']]),
+        'results': results,
+        'json_files_created': json_files_created,
+        'schema_counts': schema_counts,
+        'total_schemas': sum(sc['schema_count'] for sc in schema_counts if isinstance(sc.get('schema_count'), (int, float))),
+        'output_directory': os.path.abspath(root),  # Workspace holding the intermediates and output
+        'excel_file_path': excel_file_path,  # Path to the created Excel file
+        'excel_file_name': os.path.basename(excel_file_path) if excel_file_path else None,
+        'output_format': output_format,
+        'matcher': matcher,
+        'matcher_used': matcher_used,  # 'local' when ChatGPT failed and the local matcher was used
+        'run_id': run_id,
+        'download_url': download_url(os.path.basename(excel_file_path), run_id) if excel_file_path else None
+    }
 
+@app.route('/api/trigger-main-processing', methods=['POST'])
+def trigger_main_processing():
+    """Queue processing of all uploaded XLSX/CSV files and return the job ID"""
+    try:
+        # Callers can force a fresh model call with {"bypass_cache": true}
+        # and pick the schema matcher with {"matcher": "llm" | "local" | "hybrid"}
+        # and the output with {"output_format": "xlsx" | "csv" | "parquet"}
+        request_options = request.get_json(silent=True) or {}
+        use_llm_cache = not request_options.get('bypass_cache', False)
+        matcher = request_options.get('matcher', 'llm')
+        if matcher not in ('llm', 'local', 'hybrid'):
+            return jsonify({'error': f'Unknown matcher: {matcher}'}), 400
+        output_format = str(request_options.get('output_format', DEFAULT_OUTPUT_FORMAT)).lower()
+        if output_format not in OUTPUT_FORMATS:
+            return jsonify({'error': f'Unknown output format: {output_format}'}), 400
+        
+        job_id = submit_job(run_main_processing, use_llm_cache=use_llm_cache, matcher=matcher, output_format=output_format, run_id=g.run_id)
+        
         return jsonify({
             'success': True,
-            'message': f'Processed {len(all_files)} files with main.py',
-            'files_processed': len([r for r in results if r['success']]),
-            'files_failed': len([r for r in results if not r['success']]),
-            'results': results,
-            'json_files_created': json_files_created,
-            'schema_counts': schema_counts,
-            'total_schemas': sum(sc['schema_count'] for sc in schema_counts if isinstance(sc.get('schema_count'), (int, float))),
-            'output_directory': os.getcwd(),  # Where the JSON files are created
-            'excel_file_path': excel_file_path,  # Path to the created Excel file
-            'excel_file_name': os.path.basename(excel_file_path) if excel_file_path else None
-        })
+            'job_id': job_id,
+            'run_id': g.run_id,
+            'status': STATUS_QUEUED,
+            'status_url': f'/api/jobs/{job_id}',
+            'events_url': f'/api/jobs/{job_id}/events',
+            'result_url': f'/api/jobs/{job_id}/result'
+        }), 202
         
     except Exception as e:
         return jsonify({'error': f'Error triggering main.py processing: {str(e)}'}), 500
-    finally:
-        # Restore stdout and stderr
-        sys.stdout = old_stdout
-        sys.stderr = old_stderr
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Return the status of a processing job"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    job.pop('result')
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/timings', methods=['GET'])
+def get_job_stage_timings(job_id):
+    """
+    Return per-stage timings of a processing job
+    
+    Nested stages are listed with their parent stage; total_seconds only adds
+    up top-level stages, so nested time is not counted twice.
+    """
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    timings = get_job_timings(job_id)
+    return jsonify({
+        'job_id': job_id,
+        'status': job['status'],
+        'stages': timings,
+        'total_seconds': sum(timing['duration'] for timing in timings if not timing['parent'])
+    })
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """
+    Stream a job's progress events as server-sent events
+    
+    Each event carries its name, elapsed seconds since the job started and
+    the stage fields (rows, seconds, file, ...). Reconnecting clients resume
+    after the Last-Event-ID they received. The stream ends with a "done"
+    event once the job has finished.
+    
+    Each response stays open for at most EVENT_STREAM_WINDOW seconds, so a
+    long merge never holds a worker past its timeout; EventSource reconnects
+    on its own and resumes from the last event id.
+    """
+    import time
+    
+    if get_job(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    try:
+        last_id = int(request.headers.get('Last-Event-ID') or request.args.get('after', 0))
+    except ValueError:
+        last_id = 0
+    
+    def generate():
+        nonlocal last_id
+        last_sent = time.monotonic()
+        closes_at = last_sent + EVENT_STREAM_WINDOW
+        yield f"retry: {EVENT_RECONNECT_DELAY_MS}\n\n"
+        while True:
+            # Read the status before the events so nothing emitted before the
+            # job finished can be missed
+            job = get_job(job_id)
+            for event in get_job_events(job_id, last_id):
+                last_id = event['id']
+                payload = dict(event['data'], elapsed=event['elapsed'])
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(payload, default=str)}\n\n"
+                last_sent = time.monotonic()
+            
+            if job is None or job['status'] in (STATUS_COMPLETED, STATUS_FAILED):
+                status = job['status'] if job else STATUS_FAILED
+                yield f"event: done\ndata: {json.dumps({'status': status})}\n\n"
+                return
+            
+            if time.monotonic() - last_sent > EVENT_KEEPALIVE_INTERVAL:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            if time.monotonic() >= closes_at:
+                # End this response; the client reconnects with Last-Event-ID
+                return
+            time.sleep(EVENT_POLL_INTERVAL)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """Return the result of a finished processing job"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    if job['status'] == STATUS_FAILED:
+        return jsonify({'success': False, 'status': job['status'], 'error': job['error']}), 500
+    if job['status'] != STATUS_COMPLETED:
+        return jsonify({'success': False, 'status': job['status'], 'error': 'Job has not finished yet'}), 409
+    
+    return jsonify(job['result'])
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Return the stage metrics of all processing jobs in the Prometheus text format"""
+    try:
+        job_lines = ["# HELP bridgette_jobs Processing jobs by status", "# TYPE bridgette_jobs gauge"]
+        job_lines.extend(f'bridgette_jobs{{status="{status}"}} {count}' for status, count in sorted(count_jobs_by_status().items()))
+        return Response(
+            render_prometheus(get_stage_metric_totals(), job_lines),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+    except Exception as e:
+        return jsonify({'error': f'Error collecting metrics: {str(e)}'}), 500
 
 @app.route('/api/download-excel/<filename>', methods=['GET'])
 def download_excel_file(filename):
-    """Download the merged Excel file and delete it after download"""
+    """Download the merged output file (Excel, CSV or Parquet) and delete it after download"""
     try:
         # Look for the Excel file in the designated directory
-        excel_path = os.path.join(EXCEL_OUTPUT_DIR, filename)
+        excel_path = workspace_path(g.workspace_root, EXCEL_OUTPUT_DIR, filename)
         
         if not os.path.exists(excel_path):
             return jsonify({'error': 'Excel file not found'}), 404
         
         # Send the file and then delete it
-        response = send_file(excel_path, as_attachment=True, download_name=filename)
+        response = send_file(os.path.abspath(excel_path), as_attachment=True, download_name=filename)
         
         # Delete the file after sending (in a separate thread to avoid blocking)
         import threading
@@ -883,9 +1282,11 @@ def download_excel_file(filename):
 
 @app.route('/api/cleanup-json-files', methods=['POST'])
 def cleanup_json_files():
-    """Clean up all files (JSON and uploaded files)"""
+    """Clean up all files (JSON and uploaded files) and remove the run's workspace"""
     try:
-        success, cleaned_files, failed_files = cleanup_all_files()
+        success, cleaned_files, failed_files = cleanup_all_files(g.workspace_root)
+        if success and g.run_id:
+            remove_workspace(g.run_id)
         
         response_data = {
             'success': success,
@@ -904,16 +1305,17 @@ def cleanup_json_files():
     except Exception as e:
         return jsonify({'error': f'Error cleaning up files: {str(e)}'}), 500
 
-def compare_schemas_with_main():
-    """Compare schemas using main.py functionality"""
+def compare_schemas_with_main(workspace_root="."):
+    """Compare schemas of a workspace using main.py functionality"""
     try:
         # Import main.py functions
         sys.path.append(os.path.dirname(os.path.abspath(__file__)))
         from main import send_json_to_chatgpt, parse_chatgpt_response, create_schema_json_files
         
         # Get all schema files from json_storage
+        upload_dir = workspace_path(workspace_root, UPLOAD_STORAGE_DIR)
         schema_files = []
-        for filename in os.listdir(UPLOAD_STORAGE_DIR):
+        for filename in os.listdir(upload_dir):
             if filename.endswith('.json') and 'schema' in filename.lower():
                 schema_files.append(filename)
         
@@ -921,8 +1323,8 @@ def compare_schemas_with_main():
             return jsonify({'error': 'Need at least 2 schema files for comparison'}), 400
         
         # Use the first two schema files
-        file1_path = os.path.join(UPLOAD_STORAGE_DIR, schema_files[0])
-        file2_path = os.path.join(UPLOAD_STORAGE_DIR, schema_files[1])
+        file1_path = os.path.join(upload_dir, schema_files[0])
+        file2_path = os.path.join(upload_dir, schema_files[1])
         
         # Send to ChatGPT for comparison (this would require OpenAI API key)
         prompt = """
@@ -981,7 +1383,11 @@ if __name__ == '__main__':
     print("  DELETE /api/uploaded-files/<filename> - Delete uploaded file")
     print("")
     print("  POST /api/process-with-main - Process files using main.py functionality")
-    print("  POST /api/trigger-main-processing - Process all uploaded files with main.py")
+    print("  POST /api/trigger-main-processing - Queue processing of all uploaded files, returns a job ID")
+    print("  GET  /api/jobs/<job_id> - Processing job status")
+    print("  GET  /api/jobs/<job_id>/timings - Per-stage timings")
+    print("  GET  /api/jobs/<job_id>/events - Progress events (server-sent events)")
+    print("  GET  /api/jobs/<job_id>/result - Result of a finished job")
     print("  POST /api/cleanup-json-files - Clean up temporary JSON files")
     print("Supported formats: CSV, Excel (.xlsx, .xls)")
     print("Features:")
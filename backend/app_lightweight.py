@@ -1,8 +1,8 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
-import csv
-import tempfile
+
+from preview import preview_upload, preview_lines
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all origins (production-ready)
@@ -21,52 +21,30 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def read_csv_first_three_lines(file_path):
-    """Read the first three lines of a CSV file using built-in csv module"""
-    try:
-        lines = []
-        with open(file_path, 'r', encoding='utf-8') as file:
-            reader = csv.reader(file)
-            for i, row in enumerate(reader):
-                if i >= 3:  # Only read first 3 lines
-                    break
-                # Join row values with spaces
-                line = ' '.join(str(value) for value in row)
-                lines.append(line)
-        return lines
-    except Exception as e:
-        return [f"Error reading CSV file: {str(e)}"]
+def read_file_first_three_lines(stream, file_type):
+    """
+    Read the first three lines/rows of an uploaded file
 
-def read_excel_first_three_lines(file_path):
-    """Read the first three lines of an Excel file using pandas"""
-    try:
-        import pandas as pd
-        df = pd.read_excel(file_path, nrows=3)
-        if len(df) > 0:
-            lines = []
-            for i in range(len(df)):
-                # Convert each row to string and join with spaces
-                line = ' '.join(str(value) for value in df.iloc[i].values)
-                lines.append(line)
-            return lines
-        else:
-            return ["Excel file is empty"]
-    except ImportError:
-        return ["Excel support not available - pandas not installed"]
-    except Exception as e:
-        return [f"Error reading Excel file: {str(e)}"]
+    CSV and xlsx previews are read from the stream with the csv module and
+    openpyxl (see preview.py); .xls files need pandas. No temporary file is
+    written.
 
-def read_file_first_three_lines(file_path, file_type):
-    """Read the first three lines/rows of different file types"""
+    Returns:
+        tuple: (lines, header-only preview or None on error)
+    """
+    if file_type not in ('csv', 'xlsx', 'xls'):
+        return ["Unsupported file type"], None
     try:
-        if file_type == 'csv':
-            return read_csv_first_three_lines(file_path)
-        elif file_type in ['xlsx', 'xls']:
-            return read_excel_first_three_lines(file_path)
-        else:
-            return ["Unsupported file type"]
+        preview = preview_upload(stream, f"upload.{file_type}")
+    except ImportError as e:
+        return [f"Excel support not available - {e.name or 'pandas'} not installed"], None
     except Exception as e:
-        return [f"Error reading file: {str(e)}"]
+        return [f"Error reading file: {str(e)}"], None
+    
+    lines = preview_lines(preview)
+    if not lines:
+        return ["CSV file is empty" if file_type == 'csv' else "Excel file is empty"], preview
+    return lines, preview
 
 @app.route('/api/process-files', methods=['POST'])
 def process_files():
@@ -84,7 +62,6 @@ def process_files():
             return jsonify({'error': 'Please upload at least 1 file'}), 400
         
         results = []
-        temp_files = []
         
         for file in valid_files:
             if allowed_file(file.filename):
@@ -104,17 +81,13 @@ def process_files():
                 # Get file extension
                 file_ext = file.filename.rsplit('.', 1)[1].lower()
                 
-                # Save file temporarily
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_ext}')
-                file.save(temp_file.name)
-                temp_files.append(temp_file.name)
-                
-                # Read first three lines
-                lines = read_file_first_three_lines(temp_file.name, file_ext)
+                # Read first three lines straight from the upload stream
+                lines, preview = read_file_first_three_lines(file.stream, file_ext)
                 print(f"DEBUG: Processing {file.filename}, lines: {lines}")  # Debug log
                 results.append({
                     'filename': file.filename,
                     'lines': lines,
+                    'preview': preview,
                     'error': False
                 })
             
@@ -125,13 +98,6 @@ def process_files():
                     'error': True
                 })
         
-        # Clean up temporary files
-        for temp_file in temp_files:
-            try:
-                os.unlink(temp_file)
-            except:
-                pass
-        
         print(f"DEBUG: Final results: {results}")  # Debug log
         
         return jsonify({
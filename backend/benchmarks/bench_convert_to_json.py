@@ -0,0 +1,101 @@
+"""
+Benchmark: convert_to_json workbook parse count
+===============================================
+
+Builds a synthetic multi-sheet workbook, runs convert_to_json on it and counts
+how many times the workbook is opened and each sheet is parsed. A single read
+pass means one workbook open and one parse per sheet.
+
+Opens are counted at main's open_workbook call and sheet parses on the reader
+of each opened workbook, so the counts hold for every reader engine.
+
+Usage:
+    python benchmarks/bench_convert_to_json.py [--rows 20000] [--sheets 4] [--engine auto]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+# Measure real parses, not parse cache hits
+os.environ["PARSE_CACHE_ENABLED"] = "false"
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main as bridgette
+from spreadsheet_engine import ENGINE_CHOICES
+
+
+def build_workbook(path, rows, sheets):
+    """Write a workbook with `sheets` sheets of `rows` rows each"""
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for sheet in range(sheets):
+            df = pd.DataFrame({
+                "customerId": [f"C{i:07d}" for i in range(rows)],
+                "name": [f"Customer {i}" for i in range(rows)],
+                "balance": [i * 1.5 for i in range(rows)],
+            })
+            df.to_excel(writer, sheet_name=f"Sheet{sheet + 1}", index=False)
+
+
+def count_parses(file_path, output_file, engine=None):
+    """Run convert_to_json while counting workbook opens and sheet parses"""
+    counts = {"workbook_opens": 0, "sheet_parses": 0, "engines": set()}
+    original_open = bridgette.open_workbook
+
+    def counting_open(path, *args, **kwargs):
+        if engine:
+            kwargs["engine"] = engine
+        workbook = original_open(path, *args, **kwargs)
+        counts["workbook_opens"] += 1
+        counts["engines"].add(workbook.engine)
+
+        reader = workbook._reader
+        original_sheet_data = reader.get_sheet_data
+
+        def counting_sheet_data(*sheet_args, **sheet_kwargs):
+            counts["sheet_parses"] += 1
+            return original_sheet_data(*sheet_args, **sheet_kwargs)
+
+        reader.get_sheet_data = counting_sheet_data
+        return workbook
+
+    bridgette.open_workbook = counting_open
+    try:
+        start = time.perf_counter()
+        bridgette.convert_to_json(file_path, output_file=output_file)
+        counts["seconds"] = round(time.perf_counter() - start, 3)
+    finally:
+        bridgette.open_workbook = original_open
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark convert_to_json parse count")
+    parser.add_argument("--rows", type=int, default=20000, help="Rows per sheet")
+    parser.add_argument("--sheets", type=int, default=4, help="Number of sheets")
+    parser.add_argument("--engine", choices=ENGINE_CHOICES, help="Reader engine (defaults to SPREADSHEET_ENGINE)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        workbook = os.path.join(tmp_dir, "bench.xlsx")
+        build_workbook(workbook, args.rows, args.sheets)
+        counts = count_parses(workbook, os.path.join(tmp_dir, "bench.json"), args.engine)
+
+    print(f"[RESULT] rows/sheet={args.rows} sheets={args.sheets}")
+    print(f"   Engine:         {', '.join(sorted(counts['engines'])) or '-'}")
+    print(f"   Workbook opens: {counts['workbook_opens']}")
+    print(f"   Sheet parses:   {counts['sheet_parses']} ({counts['sheet_parses'] / args.sheets:.1f} per sheet)")
+    print(f"   Wall time:      {counts['seconds']}s")
+
+    if counts["workbook_opens"] != 1 or counts["sheet_parses"] != args.sheets:
+        print("[ERROR] Expected one workbook open and one parse per sheet")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Benchmark: full pipeline on synthetic bank datasets
+===================================================
+
+Generates Bank 1 / Bank 2 datasets of each requested size (see
+synthetic_banks.py), runs the pipeline stages on them and writes a JSON report
+with the time, rows, bytes read and peak RSS of every stage (see
+instrumentation.py).
+
+Stages, in pipeline order:
+- convert_files: every upload to an intermediate (process pool as configured)
+- count_schemas: schema counts of every intermediate
+- schema_matching: match_schemas_with_chatgpt with the ChatGPT request
+  replaced by a stub that answers with the known correct matches, after an
+  optional simulated latency
+- merge: create_combined_customer_data over all customers
+
+Nested stages (convert_to_intermediate, parse_structured_response,
+extract_column_data, write_xlsx, ...) are reported too.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--rows 1000 10000 100000 1000000]
+        [--data-format xlsx] [--output-format xlsx] [--llm-latency 0]
+        [--report bench_pipeline_report.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Measure real parses, not parse cache hits (unless --parse-cache)
+if "--parse-cache" not in sys.argv:
+    os.environ["PARSE_CACHE_ENABLED"] = "false"
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main
+from instrumentation import collect_stages, stage_timer, summarize_stages, timed_stage
+from intermediate import INTERMEDIATE_EXTENSION
+from workspaces import UPLOADS_SUBDIR, INTERMEDIATES_SUBDIR, OUTPUTS_SUBDIR, ensure_workspace, workspace_path
+
+from synthetic_banks import SCHEMA_PAIRS, generate_bank_dataset
+
+DEFAULT_SIZES = [1000, 10000]
+
+def make_llm_stub(latency=0.0):
+    """
+    Build a stand-in for main.send_data_to_chatgpt
+
+    The stub answers a structured (JSON mode) request with the correct
+    matches of the synthetic schema workbooks, using the same compact IDs
+    the real prompt would carry.
+    """
+    @timed_stage("send_data_to_chatgpt")
+    def send_data_to_chatgpt_stub(json_data1, prompt, json_data2=None, **options):
+        if latency:
+            time.sleep(latency)
+        _, bank1_ids = main.encode_schemas_compact(json_data1, main.BANK1_ID_PREFIX)
+        _, bank2_ids = main.encode_schemas_compact(json_data2, main.BANK2_ID_PREFIX)
+        bank2_by_name = {(record["category"], record["schema"]): schema_id for schema_id, record in bank2_ids.items()}
+
+        matches = []
+        matched_bank2 = set()
+        for schema_id, record in bank1_ids.items():
+            target = bank2_by_name.get(SCHEMA_PAIRS.get((record["category"], record["schema"])))
+            if target:
+                matches.append({"bank1": schema_id, "bank2": [target]})
+                matched_bank2.add(target)
+        matched_bank1 = {match["bank1"] for match in matches}
+        return json.dumps({
+            "matches": matches,
+            "unmatched_bank1": [schema_id for schema_id in bank1_ids if schema_id not in matched_bank1],
+            "unmatched_bank2": [schema_id for schema_id in bank2_ids if schema_id not in matched_bank2]
+        })
+    return send_data_to_chatgpt_stub
+
+def run_pipeline(root, output_format):
+    """
+    Run the pipeline stages over the dataset in a workspace
+
+    Returns:
+        dict: {"matched_schemas", "output_bytes"} summary of the run
+    """
+    ensure_workspace(root)
+    uploads = []
+    for bank in ("bank1", "bank2"):
+        bank_dir = workspace_path(root, UPLOADS_SUBDIR, bank)
+        uploads.extend((bank, os.path.join(bank_dir, name)) for name in sorted(os.listdir(bank_dir)))
+
+    with stage_timer("convert_files"):
+        conversions = main.convert_files([
+            (path, workspace_path(root, INTERMEDIATES_SUBDIR, f"{bank}_{os.path.splitext(os.path.basename(path))[0]}_converted{INTERMEDIATE_EXTENSION}"))
+            for bank, path in uploads
+        ])
+    failed = [conversion for conversion in conversions if not conversion["success"]]
+    if failed:
+        raise RuntimeError(f"Conversion failed: {failed[0]['error']}")
+
+    with stage_timer("count_schemas"):
+        for conversion in conversions:
+            main.count_schemas_in_json(conversion["output_file"])
+
+    schema_files = {
+        bank: conversion["output_file"]
+        for (bank, path), conversion in zip(uploads, conversions)
+        if "schema" in os.path.basename(path).lower()
+    }
+    with stage_timer("schema_matching"):
+        parsed_data = main.match_schemas_with_chatgpt(
+            schema_files["bank1"], schema_files["bank2"],
+            "Match the Bank 1 and Bank 2 schemas.",
+            use_cache=False,
+            response_mode="json"
+        )
+    if not parsed_data or not parsed_data["matched_schemas"]:
+        raise RuntimeError("Schema matching returned no matches")
+
+    output_file = workspace_path(root, OUTPUTS_SUBDIR, f"combined_customer_data.{output_format}")
+    with stage_timer("merge"):
+        # Every customer is merged, so the merge scales with the dataset
+        main.create_combined_customer_data(
+            parsed_data["matched_schemas"], output_file,
+            max_customers=sys.maxsize,
+            output_format=output_format,
+            workspace_root=root
+        )
+    if not os.path.exists(output_file):
+        raise RuntimeError("The combined output file was not created")
+
+    return {
+        "matched_schemas": len(parsed_data["matched_schemas"]),
+        "output_bytes": os.path.getsize(output_file)
+    }
+
+def bench_size(rows, data_format, output_format):
+    """Generate one dataset size, run the pipeline on it and return its report entry"""
+    with tempfile.TemporaryDirectory() as root:
+        start = time.perf_counter()
+        dataset = generate_bank_dataset(root, rows, data_format)
+        generate_seconds = time.perf_counter() - start
+
+        with collect_stages() as stages:
+            start = time.perf_counter()
+            summary = run_pipeline(root, output_format)
+            total_seconds = time.perf_counter() - start
+
+    return {
+        "rows": rows,
+        "dataset_bytes": dataset["bytes"],
+        "generate_seconds": round(generate_seconds, 3),
+        "total_seconds": round(total_seconds, 3),
+        **summary,
+        "stages": summarize_stages(stages)
+    }
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on synthetic bank datasets")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_SIZES, help="Rows per data file, one run per size")
+    parser.add_argument("--data-format", choices=["xlsx", "csv"], default="xlsx", help="Format of the generated data files")
+    parser.add_argument("--output-format", choices=["xlsx", "csv", "parquet"], default="xlsx", help="Combined output format")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated seconds per ChatGPT request")
+    parser.add_argument("--parse-cache", action="store_true", help="Leave the parse cache enabled")
+    parser.add_argument("--report", default="bench_pipeline_report.json", help="JSON report path")
+    args = parser.parse_args()
+
+    main.send_data_to_chatgpt = make_llm_stub(args.llm_latency)
+
+    runs = []
+    for rows in args.rows:
+        print(f"[INFO] Benchmarking {rows} rows per file...")
+        run = bench_size(rows, args.data_format, args.output_format)
+        runs.append(run)
+        print(f"[RESULT] rows={rows} total={run['total_seconds']}s dataset={run['dataset_bytes']} bytes")
+        for stage in ("convert_files", "count_schemas", "schema_matching", "merge"):
+            print(f"   {stage:<16} {run['stages'][stage]['seconds']:.3f}s")
+
+    report = {
+        "benchmark": "pipeline",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "conversion_workers": main.CONVERSION_WORKERS,
+            "intermediate_format": INTERMEDIATE_EXTENSION.lstrip(".")
+        },
+        "options": {
+            "data_format": args.data_format,
+            "output_format": args.output_format,
+            "llm_latency": args.llm_latency,
+            "parse_cache": args.parse_cache
+        },
+        "runs": runs
+    }
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[SUCCESS] Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main_cli()
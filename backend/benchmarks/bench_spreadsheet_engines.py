@@ -0,0 +1,140 @@
+"""
+Benchmark: spreadsheet reader engines
+=====================================
+
+Reads the synthetic Bank 1 / Bank 2 workbooks (see synthetic_banks.py) of
+each requested size with every available reader engine (see
+spreadsheet_engine.py) and writes a JSON report.
+
+Measured per engine and size:
+- full_read: every sheet of every workbook (what convert_to_json and the
+  parse cache do)
+- preview: the first three rows of every workbook (the upload previews)
+
+Frames read by each engine are compared with the openpyxl ones, so the report
+also shows whether switching engines changes any parsed data.
+
+Usage:
+    python benchmarks/bench_spreadsheet_engines.py [--rows 1000 10000 100000]
+        [--repeat 3] [--report bench_spreadsheet_engines_report.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from instrumentation import stage_timer
+from spreadsheet_engine import calamine_available, read_excel
+
+from synthetic_banks import generate_bank_dataset
+
+DEFAULT_SIZES = [1000, 10000]
+
+def available_engines():
+    """Engines that can run here, the openpyxl baseline first"""
+    return ["openpyxl"] + (["calamine"] if calamine_available() else [])
+
+def _best_of(repeat, fn):
+    """Run fn repeat times; return (result of the last run, best stage record)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        with stage_timer("read") as record:
+            result = fn()
+        if best is None or record["seconds"] < best["seconds"]:
+            best = record
+    return result, best
+
+def _frames_equal(expected, actual):
+    for path, sheets in expected.items():
+        if list(sheets) != list(actual[path]):
+            return False
+        for sheet, df in sheets.items():
+            try:
+                pd.testing.assert_frame_equal(df, actual[path][sheet])
+            except AssertionError:
+                return False
+    return True
+
+def bench_size(rows, engines, repeat):
+    """Generate one dataset size, read it with every engine and return its report entry"""
+    with tempfile.TemporaryDirectory() as root:
+        dataset = generate_bank_dataset(root, rows, "xlsx")
+        paths = dataset["bank1"] + dataset["bank2"]
+
+        results = {}
+        baseline = None
+        for engine in engines:
+            sheets, full = _best_of(repeat, lambda: {path: read_excel(path, engine=engine, sheet_name=None) for path in paths})
+            _, preview = _best_of(repeat, lambda: [read_excel(path, engine=engine, nrows=3) for path in paths])
+            if baseline is None:
+                baseline = sheets
+            results[engine] = {
+                "full_read_seconds": round(full["seconds"], 4),
+                "preview_seconds": round(preview["seconds"], 4),
+                "rows_read": sum(len(df) for workbook in sheets.values() for df in workbook.values()),
+                "peak_rss_bytes": full["peak_rss_bytes"],
+                "matches_openpyxl": _frames_equal(baseline, sheets)
+            }
+
+    base_seconds = results[engines[0]]["full_read_seconds"]
+    for result in results.values():
+        result["speedup"] = round(base_seconds / result["full_read_seconds"], 2) if result["full_read_seconds"] else None
+
+    return {
+        "rows": rows,
+        "workbooks": len(paths),
+        "dataset_bytes": dataset["bytes"],
+        "engines": results
+    }
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark the spreadsheet reader engines on synthetic bank workbooks")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_SIZES, help="Rows per data file, one run per size")
+    parser.add_argument("--repeat", type=int, default=3, help="Reads per engine (the best time is reported)")
+    parser.add_argument("--report", default="bench_spreadsheet_engines_report.json", help="JSON report path")
+    args = parser.parse_args()
+
+    engines = available_engines()
+    if len(engines) == 1:
+        print("[WARNING] python-calamine is not installed, only openpyxl will be measured")
+
+    runs = []
+    for rows in args.rows:
+        print(f"[INFO] Benchmarking {rows} rows per file...")
+        run = bench_size(rows, engines, args.repeat)
+        runs.append(run)
+        for engine, result in run["engines"].items():
+            print(f"[RESULT] rows={rows} {engine:<9} full={result['full_read_seconds']:.3f}s "
+                  f"preview={result['preview_seconds']:.3f}s speedup={result['speedup']}x "
+                  f"matches_openpyxl={result['matches_openpyxl']}")
+
+    report = {
+        "benchmark": "spreadsheet_engines",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pandas": pd.__version__,
+            "engines": engines
+        },
+        "options": {
+            "repeat": args.repeat
+        },
+        "runs": runs
+    }
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[SUCCESS] Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,78 @@
+"""
+Check: Bank 2 transactions resolve without a matched account schema
+===================================================================
+
+Bank 2 transactions reference accounts (parentAccountKey), which reference
+customers (accountHolderKey), so create_combined_customer_data has to load
+the Bank 2 account files even when only transaction schemas were matched.
+
+Runs the merge on a synthetic dataset (see synthetic_banks.py) twice: with
+only the Loan Account Transactions schemas matched, and with the Loan
+Accounts schemas matched as well. Both runs must fill the Bank 2
+transaction column, with the same number of values. Exits 1 otherwise.
+
+Usage:
+    python benchmarks/check_bank2_transactions.py [--rows 200]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import create_combined_customer_data
+from workspaces import OUTPUTS_SUBDIR, ensure_workspace, workspace_path
+
+from synthetic_banks import generate_bank_dataset
+
+TRANSACTION_MATCH = {
+    "bank1": {"category": "Loan Account Transactions", "schema": "amount"},
+    "bank2": {"category": "Loan Account Transactions", "schema": "amount"}
+}
+ACCOUNT_MATCH = {
+    "bank1": {"category": "Loan Accounts", "schema": "loanAmount"},
+    "bank2": {"category": "Loan Accounts", "schema": "loanAmount"}
+}
+
+def bank2_value_counts(root, matched_schemas, name):
+    """Merge with the given matches; return the values filled for Bank 2 customers per column"""
+    output_file = workspace_path(root, OUTPUTS_SUBDIR, f"{name}.csv")
+    create_combined_customer_data(matched_schemas, output_file, output_format="csv", workspace_root=root)
+    df = pd.read_csv(output_file, dtype={"customer_id": str})
+    # Output rows are keyed B1_<id> / B2_<id>
+    bank2_rows = df[df["customer_id"].str.startswith("B2_")]
+    return {column: int(bank2_rows[column].notna().sum()) for column in df.columns if column != "customer_id"}
+
+def main():
+    parser = argparse.ArgumentParser(description="Check Bank 2 transaction resolution without matched accounts")
+    parser.add_argument("--rows", type=int, default=200, help="Rows per data file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        ensure_workspace(root)
+        generate_bank_dataset(root, args.rows)
+        transactions_only = bank2_value_counts(root, [TRANSACTION_MATCH], "transactions_only")
+        with_accounts = bank2_value_counts(root, [TRANSACTION_MATCH, ACCOUNT_MATCH], "with_accounts")
+
+    print(f"[RESULT] Bank 2 values, transactions only: {transactions_only}")
+    print(f"[RESULT] Bank 2 values, with accounts:     {with_accounts}")
+
+    failed = False
+    for column, count in transactions_only.items():
+        if count == 0 or count != with_accounts.get(column):
+            print(f"[ERROR] {column}: {count} Bank 2 values without the account match, {with_accounts.get(column)} with it")
+            failed = True
+    if not transactions_only:
+        print("[ERROR] No matched columns in the combined output")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    print("[SUCCESS] Bank 2 transactions resolve without a matched account schema")
+
+
+if __name__ == "__main__":
+    main()
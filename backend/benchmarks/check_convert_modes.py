@@ -0,0 +1,116 @@
+"""
+Check: convert_to_json streaming vs in-memory output
+====================================================
+
+Converts fixture workbooks with convert_to_json in both modes and compares
+the records of every sheet. The fixtures cover the cases where openpyxl's
+cell values differ from pandas' inferred ones: numeric-looking text
+(postcodes), pandas' NA strings, "True"/"False" text, mixed text/number
+columns, dates, empty rows and empty columns. The synthetic Bank 2 address
+file is checked too.
+
+Numbers are compared by value, since streaming keeps whole numbers in columns
+with gaps as integers where pandas upcasts them to floats (see
+convert_to_json_streaming).
+
+Usage:
+    python benchmarks/check_convert_modes.py
+"""
+
+import json
+import math
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+from openpyxl import Workbook
+
+# Compare real parses, not parse cache hits
+os.environ["PARSE_CACHE_ENABLED"] = "false"
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import convert_to_json
+
+from synthetic_banks import generate_bank_dataset
+
+def build_fixture(path):
+    """Write a workbook with the cell types that need pandas' inference"""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "Inference"
+    sheet.append(["postcode", "mixed", "na_text", "flag", "rate_text", "count", "opened", "empty"])
+    sheet.append(["98148", "abc", "NA", "True", "1.5", 1, datetime(2020, 1, 2), None])
+    sheet.append(["00123", "12", "x", "False", "2", None, datetime(2021, 3, 4), None])
+    sheet.append([None, None, None, None, None, None, None, None])
+    sheet.append([12, "7", "n/a", "True", "3", 3, datetime(2022, 5, 6), None])
+
+    schema = workbook.create_sheet("Schema")
+    schema.append(["name", "description"])
+    schema.append(["postcode", "Postal code"])
+    schema.append(["name", "description"])
+    schema.append(["balance", None])
+    workbook.save(path)
+
+def _normalize(value):
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+def _sheets(data):
+    return {
+        key: [{name: _normalize(value) for name, value in record.items()} for record in records]
+        for key, records in data.items()
+        if key not in ("_metadata", "metadata")
+    }
+
+def compare(file_path, tmp_dir):
+    """Convert a file in both modes; return the differing sheets"""
+    base = os.path.splitext(os.path.basename(file_path))[0]
+    standard_file = os.path.join(tmp_dir, f"{base}_standard.json")
+    streaming_file = os.path.join(tmp_dir, f"{base}_streaming.json")
+    convert_to_json(file_path, output_file=standard_file)
+    convert_to_json(file_path, output_file=streaming_file, streaming=True)
+
+    with open(standard_file, encoding="utf-8") as f:
+        standard = _sheets(json.load(f))
+    with open(streaming_file, encoding="utf-8") as f:
+        streaming = _sheets(json.load(f))
+
+    differences = []
+    for sheet in sorted(set(standard) | set(streaming)):
+        expected, actual = standard.get(sheet), streaming.get(sheet)
+        if expected != actual:
+            first = next(
+                (index for index, (a, b) in enumerate(zip(expected or [], actual or [])) if a != b),
+                min(len(expected or []), len(actual or []))
+            )
+            differences.append((sheet, first, (expected or [None] * (first + 1))[first:first + 1], (actual or [])[first:first + 1]))
+    return differences
+
+def main():
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fixture = os.path.join(tmp_dir, "fixture.xlsx")
+        build_fixture(fixture)
+        dataset = generate_bank_dataset(os.path.join(tmp_dir, "banks"), 500)
+        addresses = next(path for path in dataset["bank2"] if "Addresses" in path)
+
+        for file_path in (fixture, addresses):
+            differences = compare(file_path, tmp_dir)
+            name = os.path.basename(file_path)
+            if differences:
+                failed = True
+                for sheet, index, expected, actual in differences:
+                    print(f"[ERROR] {name} / {sheet}: record {index} differs")
+                    print(f"   standard:  {expected}")
+                    print(f"   streaming: {actual}")
+            else:
+                print(f"[SUCCESS] {name}: streaming output matches convert_to_json")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
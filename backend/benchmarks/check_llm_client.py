@@ -0,0 +1,163 @@
+"""
+Check: LLM client retries, backoff and concurrency limit
+========================================================
+
+Starts a local OpenAI-compatible stub server (http.server) and points
+llm_client at it through OPENAI_BASE_URL. Each scenario is selected by the
+prompt text and checks one part of create_chat_completion:
+
+- 429 with Retry-After: retried after the server's delay
+- 503 without Retry-After: retried with exponential backoff
+- 400: raised at once, no retry
+- 429 on every attempt: raised after OPENAI_MAX_RETRIES retries
+- Many threads at once: never more than OPENAI_MAX_CONCURRENCY requests in flight
+
+Exits 1 if any scenario fails.
+
+Usage:
+    python benchmarks/check_llm_client.py
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAX_RETRIES = 3
+MAX_CONCURRENCY = 2
+
+COMPLETION = {
+    "id": "chatcmpl-stub",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "stub",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}]
+}
+
+class StubState:
+    """Requests seen per scenario and the peak number in flight"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.attempts = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def begin(self, scenario):
+        with self.lock:
+            self.attempts[scenario] = self.attempts.get(scenario, 0) + 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return self.attempts[scenario]
+
+    def end(self):
+        with self.lock:
+            self.in_flight -= 1
+
+STATE = StubState()
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers /v1/chat/completions according to the scenario in the prompt"""
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        scenario = request["messages"][-1]["content"]
+        attempt = STATE.begin(scenario)
+        try:
+            error = {"error": {"message": scenario, "type": "stub"}}
+            if scenario == "retry-after" and attempt <= 2:
+                self._reply(429, error, {"Retry-After": "1"})
+            elif scenario == "server-error" and attempt == 1:
+                self._reply(503, error)
+            elif scenario == "bad-request":
+                self._reply(400, error)
+            elif scenario == "always-429":
+                self._reply(429, error, {"Retry-After": "0"})
+            else:
+                if scenario == "slow":
+                    time.sleep(0.3)
+                self._reply(200, COMPLETION)
+        finally:
+            STATE.end()
+
+def start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    server = start_stub_server()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    os.environ["OPENAI_MAX_RETRIES"] = str(MAX_RETRIES)
+    os.environ["OPENAI_BACKOFF_BASE"] = "0.05"
+    os.environ["OPENAI_MAX_CONCURRENCY"] = str(MAX_CONCURRENCY)
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from llm_client import create_chat_completion
+    from openai import BadRequestError, RateLimitError
+
+    def ask(scenario):
+        return create_chat_completion([{"role": "user", "content": scenario}], model="stub", api_key="test")
+
+    failures = []
+
+    def check(name, condition, detail):
+        print(f"[{'SUCCESS' if condition else 'ERROR'}] {name}: {detail}")
+        if not condition:
+            failures.append(name)
+
+    start = time.perf_counter()
+    response = ask("retry-after")
+    elapsed = time.perf_counter() - start
+    check("Retry-After", response.choices[0].message.content == "ok" and STATE.attempts["retry-after"] == 3 and elapsed >= 2,
+          f"{STATE.attempts['retry-after']} attempts in {elapsed:.2f}s (expected 3 attempts, >= 2s)")
+
+    response = ask("server-error")
+    check("5xx backoff", response.choices[0].message.content == "ok" and STATE.attempts["server-error"] == 2,
+          f"{STATE.attempts['server-error']} attempts (expected 2)")
+
+    try:
+        ask("bad-request")
+        raised = False
+    except BadRequestError:
+        raised = True
+    check("No retry on 400", raised and STATE.attempts["bad-request"] == 1,
+          f"raised={raised}, {STATE.attempts['bad-request']} attempts (expected 1)")
+
+    try:
+        ask("always-429")
+        raised = False
+    except RateLimitError:
+        raised = True
+    check("Retries exhausted", raised and STATE.attempts["always-429"] == MAX_RETRIES + 1,
+          f"raised={raised}, {STATE.attempts['always-429']} attempts (expected {MAX_RETRIES + 1})")
+
+    STATE.peak_in_flight = 0
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY * 3) as pool:
+        list(pool.map(ask, ["slow"] * (MAX_CONCURRENCY * 3)))
+    check("Concurrency limit", STATE.peak_in_flight == MAX_CONCURRENCY,
+          f"peak {STATE.peak_in_flight} requests in flight (limit {MAX_CONCURRENCY})")
+
+    server.shutdown()
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Synthetic Bank 1 / Bank 2 datasets
+==================================
+
+Generates schema workbooks and customer, address, account and transaction
+data files for both banks, laid out like a run workspace:
+
+    <root>/uploaded_files/bank1/Bank1_Schema.xlsx, Bank1_Mock_*.xlsx|csv
+    <root>/uploaded_files/bank2/Bank2_Schema.xlsx, Bank2_Mock_*.xlsx|csv
+
+Data files use the key columns create_combined_customer_data expects:
+Bank 1 rows carry customerId (transactions carry accountId), Bank 2
+customers carry id and encodedKey, addresses parentKey, accounts
+accountHolderKey and transactions parentAccountKey. Data is generated from
+a fixed seed, so the same size always produces the same files.
+
+Usage:
+    python benchmarks/synthetic_banks.py OUTPUT_DIR [--rows 10000] [--format xlsx]
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from output_writer import write_dataframe
+from workspaces import UPLOADS_SUBDIR
+
+SEED = 20240601
+
+# Schema workbooks: sheet (category) -> [(name, description)]
+BANK1_SCHEMAS = {
+    "Customer": [
+        ("customerId", "Unique customer identifier"),
+        ("firstName", "Customer first name"),
+        ("lastName", "Customer last name"),
+        ("email", "Customer e-mail address"),
+        ("phoneNumber", "Customer mobile phone number"),
+        ("birthDate", "Customer date of birth"),
+        ("city", "City of the customer's home address")
+    ],
+    "Loan Accounts": [
+        ("accountId", "Unique loan account identifier"),
+        ("customerId", "Customer owning the loan account"),
+        ("loanAmount", "Original loan principal amount"),
+        ("interestRate", "Annual interest rate of the loan")
+    ],
+    "Loan Account Transactions": [
+        ("transactionId", "Unique transaction identifier"),
+        ("accountId", "Loan account the transaction belongs to"),
+        ("amount", "Transaction amount"),
+        ("valueDate", "Date the transaction was booked")
+    ]
+}
+
+BANK2_SCHEMAS = {
+    "Customer": [
+        ("id", "Public client identifier"),
+        ("encodedKey", "Internal client key"),
+        ("firstName", "Client first name"),
+        ("lastName", "Client last name"),
+        ("emailAddress", "Client email address"),
+        ("mobilePhone", "Client mobile phone"),
+        ("birthDate", "Client birth date")
+    ],
+    "Addresses": [
+        ("parentKey", "Client the address belongs to"),
+        ("line1", "Street address"),
+        ("city", "City"),
+        ("postcode", "Postal code")
+    ],
+    "Loan Accounts": [
+        ("encodedKey", "Internal loan account key"),
+        ("accountHolderKey", "Client holding the loan account"),
+        ("loanAmount", "Loan principal amount"),
+        ("interestRate", "Loan interest rate")
+    ],
+    "Loan Account Transactions": [
+        ("encodedKey", "Internal transaction key"),
+        ("parentAccountKey", "Loan account of the transaction"),
+        ("amount", "Transaction amount"),
+        ("valueDate", "Transaction value date")
+    ]
+}
+
+# Correct matches between the two schema workbooks:
+# (Bank 1 category, name) -> (Bank 2 category, name)
+SCHEMA_PAIRS = {
+    ("Customer", "firstName"): ("Customer", "firstName"),
+    ("Customer", "lastName"): ("Customer", "lastName"),
+    ("Customer", "email"): ("Customer", "emailAddress"),
+    ("Customer", "phoneNumber"): ("Customer", "mobilePhone"),
+    ("Customer", "birthDate"): ("Customer", "birthDate"),
+    ("Customer", "city"): ("Addresses", "city"),
+    ("Loan Accounts", "loanAmount"): ("Loan Accounts", "loanAmount"),
+    ("Loan Accounts", "interestRate"): ("Loan Accounts", "interestRate"),
+    ("Loan Account Transactions", "amount"): ("Loan Account Transactions", "amount"),
+    ("Loan Account Transactions", "valueDate"): ("Loan Account Transactions", "valueDate")
+}
+
+FIRST_NAMES = np.array(["Alice", "Bob", "Chloe", "David", "Emma", "Farid", "Grace", "Hugo", "Ines", "Jonas"])
+LAST_NAMES = np.array(["Martin", "Smith", "Dubois", "Garcia", "Muller", "Rossi", "Novak", "Silva", "Jansen", "Kowalski"])
+CITIES = np.array(["Paris", "London", "Berlin", "Madrid", "Rome", "Lisbon", "Vienna", "Dublin", "Prague", "Warsaw"])
+
+def _keys(prefix, count, offset=0):
+    """Sequential string keys such as C0000001"""
+    return prefix + pd.Series(np.arange(offset, offset + count)).astype(str).str.zfill(7)
+
+def _dates(rng, count, start="1950-01-01", days=25000):
+    return pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, count), unit="D")
+
+def _schema_frame(rows):
+    return pd.DataFrame(rows, columns=["name", "description"])
+
+def write_schema_workbook(path, schemas):
+    """Write a schema workbook with one sheet per category"""
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for category, rows in schemas.items():
+            _schema_frame(rows).to_excel(writer, sheet_name=category, index=False)
+
+def build_bank1_frames(rows, rng):
+    """Bank 1 data files: file stem -> DataFrame"""
+    customer_ids = _keys("C", rows)
+    account_ids = _keys("A", rows)
+    customer = pd.DataFrame({
+        "customerId": customer_ids,
+        "firstName": FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), rows)],
+        "lastName": LAST_NAMES[rng.integers(0, len(LAST_NAMES), rows)],
+        "email": customer_ids.str.lower() + "@bank1.example",
+        "phoneNumber": rng.integers(600000000, 699999999, rows),
+        "birthDate": _dates(rng, rows),
+        "city": CITIES[rng.integers(0, len(CITIES), rows)]
+    })
+    accounts = pd.DataFrame({
+        "accountId": account_ids,
+        "customerId": customer_ids.to_numpy()[rng.permutation(rows)],
+        "loanAmount": rng.integers(1000, 500000, rows),
+        "interestRate": np.round(rng.uniform(0.5, 9.5, rows), 2)
+    })
+    transactions = pd.DataFrame({
+        "transactionId": _keys("T", rows),
+        "accountId": account_ids.to_numpy()[rng.integers(0, rows, rows)],
+        "amount": np.round(rng.uniform(-5000, 5000, rows), 2),
+        "valueDate": _dates(rng, rows, start="2015-01-01", days=3650)
+    })
+    return {
+        "Bank1_Mock_Customer": customer,
+        "Bank1_Mock_Loan_Accounts": accounts,
+        "Bank1_Mock_Loan_Account_Transactions": transactions
+    }
+
+def build_bank2_frames(rows, rng):
+    """Bank 2 data files: file stem -> DataFrame"""
+    client_ids = _keys("", rows, offset=1000000)
+    client_keys = _keys("8a8e", rows)
+    account_keys = _keys("8a9f", rows)
+    customer = pd.DataFrame({
+        "id": client_ids,
+        "encodedKey": client_keys,
+        "firstName": FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), rows)],
+        "lastName": LAST_NAMES[rng.integers(0, len(LAST_NAMES), rows)],
+        "emailAddress": "client" + client_ids + "@bank2.example",
+        "mobilePhone": rng.integers(700000000, 799999999, rows),
+        "birthDate": _dates(rng, rows)
+    })
+    addresses = pd.DataFrame({
+        "parentKey": client_keys,
+        "line1": pd.Series(rng.integers(1, 300, rows)).astype(str) + " High Street",
+        "city": CITIES[rng.integers(0, len(CITIES), rows)],
+        "postcode": pd.Series(rng.integers(10000, 99999, rows)).astype(str)
+    })
+    accounts = pd.DataFrame({
+        "encodedKey": account_keys,
+        "accountHolderKey": client_keys.to_numpy()[rng.permutation(rows)],
+        "loanAmount": rng.integers(1000, 500000, rows),
+        "interestRate": np.round(rng.uniform(0.5, 9.5, rows), 2)
+    })
+    transactions = pd.DataFrame({
+        "encodedKey": _keys("8b10", rows),
+        "parentAccountKey": account_keys.to_numpy()[rng.integers(0, rows, rows)],
+        "amount": np.round(rng.uniform(-5000, 5000, rows), 2),
+        "valueDate": _dates(rng, rows, start="2015-01-01", days=3650)
+    })
+    return {
+        "Bank2_Mock_Customer": customer,
+        "Bank2_Mock_Addresses": addresses,
+        "Bank2_Mock_Loan_Accounts": accounts,
+        "Bank2_Mock_Loan_Account_Transactions": transactions
+    }
+
+def generate_bank_dataset(root, rows, data_format="xlsx", seed=SEED):
+    """
+    Write a synthetic Bank 1 / Bank 2 dataset under a workspace root
+
+    Args:
+        root (str): Workspace root (files go to <root>/uploaded_files/bank1|bank2)
+        rows (int): Rows per data file
+        data_format (str): "xlsx" or "csv" data files (schemas are always xlsx)
+        seed (int): Random seed
+
+    Returns:
+        dict: {"bank1": [paths], "bank2": [paths], "bytes": total size}
+    """
+    if data_format not in ("xlsx", "csv"):
+        raise ValueError(f"Unsupported data format: {data_format}")
+
+    rng = np.random.default_rng(seed)
+    files = {}
+    for bank, schemas, frames in (
+        ("bank1", BANK1_SCHEMAS, build_bank1_frames(rows, rng)),
+        ("bank2", BANK2_SCHEMAS, build_bank2_frames(rows, rng))
+    ):
+        bank_dir = os.path.join(root, UPLOADS_SUBDIR, bank)
+        os.makedirs(bank_dir, exist_ok=True)
+        schema_path = os.path.join(bank_dir, f"{bank.capitalize()}_Schema.xlsx")
+        write_schema_workbook(schema_path, schemas)
+        files[bank] = [schema_path]
+        for stem, df in frames.items():
+            path = os.path.join(bank_dir, f"{stem}.{data_format}")
+            write_dataframe(df, path, data_format)
+            files[bank].append(path)
+
+    files["bytes"] = sum(os.path.getsize(path) for bank in ("bank1", "bank2") for path in files[bank])
+    return files
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Bank 1 / Bank 2 dataset")
+    parser.add_argument("output_dir", help="Workspace root to write the dataset to")
+    parser.add_argument("--rows", type=int, default=10000, help="Rows per data file")
+    parser.add_argument("--format", choices=["xlsx", "csv"], default="xlsx", help="Data file format")
+    parser.add_argument("--seed", type=int, default=SEED, help="Random seed")
+    args = parser.parse_args()
+
+    files = generate_bank_dataset(args.output_dir, args.rows, args.format, args.seed)
+    print(f"[SUCCESS] Wrote {len(files['bank1']) + len(files['bank2'])} files ({files['bytes']} bytes) to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Bridgette Disk Cache
+====================
+
+Content-addressed on-disk caches shared by the processing pipeline.
+
+Key Components:
+- SHA-256 content hashing of uploaded files (memoized per path/mtime/size)
+- Parse cache: parsed sheets of an upload stored by content hash, so re-runs
+  over unchanged uploads skip Excel parsing entirely; column projections
+  read on their own are stored as variants of the same hash
+- LLM response cache: raw schema-matching responses and their parsed
+  output keyed by a canonical fingerprint of the request, with a TTL
+- Size-based LRU eviction (least recently used entries are removed first)
+
+Architecture Rationale:
+- Keys are content hashes, so renamed or re-uploaded identical files hit the
+  cache and changed files can never return stale data
+- Parse entries are pickled DataFrames: pandas' native columnar blocks
+  round-trip without conversion and without adding a dependency
+- LLM entries are small JSON documents and expire after a TTL
+- Reads touch the entry's mtime, which gives LRU ordering for eviction
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+# Cache directories are relative to this module, not the working directory, so
+# the app uses the same caches whether it is started from the repo root or backend/
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Parse cache configuration
+PARSE_CACHE_DIR = os.path.join(MODULE_DIR, os.environ.get('PARSE_CACHE_DIR', 'parse_cache'))
+PARSE_CACHE_MAX_BYTES = int(os.environ.get('PARSE_CACHE_MAX_BYTES', 1024 * 1024 * 1024))  # 1GB
+PARSE_CACHE_ENABLED = os.environ.get('PARSE_CACHE_ENABLED', 'true').lower() == 'true'
+
+# LLM response cache configuration
+LLM_CACHE_DIR = os.path.join(MODULE_DIR, os.environ.get('LLM_CACHE_DIR', 'llm_cache'))
+LLM_CACHE_MAX_BYTES = int(os.environ.get('LLM_CACHE_MAX_BYTES', 100 * 1024 * 1024))  # 100MB
+LLM_CACHE_TTL_SECONDS = int(os.environ.get('LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600))  # 7 days
+LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+
+# Read size used when hashing files
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Memoized hashes: absolute path -> (mtime_ns, size, sha256), least
+# recently used first and bounded so a long-running server does not grow
+# with every upload it has seen
+HASH_MEMO_MAX_ENTRIES = int(os.environ.get('HASH_MEMO_MAX_ENTRIES', 4096))
+_file_hashes = OrderedDict()
+_file_hashes_lock = threading.Lock()
+
+def _file_signature(file_path):
+    """Return (mtime_ns, size) used to validate a memoized hash"""
+    stats = os.stat(file_path)
+    return stats.st_mtime_ns, stats.st_size
+
+def _remember_hash(abs_path, entry):
+    with _file_hashes_lock:
+        _file_hashes[abs_path] = entry
+        _file_hashes.move_to_end(abs_path)
+        while len(_file_hashes) > HASH_MEMO_MAX_ENTRIES:
+            _file_hashes.popitem(last=False)
+
+def register_file_hash(file_path, sha256):
+    """Record a hash computed elsewhere (e.g. while saving an upload)"""
+    _remember_hash(os.path.abspath(file_path), _file_signature(file_path) + (sha256,))
+
+def hash_file(file_path):
+    """
+    Compute the SHA-256 content hash of a file
+
+    The hash is memoized per path (up to HASH_MEMO_MAX_ENTRIES paths, least
+    recently used evicted first) and only recomputed when the file's mtime
+    or size changes.
+
+    Args:
+        file_path (str): Path to the file
+
+    Returns:
+        str: Hex digest of the file contents
+    """
+    abs_path = os.path.abspath(file_path)
+    signature = _file_signature(abs_path)
+    with _file_hashes_lock:
+        cached = _file_hashes.get(abs_path)
+        if cached and cached[:2] == signature:
+            _file_hashes.move_to_end(abs_path)
+            return cached[2]
+
+    digest = hashlib.sha256()
+    with open(abs_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+
+    sha256 = digest.hexdigest()
+    _remember_hash(abs_path, signature + (sha256,))
+    return sha256
+
+def evict_lru(directory, max_bytes):
+    """
+    Delete least recently used entries until the directory fits in max_bytes
+
+    Args:
+        directory (str): Cache directory
+        max_bytes (int): Size budget for the directory
+
+    Returns:
+        int: Number of entries removed
+    """
+    if not os.path.exists(directory):
+        return 0
+
+    entries = []
+    total_size = 0
+    for filename in os.listdir(directory):
+        path = os.path.join(directory, filename)
+        if filename.endswith('.tmp') or not os.path.isfile(path):
+            continue
+        stats = os.stat(path)
+        entries.append((stats.st_mtime, stats.st_size, path))
+        total_size += stats.st_size
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total_size <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total_size -= size
+            removed += 1
+        except OSError as e:
+            print(f"[WARNING] Could not evict cache entry {path}: {e}")
+
+    if removed:
+        print(f"[INFO] Evicted {removed} cache entries from {directory}")
+    return removed
+
+def _parse_cache_path(sha256, variant=None):
+    if variant:
+        return os.path.join(PARSE_CACHE_DIR, f"{sha256}.{variant}.pkl")
+    return os.path.join(PARSE_CACHE_DIR, f"{sha256}.pkl")
+
+def projection_variant(columns):
+    """
+    Parse cache variant for a column projection of a file
+
+    Args:
+        columns (iterable): Projected column names
+
+    Returns:
+        str: Short stable key for the column set
+    """
+    canonical = json.dumps(sorted(str(column) for column in columns), ensure_ascii=False)
+    return "cols-" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+def load_parsed_sheets(file_path, variant=None):
+    """
+    Return the cached parsed sheets for a file, or None on a miss
+
+    Args:
+        file_path (str): Path to the original upload
+        variant (str): Partial parse to look up (e.g. projection_variant);
+            None for the full parse
+
+    Returns:
+        dict: Mapping of sheet name to DataFrame, or None
+    """
+    if not PARSE_CACHE_ENABLED:
+        return None
+
+    try:
+        cache_path = _parse_cache_path(hash_file(file_path), variant)
+        if not os.path.exists(cache_path):
+            return None
+
+        sheets = pd.read_pickle(cache_path)
+        # Touch the entry so LRU eviction keeps recently used uploads
+        now = time.time()
+        os.utime(cache_path, (now, now))
+        print(f"[INFO] Parse cache hit for {os.path.basename(file_path)}")
+        return sheets
+    except Exception as e:
+        print(f"[WARNING] Could not read parse cache for {file_path}: {e}")
+        return None
+
+def store_parsed_sheets(file_path, sheets, variant=None):
+    """
+    Store parsed sheets for a file under its content hash
+
+    Args:
+        file_path (str): Path to the original upload
+        sheets (dict): Mapping of sheet name to DataFrame
+        variant (str): Partial parse being stored (None for the full parse)
+
+    Returns:
+        bool: True if the entry was written
+    """
+    if not PARSE_CACHE_ENABLED:
+        return False
+
+    try:
+        os.makedirs(PARSE_CACHE_DIR, exist_ok=True)
+        cache_path = _parse_cache_path(hash_file(file_path), variant)
+        # Write to a temp file first so readers never see a partial entry;
+        # job threads may store the same upload at once
+        temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        pd.to_pickle(sheets, temp_path)
+        os.replace(temp_path, cache_path)
+        evict_lru(PARSE_CACHE_DIR, PARSE_CACHE_MAX_BYTES)
+        return True
+    except Exception as e:
+        print(f"[WARNING] Could not write parse cache for {file_path}: {e}")
+        return False
+
+def llm_cache_key(model, prompt, temperature, bank1_data, bank2_data=None, options=None):
+    """
+    Build the cache key for an LLM request
+
+    The key is the SHA-256 of a canonical JSON encoding (sorted keys, no
+    whitespace) of everything that determines the response, so byte-identical
+    schema workbooks produce the same key regardless of dict ordering.
+
+    Args:
+        model (str): Model name
+        prompt (str): Prompt text
+        temperature (float): Sampling temperature
+        bank1_data (dict): First JSON payload
+        bank2_data (dict): Second JSON payload (optional)
+        options (dict): Other request settings that change the result, such
+            as max_tokens or the shard budget (optional)
+
+    Returns:
+        str: Hex digest
+    """
+    canonical = json.dumps(
+        {
+            "model": model,
+            "prompt": prompt,
+            "temperature": temperature,
+            "bank1": bank1_data,
+            "bank2": bank2_data,
+            "options": options
+        },
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def _llm_cache_path(key):
+    return os.path.join(LLM_CACHE_DIR, f"{key}.json")
+
+def load_llm_response(key, ttl_seconds=None):
+    """
+    Return a cached LLM entry, or None on a miss or expired entry
+
+    Args:
+        key (str): Key from llm_cache_key
+        ttl_seconds (int): Maximum entry age (defaults to LLM_CACHE_TTL_SECONDS)
+
+    Returns:
+        dict: {"created_at", "response_text", "parsed"} or None
+    """
+    if not LLM_CACHE_ENABLED:
+        return None
+
+    ttl_seconds = LLM_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    cache_path = _llm_cache_path(key)
+
+    try:
+        if not os.path.exists(cache_path):
+            return None
+
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+
+        if time.time() - entry.get("created_at", 0) > ttl_seconds:
+            os.remove(cache_path)
+            print(f"[INFO] LLM cache entry {key[:12]} expired")
+            return None
+
+        # Touch the entry so LRU eviction keeps recently used responses
+        now = time.time()
+        os.utime(cache_path, (now, now))
+        print(f"[INFO] LLM cache hit ({key[:12]})")
+        return entry
+    except Exception as e:
+        print(f"[WARNING] Could not read LLM cache entry {key[:12]}: {e}")
+        return None
+
+def store_llm_response(key, response_text, parsed=None):
+    """
+    Store an LLM response (and optionally its parsed output)
+
+    Storing parsed output for a key that already holds the same response keeps
+    the original creation time, so the TTL counts from the model call.
+    Entries for results assembled from several calls have no single response
+    and store only the parsed output (response_text=None).
+
+    Args:
+        key (str): Key from llm_cache_key
+        response_text (str): Raw response text (None for parsed-only entries)
+        parsed (dict): Parsed schema matches (optional)
+
+    Returns:
+        bool: True if the entry was written
+    """
+    if not LLM_CACHE_ENABLED or (response_text is None and parsed is None):
+        return False
+
+    try:
+        os.makedirs(LLM_CACHE_DIR, exist_ok=True)
+        cache_path = _llm_cache_path(key)
+
+        created_at = time.time()
+        if os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                existing = json.load(f)
+            if response_text is not None and existing.get("response_text") == response_text:
+                created_at = existing.get("created_at", created_at)
+                if parsed is None:
+                    parsed = existing.get("parsed")
+
+        # Shard requests store entries from several threads at once
+        temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "created_at": created_at,
+                "response_text": response_text,
+                "parsed": parsed
+            }, f, ensure_ascii=False, default=str)
+        os.replace(temp_path, cache_path)
+        evict_lru(LLM_CACHE_DIR, LLM_CACHE_MAX_BYTES)
+        return True
+    except Exception as e:
+        print(f"[WARNING] Could not write LLM cache entry {key[:12]}: {e}")
+        return False
@@ -0,0 +1,217 @@
+"""
+Bridgette Instrumentation
+=========================
+
+Stage-level timing and resource measurements for the processing pipeline.
+
+Key Components:
+- stage_timer(): context manager that measures one pipeline stage
+- timed_stage(): decorator form of stage_timer for whole functions
+- collect_stages(): gather the stage records of one job (or worker process)
+- render_prometheus(): format aggregated stage metrics for /api/metrics
+
+Each stage record holds:
+- seconds: wall time
+- rows: rows processed (when the stage knows it)
+- bytes_read: bytes read by the process during the stage (/proc/self/io)
+- peak_rss_bytes: the process's peak resident set size at the end of the stage
+- peak_rss_growth_bytes: how far the stage raised that peak
+- parent: the enclosing stage (e.g. convert_files around
+  convert_to_intermediate), or None for a top-level stage
+
+Architecture Rationale:
+- The collector and the current stage live in context variables, so
+  concurrent jobs in different worker threads each collect their own stages
+- Stage figures are inclusive of nested stages; summing whole-run time
+  must only add top-level stages (parent None)
+- Process counters are shared by all threads, so bytes read and peak RSS of
+  overlapping stages include each other's work
+- /proc/self/io (Linux) and the resource module (Unix) are optional; the
+  fields are None where they are unavailable
+"""
+
+import contextvars
+import functools
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+_collector = contextvars.ContextVar('stage_collector', default=None)
+_current_stage = contextvars.ContextVar('current_stage', default=None)
+
+# Metrics exposed by render_prometheus: (name, record field, type, help)
+PROMETHEUS_METRICS = (
+    ("bridgette_stage_duration_seconds", "seconds", "summary", "Wall time of pipeline stages, including their nested stages"),
+    ("bridgette_stage_rows_total", "rows", "counter", "Rows processed by pipeline stages"),
+    ("bridgette_stage_bytes_read_total", "bytes_read", "counter", "Bytes read during pipeline stages"),
+    ("bridgette_stage_peak_rss_bytes", "peak_rss_bytes", "gauge", "Highest process peak RSS seen at the end of a stage")
+)
+
+def read_io_bytes():
+    """Bytes read by this process so far (rchar of /proc/self/io), or None if unavailable"""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            for line in f:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+def peak_rss_bytes():
+    """Peak resident set size of this process in bytes, or None if unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _delta(end, start):
+    return end - start if end is not None and start is not None else None
+
+@contextmanager
+def stage_timer(stage, rows=None):
+    """
+    Measure a pipeline stage
+
+    The yielded record can be updated inside the block, e.g. to set "rows"
+    once they are known. It is added to the active collector when the block
+    exits (also when it raises). Stages started inside the block record this
+    stage as their parent.
+
+    Args:
+        stage (str): Stage name
+        rows (int): Rows processed (optional)
+
+    Yields:
+        dict: The stage record
+    """
+    record = {"stage": stage, "rows": rows, "parent": _current_stage.get()}
+    token = _current_stage.set(stage)
+    bytes_before = read_io_bytes()
+    rss_before = peak_rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        _current_stage.reset(token)
+        record["seconds"] = time.perf_counter() - start
+        record["bytes_read"] = _delta(read_io_bytes(), bytes_before)
+        record["peak_rss_bytes"] = peak_rss_bytes()
+        record["peak_rss_growth_bytes"] = _delta(record["peak_rss_bytes"], rss_before)
+        stages = _collector.get()
+        if stages is not None:
+            stages.append(record)
+
+def timed_stage(stage, count_rows=None):
+    """
+    Decorator that runs a function inside stage_timer
+
+    Args:
+        stage (str): Stage name
+        count_rows (callable): Called with the function's result to get the
+            rows processed (optional)
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage) as record:
+                result = fn(*args, **kwargs)
+                if count_rows is not None:
+                    try:
+                        record["rows"] = count_rows(result)
+                    except Exception:
+                        pass
+                return result
+        return wrapper
+    return decorator
+
+@contextmanager
+def collect_stages():
+    """
+    Collect the stage records of the code run inside the block
+
+    Nested collectors also pass their records on to the enclosing collector.
+
+    Yields:
+        list: Stage records, in completion order
+    """
+    outer = _collector.get()
+    stages = []
+    token = _collector.set(stages)
+    try:
+        yield stages
+    finally:
+        _collector.reset(token)
+        if outer is not None:
+            outer.extend(stages)
+
+def record_stages(stages):
+    """
+    Add stage records measured elsewhere (e.g. in a worker process) to the active collector
+
+    Top-level records become children of the current stage.
+    """
+    collector = _collector.get()
+    if collector is not None and stages:
+        parent = _current_stage.get()
+        collector.extend(
+            dict(record, parent=parent) if record.get("parent") is None else record
+            for record in stages
+        )
+
+def summarize_stages(stages):
+    """
+    Aggregate stage records by stage name
+
+    Totals are per stage and include nested stages, so they must not be
+    added up across stages.
+
+    Args:
+        stages (list): Stage records
+
+    Returns:
+        dict: stage -> {"count", "seconds", "rows", "bytes_read", "peak_rss_bytes"}
+    """
+    totals = {}
+    for record in stages:
+        total = totals.setdefault(record["stage"], {"count": 0, "seconds": 0.0, "rows": 0, "bytes_read": 0, "peak_rss_bytes": 0})
+        total["count"] += 1
+        total["seconds"] += record.get("seconds") or 0.0
+        total["rows"] += record.get("rows") or 0
+        total["bytes_read"] += record.get("bytes_read") or 0
+        total["peak_rss_bytes"] = max(total["peak_rss_bytes"], record.get("peak_rss_bytes") or 0)
+    return totals
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def render_prometheus(totals, extra_lines=None):
+    """
+    Format aggregated stage metrics in the Prometheus text exposition format
+
+    Args:
+        totals (dict): Output of summarize_stages (or the same shape)
+        extra_lines (list): Further complete metric lines to append (optional)
+
+    Returns:
+        str: Metrics text
+    """
+    lines = []
+    for name, field, metric_type, help_text in PROMETHEUS_METRICS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for stage, total in sorted(totals.items()):
+            label = f'{{stage="{_escape_label(stage)}"}}'
+            if metric_type == "summary":
+                lines.append(f"{name}_sum{label} {total[field]}")
+                lines.append(f"{name}_count{label} {total['count']}")
+            else:
+                lines.append(f"{name}{label} {total[field]}")
+    lines.extend(extra_lines or [])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,211 @@
+"""
+Bridgette Intermediate Files
+============================
+
+Columnar storage for converted uploads passed between pipeline stages.
+
+Key Components:
+- write_intermediate(): store the cleaned sheets of a converted workbook
+- read_frames(): memory-mapped read of some or all sheets as DataFrames
+- read_manifest(): sheet names, row counts and metadata without reading data
+- load_converted_data(): JSON-shaped view (sheet name -> records) for the
+  LLM prompt and record-based code, for both Arrow and legacy JSON files
+
+Architecture Rationale:
+- A converted file is a directory ending in ".arrow" with one Arrow IPC
+  (Feather v2) file per sheet plus a small JSON manifest; sheets have
+  different columns, so they cannot share one Arrow schema
+- Files are written uncompressed so reads can be memory-mapped and numeric
+  columns are used without copying
+- Counting schemas only needs the manifest, so it never touches the data
+- JSON is only produced in memory when the LLM prompt needs it
+- Object columns Arrow cannot type (mixed strings and numbers, common in
+  schema workbooks) are stored as JSON-encoded strings and decoded on read,
+  so values round-trip unchanged
+- pyarrow is optional: without it (or with INTERMEDIATE_FORMAT=json) the
+  pipeline keeps writing JSON files
+"""
+
+import json
+import os
+import shutil
+import uuid
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Intermediate format configuration
+INTERMEDIATE_FORMAT = os.environ.get('INTERMEDIATE_FORMAT', 'arrow').lower()
+ARROW_ENABLED = INTERMEDIATE_FORMAT == 'arrow' and pa is not None
+INTERMEDIATE_EXTENSION = '.arrow' if ARROW_ENABLED else '.json'
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# Errors pyarrow raises for a column it cannot give a single type
+ARROW_CONVERSION_ERRORS = (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) if pa is not None else ()
+
+def is_arrow_path(path):
+    """True if path names an Arrow intermediate (rather than a JSON file)"""
+    return str(path).endswith('.arrow')
+
+def untypeable_columns(df):
+    """
+    Return the object columns of a DataFrame that Arrow cannot type
+
+    These are columns mixing strings and numbers (or other types), as schema
+    workbooks and merged customer data often do. Callers encode them as
+    strings before building an Arrow table.
+
+    Args:
+        df (DataFrame): Frame with string column names
+
+    Returns:
+        list: Column names
+    """
+    columns = []
+    for column in df.columns[(df.dtypes == object).to_numpy()]:
+        try:
+            pa.array(df[column], from_pandas=True)
+        except ARROW_CONVERSION_ERRORS:
+            columns.append(column)
+    return columns
+
+def _frame_to_table(df):
+    """Convert a DataFrame to an Arrow table, JSON-encoding untypeable columns"""
+    df = df.copy(deep=False)
+    df.columns = [str(column) for column in df.columns]
+
+    json_columns = untypeable_columns(df)
+    for column in json_columns:
+        df[column] = [json.dumps(value, ensure_ascii=False, default=str) for value in df[column]]
+
+    return pa.Table.from_pandas(df, preserve_index=False), json_columns
+
+def write_intermediate(path, sheets, metadata=None, metadata_key="_metadata"):
+    """
+    Write converted sheets as an Arrow intermediate
+
+    The directory is built under a temporary name and moved into place, so
+    readers never see a half-written intermediate.
+
+    Args:
+        path (str): Output path (a directory ending in ".arrow")
+        sheets (dict): Sheet name -> cleaned DataFrame, in workbook order
+        metadata (dict): File metadata returned with the records (optional)
+        metadata_key (str): Key of the metadata in the JSON-shaped view
+
+    Returns:
+        int: Total bytes written
+    """
+    if pa is None:
+        raise ValueError("Arrow intermediates require pyarrow to be installed")
+
+    staging_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(staging_path)
+    try:
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "metadata": metadata,
+            "metadata_key": metadata_key,
+            "sheets": []
+        }
+        total_bytes = 0
+        for index, (sheet_name, df) in enumerate(sheets.items()):
+            table, json_columns = _frame_to_table(df)
+            file_name = f"{index:04d}.arrow"
+            with pa.OSFile(os.path.join(staging_path, file_name), 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            total_bytes += os.path.getsize(os.path.join(staging_path, file_name))
+            manifest["sheets"].append({
+                "name": sheet_name,
+                "file": file_name,
+                "rows": table.num_rows,
+                "columns": table.column_names,
+                "json_columns": json_columns
+            })
+
+        with open(os.path.join(staging_path, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, default=str)
+
+        remove_intermediate(path)
+        os.replace(staging_path, path)
+        return total_bytes
+    finally:
+        if os.path.exists(staging_path):
+            shutil.rmtree(staging_path, ignore_errors=True)
+
+def read_manifest(path):
+    """
+    Read the manifest of an Arrow intermediate
+
+    Returns:
+        dict: {"version", "metadata", "metadata_key", "sheets": [{"name", "file", "rows", "columns", "json_columns"}]}
+    """
+    with open(os.path.join(path, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def read_frames(path, sheets=None):
+    """
+    Read sheets of an Arrow intermediate as DataFrames
+
+    Sheet files are memory-mapped, so only the pages that are used are read.
+
+    Args:
+        path (str): Intermediate path
+        sheets (iterable): Sheet names to read (None reads every sheet)
+
+    Returns:
+        dict: Sheet name -> DataFrame, in workbook order
+    """
+    wanted = None if sheets is None else set(sheets)
+    frames = {}
+    for sheet in read_manifest(path)["sheets"]:
+        if wanted is not None and sheet["name"] not in wanted:
+            continue
+        # Close the map once the frame is built: open maps keep the file
+        # locked on Windows and block removing the workspace
+        with pa.memory_map(os.path.join(path, sheet["file"]), 'r') as source:
+            df = pa.ipc.open_file(source).read_all().to_pandas()
+        for column in sheet["json_columns"]:
+            df[column] = [json.loads(value) for value in df[column]]
+        frames[sheet["name"]] = df
+    return frames
+
+def read_records(path):
+    """
+    Read an Arrow intermediate in the shape convert_to_json produces
+
+    Returns:
+        dict: Sheet name -> list of records, plus the metadata entry
+    """
+    manifest = read_manifest(path)
+    data = {name: df.to_dict(orient="records") for name, df in read_frames(path).items()}
+    if manifest.get("metadata") is not None:
+        data[manifest["metadata_key"]] = manifest["metadata"]
+    return data
+
+def load_converted_data(path):
+    """
+    Load a converted file (Arrow intermediate or JSON) as sheet name -> records
+
+    Args:
+        path (str): Path of the converted file
+
+    Returns:
+        dict: JSON-shaped converted data
+    """
+    if is_arrow_path(path):
+        return read_records(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def remove_intermediate(path):
+    """Delete a converted file (Arrow directory or JSON file) if it exists"""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,433 @@
+"""
+Bridgette Job Queue
+===================
+
+Background execution of long-running processing pipelines with a local,
+pollable job store.
+
+Key Components:
+- SQLite job store (status, options, result, error, per-stage timings)
+- Bounded worker pool that executes submitted pipelines
+- Stage timing context manager used by pipelines to record durations
+- Stage metrics (rows, bytes read, peak RSS; see instrumentation.py) per job,
+  aggregated for the /api/metrics endpoint
+- Progress event log per job, read incrementally by the SSE endpoint
+
+Architecture Rationale:
+- The HTTP request only enqueues work, so gunicorn workers are not tied up
+  for the minutes a merge can take and proxies do not time out
+- SQLite needs no external service and is shared by every gunicorn worker
+  process, so any worker can answer a status poll
+- Each operation opens its own connection, which keeps the store safe to use
+  from worker threads
+- Every process heartbeats the jobs it holds; queued/running jobs whose
+  heartbeat stopped (worker recycled, timed out or crashed) are marked failed
+  on start and when they are read, which works whatever PIDs the container
+  reuses
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+
+from instrumentation import stage_timer, collect_stages
+from progress import report_progress, set_progress_reporter, reset_progress_reporter
+
+# Job store configuration
+# Relative to this module, so every start directory shares one store
+JOBS_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.environ.get('JOBS_DB_PATH', 'jobs.db'))
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_HEARTBEAT_INTERVAL = int(os.environ.get('JOB_HEARTBEAT_INTERVAL', 10))  # Seconds between heartbeats
+JOB_STALE_SECONDS = int(os.environ.get('JOB_STALE_SECONDS', 60))  # Heartbeat age after which a job is failed
+
+# Job statuses
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+
+_executor = None
+
+# Jobs queued or running in this process (kept alive by the heartbeat thread)
+_active_jobs = set()
+_active_jobs_lock = threading.Lock()
+_heartbeat_thread = None
+
+def _connect():
+    """Open a connection to the job store"""
+    conn = sqlite3.connect(JOBS_DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def init_job_store():
+    """
+    Create the job tables and fail jobs whose heartbeat stopped
+
+    Returns:
+        int: Number of interrupted jobs marked as failed
+    """
+    db_dir = os.path.dirname(JOBS_DB_PATH)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+
+    with closing(_connect()) as conn, conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                options TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                heartbeat_at REAL
+            )
+        """)
+        _add_missing_column(conn, 'jobs', 'heartbeat_at', 'REAL')
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_stages (
+                job_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                duration REAL NOT NULL,
+                parent TEXT
+            )
+        """)
+        _add_missing_column(conn, 'job_stages', 'parent', 'TEXT')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_job_stages_job ON job_stages (job_id)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_stage_metrics (
+                job_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                seconds REAL NOT NULL,
+                rows INTEGER,
+                bytes_read INTEGER,
+                peak_rss_bytes INTEGER,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_job_stage_metrics_stage ON job_stage_metrics (stage)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                event TEXT NOT NULL,
+                data TEXT,
+                created_at REAL NOT NULL,
+                elapsed REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events (job_id, id)")
+
+    return fail_stale_jobs()
+
+def _add_missing_column(conn, table, column, declaration):
+    """Add a column to a table created by an older version of the store"""
+    columns = {row['name'] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+def fail_stale_jobs(max_age=None):
+    """
+    Mark queued/running jobs whose heartbeat stopped as failed
+
+    Sibling gunicorn workers share the store, so only jobs nobody has
+    heartbeated for max_age seconds are treated as interrupted.
+
+    Args:
+        max_age (int): Heartbeat age in seconds (defaults to JOB_STALE_SECONDS)
+
+    Returns:
+        int: Number of jobs marked as failed
+    """
+    max_age = JOB_STALE_SECONDS if max_age is None else max_age
+    now = time.time()
+    with closing(_connect()) as conn, conn:
+        interrupted = conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+            "WHERE status IN (?, ?) AND COALESCE(heartbeat_at, created_at) < ?",
+            (STATUS_FAILED, 'Interrupted: the server process running it stopped', now,
+             STATUS_QUEUED, STATUS_RUNNING, now - max_age)
+        ).rowcount
+
+    if interrupted:
+        print(f"[WARNING] Marked {interrupted} interrupted jobs as failed")
+    return interrupted
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(JOB_HEARTBEAT_INTERVAL)
+        with _active_jobs_lock:
+            job_ids = list(_active_jobs)
+        if not job_ids:
+            continue
+        try:
+            with closing(_connect()) as conn, conn:
+                conn.executemany(
+                    "UPDATE jobs SET heartbeat_at = ? WHERE id = ?",
+                    [(time.time(), job_id) for job_id in job_ids]
+                )
+        except sqlite3.Error as e:
+            print(f"[WARNING] Could not record job heartbeat: {e}")
+
+def _start_heartbeat():
+    global _heartbeat_thread
+    if _heartbeat_thread is None or not _heartbeat_thread.is_alive():
+        _heartbeat_thread = threading.Thread(target=_heartbeat_loop, name='job-heartbeat', daemon=True)
+        _heartbeat_thread.start()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='job')
+    return _executor
+
+def create_job(options=None):
+    """
+    Insert a queued job
+
+    Args:
+        options (dict): JSON-serializable job options
+
+    Returns:
+        str: Job ID
+    """
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    with closing(_connect()) as conn, conn:
+        conn.execute(
+            "INSERT INTO jobs (id, status, options, created_at, heartbeat_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, STATUS_QUEUED, json.dumps(options or {}), now, now)
+        )
+    return job_id
+
+def update_job(job_id, **fields):
+    """Update columns of a job (result is stored as JSON)"""
+    if 'result' in fields:
+        fields['result'] = json.dumps(fields['result'], default=str)
+    assignments = ", ".join(f"{column} = ?" for column in fields)
+    with closing(_connect()) as conn, conn:
+        conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+def get_job(job_id):
+    """
+    Return a job record
+
+    A queued/running job whose heartbeat is older than JOB_STALE_SECONDS is
+    marked failed first (see fail_stale_jobs).
+
+    Args:
+        job_id (str): Job ID
+
+    Returns:
+        dict: Job fields (options/result decoded), or None if unknown
+    """
+    with closing(_connect()) as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+        return None
+    if row['status'] in (STATUS_QUEUED, STATUS_RUNNING) and \
+            (row['heartbeat_at'] or row['created_at']) < time.time() - JOB_STALE_SECONDS:
+        fail_stale_jobs()
+        return get_job(job_id)
+
+    job = dict(row)
+    # Written by job stores from before heartbeats
+    job.pop('owner_pid', None)
+    job['options'] = json.loads(job['options']) if job['options'] else {}
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    return job
+
+def record_stage(job_id, stage, started_at, duration, parent=None):
+    """Store the duration of one pipeline stage (parent: enclosing stage, if any)"""
+    with closing(_connect()) as conn, conn:
+        conn.execute(
+            "INSERT INTO job_stages (job_id, stage, started_at, duration, parent) VALUES (?, ?, ?, ?, ?)",
+            (job_id, stage, started_at, duration, parent)
+        )
+
+def get_job_timings(job_id):
+    """
+    Return the recorded stage timings of a job in execution order
+
+    Args:
+        job_id (str): Job ID
+
+    Returns:
+        list: [{"stage", "started_at", "duration", "parent"}, ...]
+    """
+    with closing(_connect()) as conn:
+        rows = conn.execute(
+            "SELECT stage, started_at, duration, parent FROM job_stages WHERE job_id = ? ORDER BY started_at",
+            (job_id,)
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+def record_stage_metrics(job_id, stages):
+    """
+    Store the stage records collected while a job ran
+
+    Args:
+        job_id (str): Job ID
+        stages (list): Stage records from instrumentation.collect_stages
+    """
+    if not stages:
+        return
+    now = time.time()
+    with closing(_connect()) as conn, conn:
+        conn.executemany(
+            "INSERT INTO job_stage_metrics (job_id, stage, seconds, rows, bytes_read, peak_rss_bytes, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (job_id, record["stage"], record["seconds"], record.get("rows"), record.get("bytes_read"), record.get("peak_rss_bytes"), now)
+                for record in stages
+            ]
+        )
+
+def get_stage_metric_totals():
+    """
+    Aggregate the stage metrics of all jobs by stage name
+
+    The store is shared by every gunicorn worker, so the totals cover jobs
+    run by any of them.
+
+    Returns:
+        dict: stage -> {"count", "seconds", "rows", "bytes_read", "peak_rss_bytes"}
+    """
+    with closing(_connect()) as conn:
+        rows = conn.execute("""
+            SELECT stage, COUNT(*) AS count, SUM(seconds) AS seconds,
+                   COALESCE(SUM(rows), 0) AS rows, COALESCE(SUM(bytes_read), 0) AS bytes_read,
+                   COALESCE(MAX(peak_rss_bytes), 0) AS peak_rss_bytes
+            FROM job_stage_metrics GROUP BY stage
+        """).fetchall()
+    return {row['stage']: {key: row[key] for key in row.keys() if key != 'stage'} for row in rows}
+
+def count_jobs_by_status():
+    """Return {status: number of jobs}"""
+    with closing(_connect()) as conn:
+        rows = conn.execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status").fetchall()
+    return {row['status']: row['count'] for row in rows}
+
+def emit_event(job_id, event, data=None, elapsed=None):
+    """
+    Append a progress event to a job's event log
+
+    Args:
+        job_id (str): Job ID
+        event (str): Event name
+        data (dict): JSON-serializable event fields
+        elapsed (float): Seconds since the job started
+    """
+    with closing(_connect()) as conn, conn:
+        conn.execute(
+            "INSERT INTO job_events (job_id, event, data, created_at, elapsed) VALUES (?, ?, ?, ?, ?)",
+            (job_id, event, json.dumps(data or {}, default=str), time.time(), elapsed)
+        )
+
+def get_job_events(job_id, after_id=0):
+    """
+    Return a job's progress events newer than after_id
+
+    Args:
+        job_id (str): Job ID
+        after_id (int): Last event ID already seen
+
+    Returns:
+        list: [{"id", "event", "data", "created_at", "elapsed"}, ...] in order
+    """
+    with closing(_connect()) as conn:
+        rows = conn.execute(
+            "SELECT id, event, data, created_at, elapsed FROM job_events WHERE job_id = ? AND id > ? ORDER BY id",
+            (job_id, after_id)
+        ).fetchall()
+
+    events = []
+    for row in rows:
+        event = dict(row)
+        event['data'] = json.loads(event['data']) if event['data'] else {}
+        events.append(event)
+    return events
+
+@contextmanager
+def job_stage(job_id, stage):
+    """
+    Time a pipeline stage and record it for the job
+
+    Emits stage_started/stage_finished progress events. A job_id of None
+    (pipeline run outside the queue) records nothing. The stage is measured
+    with instrumentation.stage_timer, whose record is yielded so the stage
+    can set its row count.
+
+    Args:
+        job_id (str): Job ID or None
+        stage (str): Stage name
+
+    Yields:
+        dict: The stage record
+    """
+    started_at = time.time()
+    report_progress("stage_started", stage=stage)
+    record = {}
+    try:
+        with stage_timer(stage) as record:
+            yield record
+    finally:
+        duration = record.get("seconds", 0.0)
+        report_progress("stage_finished", stage=stage, seconds=duration)
+        if job_id:
+            record_stage(job_id, stage, started_at, duration, record.get("parent"))
+
+def _run_job(job_id, pipeline, kwargs):
+    job_start = time.perf_counter()
+
+    def reporter(event, **data):
+        emit_event(job_id, event, data, elapsed=time.perf_counter() - job_start)
+
+    token = set_progress_reporter(reporter)
+    update_job(job_id, status=STATUS_RUNNING, started_at=time.time())
+    report_progress("job_started")
+    try:
+        with collect_stages() as stages:
+            try:
+                result = pipeline(job_id=job_id, **kwargs)
+            finally:
+                record_stage_metrics(job_id, stages)
+        if isinstance(result, dict):
+            result = dict(result, stage_metrics=stages)
+        update_job(job_id, status=STATUS_COMPLETED, result=result, finished_at=time.time())
+        report_progress("job_finished", status=STATUS_COMPLETED)
+    except Exception as e:
+        print(f"[ERROR] Job {job_id} failed: {str(e)}")
+        update_job(job_id, status=STATUS_FAILED, error=str(e), finished_at=time.time())
+        report_progress("job_finished", status=STATUS_FAILED, error=str(e))
+    finally:
+        reset_progress_reporter(token)
+        with _active_jobs_lock:
+            _active_jobs.discard(job_id)
+
+def submit_job(pipeline, **kwargs):
+    """
+    Queue a pipeline for background execution
+
+    The pipeline is called as pipeline(job_id=..., **kwargs) and must return a
+    JSON-serializable result; an exception marks the job failed.
+
+    Args:
+        pipeline (callable): Pipeline function
+        **kwargs: JSON-serializable pipeline arguments (stored as job options)
+
+    Returns:
+        str: Job ID
+    """
+    job_id = create_job(kwargs)
+    with _active_jobs_lock:
+        _active_jobs.add(job_id)
+    _start_heartbeat()
+    _get_executor().submit(_run_job, job_id, pipeline, kwargs)
+    return job_id
@@ -0,0 +1,142 @@
+"""
+Bridgette LLM Client
+====================
+
+Shared OpenAI client layer used by main.py and the Flask endpoints.
+
+Key Components:
+- Long-lived clients (one per API key / base URL), so HTTP connections are
+  pooled and reused instead of rebuilt for every request
+- Per-request timeouts
+- Retries with exponential backoff and full jitter on 429, 5xx, timeouts
+  and connection errors (Retry-After is honoured when the server sends it)
+- A global concurrency limit shared by every caller in the process
+
+Architecture Rationale:
+- The OpenAI SDK's own retries are disabled so every attempt passes through
+  the concurrency limit and the same backoff policy
+- The API key is read from config (or OPENAI_API_KEY) once and cached
+- OPENAI_BASE_URL points the clients at another endpoint (e.g. a local stub
+  server for testing, see benchmarks/check_llm_client.py) without code changes
+- The pipeline runs concurrent requests on threads (see match_schema_shards),
+  so the client is synchronous and one semaphore bounds the whole process
+"""
+
+import os
+import random
+import threading
+import time
+
+from openai import OpenAI, APIConnectionError, APIStatusError, APITimeoutError
+
+# Client configuration
+OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL') or None
+OPENAI_TIMEOUT = float(os.environ.get('OPENAI_TIMEOUT', 120))  # Seconds per request
+OPENAI_MAX_RETRIES = int(os.environ.get('OPENAI_MAX_RETRIES', 4))
+OPENAI_BACKOFF_BASE = float(os.environ.get('OPENAI_BACKOFF_BASE', 1.0))  # Seconds
+OPENAI_BACKOFF_MAX = float(os.environ.get('OPENAI_BACKOFF_MAX', 30.0))  # Seconds
+OPENAI_MAX_CONCURRENCY = int(os.environ.get('OPENAI_MAX_CONCURRENCY', 4))
+
+# Status codes worth retrying
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+_clients = {}
+_clients_lock = threading.Lock()
+_request_slots = threading.BoundedSemaphore(OPENAI_MAX_CONCURRENCY)
+_default_api_key = None
+
+def resolve_api_key(api_key=None):
+    """
+    Return the API key to use, loading the configured key once
+
+    Args:
+        api_key (str): Explicit key (optional)
+
+    Returns:
+        str: API key
+    """
+    global _default_api_key
+    if api_key:
+        return api_key
+    if _default_api_key is None:
+        try:
+            from config import Config
+            _default_api_key = Config.OPENAI_API_KEY
+        except ImportError:
+            _default_api_key = os.environ.get('OPENAI_API_KEY')
+            if not _default_api_key:
+                raise ValueError("Configuration not found. Please ensure config.py exists and .env file is set up.")
+        except Exception as e:
+            raise ValueError(f"Error loading API key: {e}")
+    return _default_api_key
+
+def get_client(api_key=None):
+    """Return the shared sync client for an API key"""
+    api_key = resolve_api_key(api_key)
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = OpenAI(api_key=api_key, base_url=OPENAI_BASE_URL, timeout=OPENAI_TIMEOUT, max_retries=0)
+            _clients[api_key] = client
+    return client
+
+def is_retryable(error):
+    """True for rate limits, server errors, timeouts and connection failures"""
+    if isinstance(error, (APITimeoutError, APIConnectionError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+def backoff_delay(attempt, error=None):
+    """
+    Seconds to wait before retry number attempt (0-based)
+
+    Uses exponential backoff with full jitter, or the server's Retry-After
+    header when it sends one.
+    """
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), OPENAI_BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(OPENAI_BACKOFF_MAX, OPENAI_BACKOFF_BASE * (2 ** attempt)))
+
+def create_chat_completion(messages, model="gpt-4o", api_key=None, timeout=None, max_retries=None, **options):
+    """
+    Create a chat completion with the shared client, retrying transient errors
+
+    Args:
+        messages (list): Chat messages
+        model (str): Model name
+        api_key (str): OpenAI API key (optional, uses config if not provided)
+        timeout (float): Per-request timeout in seconds (default OPENAI_TIMEOUT)
+        max_retries (int): Retries after the first attempt (default OPENAI_MAX_RETRIES)
+        **options: Further chat.completions.create arguments
+
+    Returns:
+        The ChatCompletion response
+
+    Raises:
+        The last error once retries are exhausted, or any non-retryable error
+    """
+    client = get_client(api_key)
+    max_retries = OPENAI_MAX_RETRIES if max_retries is None else max_retries
+
+    for attempt in range(max_retries + 1):
+        try:
+            with _request_slots:
+                return client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    timeout=timeout or OPENAI_TIMEOUT,
+                    **options
+                )
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, e)
+            print(f"[WARNING] OpenAI request failed ({e.__class__.__name__}); retrying in {delay:.1f}s ({attempt + 1}/{max_retries})")
+            time.sleep(delay)
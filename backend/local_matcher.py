@@ -0,0 +1,210 @@
+"""
+Bridgette Local Schema Matcher
+==============================
+
+Offline lexical matching of Bank 1 and Bank 2 schemas.
+
+Key Components:
+- Character n-gram TF-IDF vectors for schema names and descriptions
+- Cosine similarity of every Bank 1 x Bank 2 pair as one matrix product
+- One-to-one assignment (Hungarian algorithm when scipy is installed,
+  greedy best-pair-first otherwise)
+- Confidence bands, so only uncertain pairs need a second opinion
+
+Architecture Rationale:
+- Character n-grams tolerate camelCase/snake_case, abbreviations and
+  spelling variants common in bank schema names
+- n-grams are hashed into a fixed number of columns with a stable hash,
+  so no vocabulary has to be built and memory stays bounded
+- Names and descriptions are scored separately and blended, because names
+  are short and precise while descriptions carry the meaning
+- Everything is vectorized numpy: thousands of schemas score in milliseconds
+  with no network access
+
+Assumptions:
+- Schemas are given as records with "category", "schema" and "description"
+  (see main.encode_schemas_compact)
+"""
+
+import os
+import re
+import zlib
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+# Matching configuration
+LOCAL_MATCH_THRESHOLD = float(os.environ.get('LOCAL_MATCH_THRESHOLD', 0.35))  # Minimum score to match
+LOCAL_MATCH_CONFIDENT = float(os.environ.get('LOCAL_MATCH_CONFIDENT', 0.6))  # Scores below are low confidence
+NAME_WEIGHT = 0.6  # Share of the score from name similarity (rest from descriptions)
+NGRAM_SIZES = (2, 3, 4)
+HASH_DIMENSIONS = 2 ** 11
+
+def normalize_text(text):
+    """Split camelCase/snake_case and lowercase a schema name or description"""
+    text = re.sub(r'([a-z0-9])([A-Z])', r'\1 \2', str(text or ""))
+    return " ".join(re.findall(r'[a-z0-9]+', text.lower()))
+
+def _ngram_columns(text):
+    """Hashed column indexes of the character n-grams of each word"""
+    columns = []
+    for word in text.split():
+        padded = f" {word} "
+        for size in NGRAM_SIZES:
+            for start in range(max(1, len(padded) - size + 1)):
+                gram = padded[start:start + size]
+                columns.append(zlib.crc32(gram.encode('utf-8')) % HASH_DIMENSIONS)
+    return columns
+
+def tfidf_vectors(texts_a, texts_b):
+    """
+    Build L2-normalized TF-IDF vectors for two sets of texts
+
+    Document frequencies are computed over both sets together so the same
+    n-gram has the same weight on both sides.
+
+    Args:
+        texts_a (list): First set of normalized texts
+        texts_b (list): Second set of normalized texts
+
+    Returns:
+        tuple: (matrix for texts_a, matrix for texts_b)
+    """
+    texts = list(texts_a) + list(texts_b)
+    counts = np.zeros((len(texts), HASH_DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        columns = _ngram_columns(text)
+        if columns:
+            np.add.at(counts[row], columns, 1.0)
+
+    document_frequency = (counts > 0).sum(axis=0)
+    idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1
+    weights = np.log1p(counts) * idf.astype(np.float32)
+
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    weights /= norms
+    return weights[:len(texts_a)], weights[len(texts_a):]
+
+def similarity_matrix(bank1_records, bank2_records, name_weight=NAME_WEIGHT):
+    """
+    Score every Bank 1 x Bank 2 schema pair
+
+    Args:
+        bank1_records (list): Records with "schema" and "description"
+        bank2_records (list): Records with "schema" and "description"
+        name_weight (float): Share of the score from name similarity
+
+    Returns:
+        ndarray: Scores in [0, 1], shape (len(bank1_records), len(bank2_records))
+    """
+    names1, names2 = tfidf_vectors(
+        [normalize_text(r["schema"]) for r in bank1_records],
+        [normalize_text(r["schema"]) for r in bank2_records]
+    )
+    descriptions1, descriptions2 = tfidf_vectors(
+        [normalize_text(r.get("description")) for r in bank1_records],
+        [normalize_text(r.get("description")) for r in bank2_records]
+    )
+
+    name_scores = names1 @ names2.T
+    description_scores = descriptions1 @ descriptions2.T
+
+    # Pairs without descriptions on both sides are scored on names alone
+    has_description = (np.abs(descriptions1).sum(axis=1) > 0)[:, None] & (np.abs(descriptions2).sum(axis=1) > 0)[None, :]
+    scores = np.where(
+        has_description,
+        name_weight * name_scores + (1 - name_weight) * description_scores,
+        name_scores
+    )
+    return np.clip(scores, 0, 1)
+
+def assign_pairs(scores, threshold=LOCAL_MATCH_THRESHOLD):
+    """
+    Pick one-to-one pairs that maximize the total score
+
+    Args:
+        scores (ndarray): Similarity matrix from similarity_matrix
+        threshold (float): Minimum score for a pair to be kept
+
+    Returns:
+        list: (bank1 index, bank2 index, score) tuples sorted by bank1 index
+    """
+    if scores.size == 0:
+        return []
+
+    if linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(scores, maximize=True)
+        pairs = zip(rows.tolist(), cols.tolist())
+    else:
+        # Greedy: take the best remaining pair until one side runs out
+        order = np.argsort(scores, axis=None)[::-1]
+        used_rows, used_cols, pairs = set(), set(), []
+        for flat_index in order:
+            row, col = divmod(int(flat_index), scores.shape[1])
+            if scores[row, col] < threshold:
+                break
+            if row in used_rows or col in used_cols:
+                continue
+            used_rows.add(row)
+            used_cols.add(col)
+            pairs.append((row, col))
+
+    return sorted(
+        (row, col, float(scores[row, col]))
+        for row, col in pairs
+        if scores[row, col] >= threshold
+    )
+
+def match_records(bank1_records, bank2_records, threshold=LOCAL_MATCH_THRESHOLD, confident=LOCAL_MATCH_CONFIDENT, scores=None):
+    """
+    Match two lists of schema records
+
+    Args:
+        bank1_records (list): Bank 1 records ("category", "schema", "description", ...)
+        bank2_records (list): Bank 2 records
+        threshold (float): Minimum score to match
+        confident (float): Matches scoring below this are flagged low confidence
+        scores (ndarray): Precomputed similarity_matrix (optional)
+
+    Returns:
+        dict: Same structure as main.parse_chatgpt_response; each match also
+        carries "score" and "confidence" ("high"/"low")
+    """
+    if scores is None:
+        scores = similarity_matrix(bank1_records, bank2_records)
+    pairs = assign_pairs(scores, threshold)
+
+    matched_schemas = []
+    for row, col, score in pairs:
+        matched_schemas.append({
+            "bank1": {"category": bank1_records[row]["category"], "schema": bank1_records[row]["schema"]},
+            "bank2": {"category": bank2_records[col]["category"], "schema": bank2_records[col]["schema"]},
+            "score": round(score, 4),
+            "confidence": "high" if score >= confident else "low"
+        })
+
+    matched_rows = {row for row, _, _ in pairs}
+    matched_cols = {col for _, col, _ in pairs}
+    unmatched_bank1 = [r for i, r in enumerate(bank1_records) if i not in matched_rows]
+    unmatched_bank2 = [r for i, r in enumerate(bank2_records) if i not in matched_cols]
+
+    return {
+        "matched_schemas": matched_schemas,
+        "unmatched_bank1": unmatched_bank1,
+        "unmatched_bank2": unmatched_bank2,
+        "statistics": {
+            "total_matched": len(matched_schemas),
+            "total_unmatched_bank1": len(unmatched_bank1),
+            "total_unmatched_bank2": len(unmatched_bank2),
+            "total_schemas": len(matched_schemas) + len(unmatched_bank1) + len(unmatched_bank2)
+        }
+    }
+
+def top_candidates(scores, row, count=3):
+    """Indexes of the best-scoring Bank 2 schemas for one Bank 1 schema"""
+    return [int(col) for col in np.argsort(scores[row])[::-1][:count]]
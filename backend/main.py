@@ -25,27 +25,76 @@ Assumptions:
 """
 
 import pandas as pd
+import numpy as np
 import json
 import os
+import re
 import sys
+import threading
+import time
 from pathlib import Path
 import argparse
-from openai import OpenAI
+
+from disk_cache import (
+    PARSE_CACHE_ENABLED, load_parsed_sheets, store_parsed_sheets, projection_variant,
+    llm_cache_key, load_llm_response, store_llm_response
+)
+from intermediate import is_arrow_path, write_intermediate, read_manifest, load_converted_data
+from llm_client import create_chat_completion
+from output_writer import write_dataframe
+from workspaces import UPLOADS_SUBDIR, workspace_path
+from progress import report_progress, run_in_context
+from instrumentation import timed_stage, collect_stages, record_stages
+from spreadsheet_engine import open_workbook
 
 def read_spreadsheet(file_path):
-    """Read spreadsheet file and return appropriate engine"""
+    """
+    Open a spreadsheet on the configured reader engine
+
+    Excel/ODS workbooks are opened through spreadsheet_engine (calamine when
+    available, openpyxl/xlrd/odf otherwise; see SPREADSHEET_ENGINE).
+
+    Returns:
+        pd.ExcelFile for workbooks, or "csv" for CSV files
+    """
     ext = os.path.splitext(file_path)[1].lower()
 
-    if ext == ".xlsx":
-        return pd.ExcelFile(file_path, engine="openpyxl")
-    elif ext == ".xls":
-        return pd.ExcelFile(file_path, engine="xlrd")
-    elif ext == ".ods":
-        return pd.ExcelFile(file_path, engine="odf")
-    elif ext == ".csv":
+    if ext == ".csv":
         return "csv"
+    return open_workbook(file_path)
+
+def read_workbook_sheets(file_path, use_cache=True):
+    """
+    Parse every sheet of a workbook in a single pass
+
+    The workbook is opened once and each sheet is parsed exactly once into an
+    in-memory cache, so callers that need both the records and the metadata
+    never go back to disk. Parsed sheets are also kept in the on-disk parse
+    cache (keyed by content hash), so unchanged uploads are never re-parsed.
+    For CSV files the single table is returned under the "data" key.
+
+    Args:
+        file_path (str): Path to the Excel/ODS/CSV file
+        use_cache (bool): Whether to read from and write to the parse cache
+
+    Returns:
+        dict: Mapping of sheet name to raw (uncleaned) DataFrame, in workbook order
+    """
+    if use_cache:
+        sheets = load_parsed_sheets(file_path)
+        if sheets is not None:
+            return sheets
+
+    if os.path.splitext(file_path)[1].lower() == ".csv":
+        sheets = {"data": pd.read_csv(file_path)}
     else:
-        raise ValueError(f"Unsupported file type: {ext}. Supported: .xlsx, .xls, .csv, .ods")
+        xls = read_spreadsheet(file_path)
+        with xls:
+            sheets = xls.parse(sheet_name=None)
+
+    if use_cache:
+        store_parsed_sheets(file_path, sheets)
+    return sheets
 
 def clean_dataframe(df):
     """Clean dataframe by removing completely empty rows and columns"""
@@ -80,7 +129,46 @@ def filter_header_rows(data_list):
     
     return filtered_data
 
-def convert_to_json(file_path, output_file=None, clean_data=True, include_metadata=True):
+def header_row_mask(df):
+    """
+    Flag the rows of a DataFrame that filter_header_rows would drop
+
+    Vectorized equivalent of filter_header_rows, so header rows can be
+    removed or counted without materialising the records.
+
+    Returns:
+        Series: Boolean mask aligned with df.index (True for header rows)
+    """
+    if len(df.columns) < 2:
+        return pd.Series(False, index=df.index)
+
+    # copy() first: astype(str) can write into the object arrays of frames
+    # loaded from the parse cache, turning NaN into "nan" in the source
+    first_two = df.iloc[:, :2].copy().astype(str).apply(lambda col: col.str.lower().str.strip())
+    is_name = (first_two == 'name').any(axis=1)
+    is_description = (first_two == 'description').any(axis=1)
+    is_other_header = first_two.isin(['field', 'column', 'attribute', 'property']).any(axis=1)
+    return (is_name & is_description) | is_other_header
+
+def count_data_rows(df):
+    """
+    Count the rows of a DataFrame that filter_header_rows would keep
+
+    Vectorized equivalent of len(filter_header_rows(df.to_dict(orient="records")))
+    so metadata can be computed without materialising the records twice.
+    """
+    return int((~header_row_mask(df)).sum())
+
+def _converted_rows(data):
+    """Rows in a convert_to_json result (records, or the metadata when streaming)"""
+    records = [value for value in data.values() if isinstance(value, list)]
+    if records:
+        return sum(len(value) for value in records)
+    metadata = data.get("_metadata") or data.get("metadata") or {}
+    return metadata.get("total_rows", metadata.get("rows"))
+
+@timed_stage("convert_to_json", count_rows=_converted_rows)
+def convert_to_json(file_path, output_file=None, clean_data=True, include_metadata=True, streaming=False):
     """
     Convert Excel/CSV file to JSON format
     
@@ -89,10 +177,19 @@ def convert_to_json(file_path, output_file=None, clean_data=True, include_metada
         output_file (str): Path to output JSON file (optional)
         clean_data (bool): Whether to clean empty rows/columns
         include_metadata (bool): Whether to include file metadata in output
+        streaming (bool): Stream rows to disk with bounded memory (see convert_to_json_streaming)
     
     Returns:
-        dict: The converted data
+        dict: The converted data (metadata and output path only when streaming)
     """
+    if streaming:
+        return convert_to_json_streaming(
+            file_path,
+            output_file=output_file,
+            clean_data=clean_data,
+            include_metadata=include_metadata
+        )
+
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
     
@@ -103,11 +200,12 @@ def convert_to_json(file_path, output_file=None, clean_data=True, include_metada
     
     data = {}
     ext = os.path.splitext(file_path)[1].lower()
+    start_time = time.perf_counter()
 
     try:
         if ext == ".csv":
             print(f"[INFO] Reading CSV file: {file_path}")
-            df = pd.read_csv(file_path)
+            df = read_workbook_sheets(file_path)["data"]
             if clean_data:
                 df = clean_dataframe(df)
             records = df.to_dict(orient="records")
@@ -125,43 +223,425 @@ def convert_to_json(file_path, output_file=None, clean_data=True, include_metada
                 }
         else:
             print(f"[INFO] Reading Excel file: {file_path}")
-            xls = read_spreadsheet(file_path)
-            
-            for sheet_name in xls.sheet_names:
+            # Parse every sheet once; records and metadata share this cache
+            sheet_cache = read_workbook_sheets(file_path)
+            sheet_names = list(sheet_cache.keys())
+            total_rows = 0
+
+            for sheet_name, raw_df in sheet_cache.items():
                 print(f"  [INFO] Processing sheet: {sheet_name}")
-                df = pd.read_excel(file_path, sheet_name=sheet_name, engine=xls.engine)
-                
-                if clean_data:
-                    df = clean_dataframe(df)
-                
+
+                # Metadata counts rows before cleaning
+                total_rows += count_data_rows(raw_df)
+
+                df = clean_dataframe(raw_df) if clean_data else raw_df
+
                 records = df.to_dict(orient="records")
                 # Filter out header rows
                 records = filter_header_rows(records)
                 data[sheet_name] = records
-            
+
             if include_metadata:
                 data["_metadata"] = {
                     "file_type": ext.upper(),
                     "file_name": os.path.basename(file_path),
-                    "sheets": xls.sheet_names,
-                    "sheet_count": len(xls.sheet_names),
-                    "total_rows": sum(len(filter_header_rows(pd.read_excel(file_path, sheet_name=sheet, engine=xls.engine).to_dict(orient="records"))) for sheet in xls.sheet_names)
+                    "sheets": sheet_names,
+                    "sheet_count": len(sheet_names),
+                    "total_rows": total_rows
                 }
         
         # Write to JSON file
         with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
         
         print(f"[SUCCESS] Successfully converted {file_path} to {output_file}")
         print(f"[INFO] Output file size: {os.path.getsize(output_file)} bytes")
         
+        report_progress(
+            "file_parsed",
+            file=os.path.basename(file_path),
+            sheets=len(data) - (1 if include_metadata else 0),
+            rows=sum(len(records) for key, records in data.items() if isinstance(records, list)),
+            seconds=time.perf_counter() - start_time
+        )
+        
         return data
         
     except Exception as e:
         print(f"[ERROR] Error processing file: {str(e)}")
         raise
 
-def process_file(file_path, output_file=None, clean_data=True, include_metadata=True):
+@timed_stage("convert_to_intermediate", count_rows=lambda metadata: metadata.get("total_rows", metadata.get("rows")))
+def convert_to_intermediate(file_path, output_file=None, clean_data=True, include_metadata=True):
+    """
+    Convert Excel/CSV file to a columnar Arrow intermediate
+    
+    Produces the same sheets, rows and metadata as convert_to_json, but keeps
+    them as typed columns (see intermediate.py) instead of pretty-printed
+    JSON records. Later stages read them memory-mapped, and JSON is only
+    built in memory when the LLM prompt needs it.
+    
+    Args:
+        file_path (str): Path to input file
+        output_file (str): Path to output ".arrow" intermediate (optional)
+        clean_data (bool): Whether to clean empty rows/columns
+        include_metadata (bool): Whether to include file metadata in output
+    
+    Returns:
+        dict: The file metadata
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found: {file_path}")
+    
+    # Generate output filename if not provided
+    if output_file is None:
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        output_file = f"{base_name}_converted.arrow"
+    
+    ext = os.path.splitext(file_path)[1].lower()
+    start_time = time.perf_counter()
+    
+    try:
+        print(f"[INFO] Reading {'CSV' if ext == '.csv' else 'Excel'} file: {file_path}")
+        sheet_cache = read_workbook_sheets(file_path)
+        sheets = {}
+        total_rows = 0
+        
+        for sheet_name, raw_df in sheet_cache.items():
+            # Metadata counts rows before cleaning (Excel) / after cleaning (CSV)
+            if ext != ".csv":
+                total_rows += count_data_rows(raw_df)
+            df = clean_dataframe(raw_df) if clean_data else raw_df
+            # Filter out header rows
+            sheets[sheet_name] = df[~header_row_mask(df)]
+        
+        if ext == ".csv":
+            df = sheets["data"]
+            metadata_key = "metadata"
+            metadata = {
+                "file_type": "CSV",
+                "file_name": os.path.basename(file_path),
+                "rows": len(df),
+                "columns": list(df.columns),
+                "column_count": len(df.columns)
+            }
+        else:
+            metadata_key = "_metadata"
+            metadata = {
+                "file_type": ext.upper(),
+                "file_name": os.path.basename(file_path),
+                "sheets": list(sheets.keys()),
+                "sheet_count": len(sheets),
+                "total_rows": total_rows
+            }
+        
+        output_bytes = write_intermediate(
+            output_file, sheets,
+            metadata=metadata if include_metadata else None,
+            metadata_key=metadata_key
+        )
+        
+        print(f"[SUCCESS] Successfully converted {file_path} to {output_file}")
+        print(f"[INFO] Output size: {output_bytes} bytes")
+        
+        report_progress(
+            "file_parsed",
+            file=os.path.basename(file_path),
+            sheets=len(sheets),
+            rows=sum(len(df) for df in sheets.values()),
+            seconds=time.perf_counter() - start_time
+        )
+        
+        return metadata
+        
+    except Exception as e:
+        print(f"[ERROR] Error processing file: {str(e)}")
+        raise
+
+# Rows per chunk for chunked CSV reads in streaming mode
+STREAMING_CHUNK_SIZE = 10000
+
+def _write_json_records(f, records, first):
+    """Write records as elements of an open JSON array, one per line"""
+    for record in records:
+        if not first:
+            f.write(",\n")
+        f.write("    " + json.dumps(record, ensure_ascii=False, default=str))
+        first = False
+    return first
+
+def _header_names(header_row, width):
+    """Build column names the way pandas does for a sheet header row"""
+    names = []
+    seen = {}
+    for idx in range(width):
+        value = header_row[idx] if idx < len(header_row) else None
+        name = f"Unnamed: {idx}" if value is None or value == "" else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+# Strings pandas reads as NaN by default (read_excel/read_csv na_values)
+PANDAS_NA_STRINGS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+    "nan", "null"
+})
+
+# Strings pandas reads as booleans when a whole column consists of them
+PANDAS_BOOL_STRINGS = {"True": True, "TRUE": True, "true": True, "False": False, "FALSE": False, "false": False}
+
+def _is_empty_cell(value):
+    """True for cells pandas would read as NaN"""
+    if isinstance(value, str):
+        return value in PANDAS_NA_STRINGS
+    return value is None or (isinstance(value, float) and value != value)
+
+def _parse_number(value):
+    """Parse a numeric-looking string as int or float, or return None"""
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+def _scan_sheet_columns(worksheet, width):
+    """
+    Find the columns pandas would convert from text, in one pass over the sheet
+
+    pandas infers types per column: a column whose non-empty cells are all
+    numbers or numeric-looking text becomes numeric, and a column of only
+    "True"/"False" text becomes boolean. Other columns keep their cells as
+    stored.
+
+    Args:
+        worksheet: Read-only worksheet
+        width (int): Header width
+
+    Returns:
+        tuple: (sheet width, set of non-empty column indexes,
+            {column index: converter} for the columns whose text cells must
+            be converted)
+    """
+    non_empty = set()
+    numeric = {}
+    boolean = {}
+    for row in worksheet.iter_rows(min_row=2, values_only=True):
+        width = max(width, len(row))
+        for idx, value in enumerate(row):
+            if _is_empty_cell(value):
+                continue
+            non_empty.add(idx)
+            if isinstance(value, str):
+                if numeric.get(idx, True):
+                    numeric[idx] = _parse_number(value) is not None
+                boolean[idx] = boolean.get(idx, True) and value in PANDAS_BOOL_STRINGS
+            else:
+                numeric[idx] = numeric.get(idx, True) and isinstance(value, (int, float)) and not isinstance(value, bool)
+                boolean[idx] = boolean.get(idx, True) and isinstance(value, bool)
+
+    parsers = {}
+    for idx in range(width):
+        if numeric.get(idx):
+            parsers[idx] = _parse_number
+        elif boolean.get(idx):
+            parsers[idx] = PANDAS_BOOL_STRINGS.get
+    return width, non_empty, parsers
+
+def _stream_sheet_records(worksheet, clean_data):
+    """
+    Yield (raw_record, cleaned_record) pairs for a read-only worksheet
+
+    Applies clean_dataframe semantics incrementally: empty rows are skipped as
+    they stream past. A first pass over the sheet keeps one set of flags per
+    column in memory: which columns are all empty, and which text columns
+    pandas would read as numbers or booleans, so cell values match the
+    in-memory convert_to_json.
+    """
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+
+    width, non_empty, parsers = _scan_sheet_columns(worksheet, len(header))
+    keep_columns = sorted(non_empty) if clean_data else None
+
+    names = _header_names(header, width)
+    empty_record = dict.fromkeys(names, float("nan"))
+    # pandas drops trailing empty rows, so empty rows are only emitted once a
+    # later non-empty row proves they are not trailing
+    pending_empty = 0
+
+    for row in rows:
+        if all(_is_empty_cell(v) for v in row):
+            pending_empty += 1
+            continue
+
+        for _ in range(pending_empty):
+            yield dict(empty_record), (None if clean_data else dict(empty_record))
+        pending_empty = 0
+
+        values = [float("nan") if _is_empty_cell(v) else v for v in row[:width]]
+        values.extend([float("nan")] * (width - len(values)))
+        for idx, parse in parsers.items():
+            if isinstance(values[idx], str):
+                values[idx] = parse(values[idx])
+        raw_record = dict(zip(names, values))
+
+        if not clean_data:
+            yield raw_record, raw_record
+        else:
+            yield raw_record, {names[idx]: values[idx] for idx in keep_columns}
+
+def convert_to_json_streaming(file_path, output_file=None, clean_data=True, include_metadata=True, chunk_size=STREAMING_CHUNK_SIZE):
+    """
+    Convert Excel/CSV file to JSON with memory bounded by one row (or chunk)
+
+    Excel rows are read with openpyxl read_only/iter_rows and CSVs with chunked
+    pd.read_csv. clean_dataframe and filter_header_rows are applied row by row
+    and records are written to the JSON array as they are produced, so peak
+    memory does not grow with the row count. The output has the same layout as
+    convert_to_json (one array per sheet plus metadata). Excel cells get the
+    same per-column type inference as pandas (numeric-looking text in numeric
+    columns becomes a number, pandas' NA strings become NaN), but numbers are
+    written as stored, so whole numbers in columns with gaps stay integers
+    instead of being upcast to float by pandas.
+
+    Args:
+        file_path (str): Path to input file
+        output_file (str): Path to output JSON file (optional)
+        clean_data (bool): Whether to clean empty rows/columns
+        include_metadata (bool): Whether to include file metadata in output
+        chunk_size (int): Rows per chunk for CSV input
+
+    Returns:
+        dict: Metadata for the converted file and the output file path
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    if output_file is None:
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        output_file = f"{base_name}_converted.json"
+
+    ext = os.path.splitext(file_path)[1].lower()
+    result = {"output_file": output_file}
+
+    if ext not in (".csv", ".xlsx"):
+        # xlrd/odf have no row-streaming reader; use the in-memory path
+        print(f"[WARNING] Streaming not supported for {ext} files, using standard conversion")
+        data = convert_to_json(file_path, output_file, clean_data, include_metadata)
+        result.update({k: v for k, v in data.items() if k in ("_metadata", "metadata")})
+        return result
+
+    start_time = time.perf_counter()
+    rows_read = 0
+
+    try:
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write("{\n")
+
+            if ext == ".csv":
+                print(f"[INFO] Streaming CSV file: {file_path}")
+                keep_columns = None
+                if clean_data:
+                    # First pass keeps only one flag per column
+                    non_empty = None
+                    for chunk in pd.read_csv(file_path, chunksize=chunk_size):
+                        chunk_non_empty = chunk.notna().any()
+                        non_empty = chunk_non_empty if non_empty is None else (non_empty | chunk_non_empty)
+                    keep_columns = [col for col, flag in non_empty.items() if flag] if non_empty is not None else []
+
+                f.write('  "data": [\n')
+                first = True
+                rows = 0
+                columns = keep_columns
+                for chunk in pd.read_csv(file_path, chunksize=chunk_size):
+                    if clean_data:
+                        chunk = chunk.dropna(how='all')[keep_columns]
+                    columns = list(chunk.columns)
+                    records = filter_header_rows(chunk.to_dict(orient="records"))
+                    rows += len(records)
+                    first = _write_json_records(f, records, first)
+                f.write("\n  ]")
+                rows_read = rows
+
+                if include_metadata:
+                    columns = columns or []
+                    result["metadata"] = {
+                        "file_type": "CSV",
+                        "file_name": os.path.basename(file_path),
+                        "rows": rows,
+                        "columns": columns,
+                        "column_count": len(columns)
+                    }
+            else:
+                print(f"[INFO] Streaming Excel file: {file_path}")
+                from openpyxl import load_workbook
+
+                workbook = load_workbook(file_path, read_only=True, data_only=True)
+                try:
+                    sheet_names = workbook.sheetnames
+                    total_rows = 0
+
+                    for sheet_index, sheet_name in enumerate(sheet_names):
+                        print(f"  [INFO] Streaming sheet: {sheet_name}")
+                        if sheet_index:
+                            f.write(",\n")
+                        f.write(f"  {json.dumps(sheet_name, ensure_ascii=False)}: [\n")
+
+                        first = True
+                        for raw_record, record in _stream_sheet_records(workbook[sheet_name], clean_data):
+                            # Metadata counts rows before cleaning
+                            total_rows += len(filter_header_rows([raw_record]))
+                            if record is None:
+                                continue
+                            first = _write_json_records(f, filter_header_rows([record]), first)
+                        f.write("\n  ]")
+                    rows_read = total_rows
+                finally:
+                    workbook.close()
+
+                if include_metadata:
+                    result["_metadata"] = {
+                        "file_type": ext.upper(),
+                        "file_name": os.path.basename(file_path),
+                        "sheets": sheet_names,
+                        "sheet_count": len(sheet_names),
+                        "total_rows": total_rows
+                    }
+
+            for key in ("_metadata", "metadata"):
+                if key in result:
+                    f.write(f',\n  "{key}": ')
+                    f.write(json.dumps(result[key], ensure_ascii=False, default=str))
+            f.write("\n}\n")
+
+        print(f"[SUCCESS] Successfully streamed {file_path} to {output_file}")
+        print(f"[INFO] Output file size: {os.path.getsize(output_file)} bytes")
+
+        report_progress(
+            "file_parsed",
+            file=os.path.basename(file_path),
+            rows=rows_read,
+            seconds=time.perf_counter() - start_time,
+            streaming=True
+        )
+
+        return result
+
+    except Exception as e:
+        print(f"[ERROR] Error streaming file: {str(e)}")
+        raise
+
+def process_file(file_path, output_file=None, clean_data=True, include_metadata=True, streaming=False):
     """
     Process a file and convert it to JSON - main function to call directly
     
@@ -170,6 +650,7 @@ def process_file(file_path, output_file=None, clean_data=True, include_metadata=
         output_file (str): Output JSON file path (optional)
         clean_data (bool): Whether to clean empty rows/columns
         include_metadata (bool): Whether to include metadata in output
+        streaming (bool): Stream rows to disk with bounded memory
     
     Returns:
         dict: The converted data
@@ -179,18 +660,116 @@ def process_file(file_path, output_file=None, clean_data=True, include_metadata=
             file_path=file_path,
             output_file=output_file,
             clean_data=clean_data,
-            include_metadata=include_metadata
+            include_metadata=include_metadata,
+            streaming=streaming
         )
     except Exception as e:
         print(f"[ERROR] Error: {e}")
         return None
 
+# Worker processes for parallel file conversion
+CONVERSION_WORKERS = int(os.environ.get('CONVERSION_WORKERS', os.cpu_count() or 1))
+# Below this total input size files are converted in-process (pool start-up costs more)
+PARALLEL_CONVERSION_MIN_BYTES = int(os.environ.get('PARALLEL_CONVERSION_MIN_BYTES', 1024 * 1024))
+
+def _convert_file_worker(file_path, output_file, clean_data, include_metadata):
+    """Convert one file and return only its metadata and stage records (runs in a worker process)"""
+    start_time = time.perf_counter()
+    with collect_stages() as stages:
+        if is_arrow_path(output_file):
+            metadata = convert_to_intermediate(file_path, output_file, clean_data, include_metadata)
+        else:
+            data = convert_to_json(file_path, output_file, clean_data, include_metadata)
+            metadata = data.get("_metadata") or data.get("metadata") or {}
+    return {
+        "metadata": metadata,
+        "seconds": time.perf_counter() - start_time,
+        "stages": stages
+    }
+
+def convert_files(file_jobs, clean_data=True, include_metadata=True, max_workers=CONVERSION_WORKERS):
+    """
+    Convert several files, in parallel worker processes when worthwhile
+    
+    Excel parsing is CPU-bound, so files are fanned out over a process pool.
+    Jobs are processed in the order given; callers interleave Bank 1 and
+    Bank 2 files so both halves progress concurrently. Only metadata crosses
+    the process boundary; the records are written to each output file.
+    Output files ending in ".arrow" become Arrow intermediates, others JSON.
+    
+    Args:
+        file_jobs (list): (file_path, output_file) tuples
+        clean_data (bool): Whether to clean empty rows/columns
+        include_metadata (bool): Whether to include metadata in output
+        max_workers (int): Maximum worker processes
+    
+    Returns:
+        list: One dict per job, in input order:
+            {"file_path", "output_file", "success", "metadata"} or
+            {"file_path", "output_file", "success": False, "error"}
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    import multiprocessing
+    
+    results = [None] * len(file_jobs)
+    
+    def _record(index, outcome=None, error=None):
+        file_path, output_file = file_jobs[index]
+        if error is None:
+            results[index] = {"file_path": file_path, "output_file": output_file, "success": True, "metadata": outcome["metadata"]}
+        else:
+            print(f"[ERROR] Error converting {file_path}: {error}")
+            results[index] = {"file_path": file_path, "output_file": output_file, "success": False, "error": str(error)}
+    
+    total_bytes = sum(os.path.getsize(path) for path, _ in file_jobs if os.path.exists(path))
+    workers = min(max_workers, len(file_jobs))
+    
+    if workers <= 1 or total_bytes < PARALLEL_CONVERSION_MIN_BYTES:
+        for index, (file_path, output_file) in enumerate(file_jobs):
+            try:
+                _record(index, _convert_file_worker(file_path, output_file, clean_data, include_metadata))
+            except Exception as e:
+                _record(index, error=e)
+        return results
+    
+    print(f"[INFO] Converting {len(file_jobs)} files with {workers} worker processes")
+    # spawn avoids forking a multi-threaded server process
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {
+            pool.submit(_convert_file_worker, file_path, output_file, clean_data, include_metadata): index
+            for index, (file_path, output_file) in enumerate(file_jobs)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                _record(index, error=e)
+                continue
+            
+            _record(index, outcome)
+            # Workers have no progress reporter or stage collector, so pass
+            # their completions and stage measurements on here
+            record_stages(outcome["stages"])
+            metadata = outcome["metadata"]
+            report_progress(
+                "file_parsed",
+                file=os.path.basename(file_jobs[index][0]),
+                rows=metadata.get("total_rows", metadata.get("rows", 0)),
+                seconds=outcome["seconds"]
+            )
+    
+    return results
+
 def count_schemas_in_json(json_file_path):
     """
-    Count the number of schemas in a JSON file, excluding sheet names and metadata
+    Count the number of schemas in a converted file, excluding sheet names and metadata
+    
+    Arrow intermediates are counted from their manifest without reading any
+    sheet data.
     
     Args:
-        json_file_path (str): Path to the JSON file to analyze
+        json_file_path (str): Path to the converted JSON file or Arrow intermediate
     
     Returns:
         dict: Dictionary with schema counts and details
@@ -200,26 +779,28 @@ def count_schemas_in_json(json_file_path):
             print(f"[ERROR] JSON file not found: {json_file_path}")
             return None
         
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            json_data = json.load(f)
+        if is_arrow_path(json_file_path):
+            row_counts = {sheet["name"]: sheet["rows"] for sheet in read_manifest(json_file_path)["sheets"]}
+        else:
+            json_data = load_converted_data(json_file_path)
+            row_counts = {
+                sheet_name: len(sheet_data) if isinstance(sheet_data, list) else 0
+                for sheet_name, sheet_data in json_data.items()
+            }
         
         schema_count = 0
         sheet_counts = {}
         total_schemas = 0
         
         # Iterate through each sheet/tab in the JSON
-        for sheet_name, sheet_data in json_data.items():
+        for sheet_name, sheet_schema_count in row_counts.items():
             # Skip metadata sections
             if sheet_name.startswith('_') or sheet_name.lower() in ['metadata', 'data']:
                 continue
             
             # Count schemas in this sheet
-            if isinstance(sheet_data, list):
-                sheet_schema_count = len(sheet_data)
-                sheet_counts[sheet_name] = sheet_schema_count
-                total_schemas += sheet_schema_count
-            else:
-                sheet_counts[sheet_name] = 0
+            sheet_counts[sheet_name] = sheet_schema_count
+            total_schemas += sheet_schema_count
         
         result = {
             "file_name": os.path.basename(json_file_path),
@@ -240,7 +821,8 @@ def count_schemas_in_json(json_file_path):
         print(f"[ERROR] Error counting schemas: {str(e)}")
         return None
 
-def send_json_to_chatgpt(json_file_path, prompt, json_file_path2=None, api_key=None, model="gpt-4o", max_tokens=10000, temperature=0.7):
+@timed_stage("send_json_to_chatgpt")
+def send_json_to_chatgpt(json_file_path, prompt, json_file_path2=None, api_key=None, model="gpt-4o", max_tokens=10000, temperature=0.7, use_cache=True, compact=False, response_mode="text"):
     """
     Send one or two JSON files to ChatGPT API with a custom prompt
     
@@ -252,6 +834,9 @@ def send_json_to_chatgpt(json_file_path, prompt, json_file_path2=None, api_key=N
         model (str): ChatGPT model to use (default: gpt-4o)
         max_tokens (int): Maximum tokens in response (default: 4000)
         temperature (float): Response creativity 0-1 (default: 0.7)
+        use_cache (bool): Serve/store the response from the LLM response cache
+        compact (bool): Send schemas in the compact ID|category|name|description encoding
+        response_mode (str): "text" (free text) or "json" (structured schema matches)
     
     Returns:
         str: ChatGPT's response, or None if error
@@ -262,8 +847,7 @@ def send_json_to_chatgpt(json_file_path, prompt, json_file_path2=None, api_key=N
             print(f"[ERROR] JSON file not found: {json_file_path}")
             return None
         
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            json_data1 = json.load(f)
+        json_data1 = load_converted_data(json_file_path)
         
         # Read the second JSON file if provided
         json_data2 = None
@@ -272,32 +856,75 @@ def send_json_to_chatgpt(json_file_path, prompt, json_file_path2=None, api_key=N
                 print(f"[ERROR] Second JSON file not found: {json_file_path2}")
                 return None
             
-            with open(json_file_path2, 'r', encoding='utf-8') as f:
-                json_data2 = json.load(f)
+            json_data2 = load_converted_data(json_file_path2)
         
-        # Initialize OpenAI client
-        if api_key:
-            client = OpenAI(api_key=api_key)
-        else:
-            # Use API key from environment configuration
-            try:
-                from config import Config
-                client = OpenAI(api_key=Config.OPENAI_API_KEY)
-            except ImportError:
-                raise ValueError("Configuration not found. Please ensure config.py exists and .env file is set up.")
-            except Exception as e:
-                raise ValueError(f"Error loading API key: {e}")
+        print(f"[INFO] JSON file 1: {json_file_path}")
+        if json_file_path2:
+            print(f"[INFO] JSON file 2: {json_file_path2}")
+        
+    except Exception as e:
+        print(f"[ERROR] Error sending to ChatGPT: {str(e)}")
+        return None
+    
+    return send_data_to_chatgpt(json_data1, prompt, json_data2, api_key=api_key, model=model, max_tokens=max_tokens, temperature=temperature, use_cache=use_cache, compact=compact, response_mode=response_mode)
+
+@timed_stage("send_data_to_chatgpt")
+def send_data_to_chatgpt(json_data1, prompt, json_data2=None, api_key=None, model="gpt-4o", max_tokens=10000, temperature=0.7, use_cache=True, compact=False, response_mode="text"):
+    """
+    Send one or two already-loaded JSON payloads to ChatGPT with a custom prompt
+    
+    Responses are cached on disk keyed by (model, prompt, temperature,
+    payloads), so repeated requests over identical schemas return instantly.
+    
+    With compact=True the payloads are sent as schema lines with short IDs
+    (see encode_schemas_compact) instead of indented JSON, which drops the
+    whitespace and empty columns; parse_chatgpt_response resolves the IDs.
+    
+    With response_mode="json" the model is constrained to the
+    SCHEMA_MATCH_RESPONSE_FORMAT JSON schema (which refers to schemas by ID,
+    so the compact encoding is always used); parse the result with
+    parse_structured_response.
+    
+    Args:
+        json_data1 (dict): First JSON payload
+        prompt (str): The prompt/question to ask about the JSON data
+        json_data2 (dict, optional): Second JSON payload
+        api_key (str): OpenAI API key (optional, uses default if not provided)
+        model (str): ChatGPT model to use (default: gpt-4o)
+        max_tokens (int): Maximum tokens in response
+        temperature (float): Response creativity 0-1 (default: 0.7)
+        use_cache (bool): Serve/store the response from the LLM response cache
+        compact (bool): Send schemas in the compact ID|category|name|description encoding
+        response_mode (str): "text" (free text) or "json" (structured schema matches)
+    
+    Returns:
+        str: ChatGPT's response, or None if error
+    """
+    try:
+        structured = response_mode == "json"
+        schema_instructions = COMPACT_SCHEMA_INSTRUCTIONS
+        if structured:
+            compact = True
+            schema_instructions = f"{COMPACT_SCHEMA_INSTRUCTIONS}\n\n{STRUCTURED_RESPONSE_INSTRUCTIONS}"
         
         # Prepare the data for the prompt
-        json_str1 = json.dumps(json_data1, indent=2, ensure_ascii=False)
+        if compact:
+            json_str1 = encode_schemas_compact(json_data1, BANK1_ID_PREFIX)[0]
+            json_str2 = encode_schemas_compact(json_data2, BANK2_ID_PREFIX)[0] if json_data2 else ""
+            cache_key = llm_cache_key(model, f"{prompt}\n\n{schema_instructions}", temperature, json_str1, json_str2 or None, options={"max_tokens": max_tokens})
+        else:
+            json_str1 = json.dumps(json_data1, indent=2, ensure_ascii=False, default=str)
+            json_str2 = json.dumps(json_data2, indent=2, ensure_ascii=False, default=str) if json_data2 else ""
+            cache_key = llm_cache_key(model, prompt, temperature, json_data1, json_data2, options={"max_tokens": max_tokens})
         
-        # Calculate total length and truncate if needed
-        total_length = len(json_str1)
-        json_str2 = ""
+        if use_cache:
+            cached = load_llm_response(cache_key)
+            if cached and cached.get("response_text"):
+                report_progress("llm_cache_hit", model=model)
+                return cached["response_text"]
         
-        if json_data2:
-            json_str2 = json.dumps(json_data2, indent=2, ensure_ascii=False)
-            total_length += len(json_str2)
+        # Calculate total length and truncate if needed
+        total_length = len(json_str1) + len(json_str2)
         
         # Truncate if too long (ChatGPT has token limits)
         max_length = 100000  # Rough estimate for token limit
@@ -318,7 +945,21 @@ def send_json_to_chatgpt(json_file_path, prompt, json_file_path2=None, api_key=N
             print("[WARNING] JSON data was truncated due to length")
         
         # Create the full prompt
-        if json_data2:
+        if compact:
+            full_prompt = f"""
+{prompt}
+
+{schema_instructions}
+
+Bank 1 schemas:
+{json_str1}
+"""
+            if json_data2:
+                full_prompt += f"""
+Bank 2 schemas:
+{json_str2}
+"""
+        elif json_data2:
             full_prompt = f"""
 {prompt}
 
@@ -337,17 +978,16 @@ Here is the JSON data:
 """
         
         print(f"[INFO] Sending request to ChatGPT...")
-        print(f"[INFO] JSON file 1: {json_file_path}")
-        if json_file_path2:
-            print(f"[INFO] JSON file 2: {json_file_path2}")
         print(f"[INFO] Prompt: {prompt[:100]}{'...' if len(prompt) > 100 else ''}")
         
         # Send to ChatGPT
-        response = client.chat.completions.create(
-            model=model,
-messages=[
-    {
-        "role": "system",
+        report_progress("llm_request_sent", model=model, prompt_chars=len(full_prompt))
+        request_start = time.perf_counter()
+        request_options = {"response_format": SCHEMA_MATCH_RESPONSE_FORMAT} if structured else {}
+        response = create_chat_completion(
+            [
+                {
+                    "role": "system",
                     "content": "You are a helpful assistant that analyzes JSON data. Provide clear, detailed responses based on the data provided."
                 },
                 {
@@ -355,23 +995,503 @@ messages=[
                     "content": full_prompt
                 }
             ],
+            model=model,
+            api_key=api_key,
             temperature=temperature,
-            max_tokens=max_tokens
+            max_tokens=max_tokens,
+            **request_options
         )
         
-        result = response.choices[0].message.content
-        print(f"[SUCCESS] Received response from ChatGPT ({len(result)} characters)")
+        result = response.choices[0].message.content
+        print(f"[SUCCESS] Received response from ChatGPT ({len(result)} characters)")
+        report_progress("llm_response_received", model=model, response_chars=len(result), seconds=time.perf_counter() - request_start)
+        
+        if use_cache and not structured:
+            store_llm_response(cache_key, result)
+        elif use_cache:
+            # Never cache a malformed structured response, or reruns would repeat it
+            try:
+                json.loads(result)
+                store_llm_response(cache_key, result)
+            except ValueError:
+                print("[WARNING] Structured response is not valid JSON; not caching it")
+        
+        return result
+        
+    except Exception as e:
+        print(f"[ERROR] Error sending to ChatGPT: {str(e)}")
+        return None
+
+# Schema matching is split into shard pairs that fit this prompt budget. Each
+# bank gets half of it, so M Bank 1 and N Bank 2 shards need up to M x N
+# requests; pair_schema_shards only pairs shards that share a category, which
+# keeps aligned workbooks at about M + N (see match_schema_shards)
+SCHEMA_SHARD_TOKEN_BUDGET = int(os.environ.get('SCHEMA_SHARD_TOKEN_BUDGET', 24000))
+# Maximum concurrent schema matching requests
+SCHEMA_MATCH_WORKERS = int(os.environ.get('SCHEMA_MATCH_WORKERS', 4))
+# Rough characters-per-token ratio used for budgeting
+CHARS_PER_TOKEN = 4
+
+def iter_schema_sheets(schema_data):
+    """Yield (category, records) for each schema sheet, skipping metadata"""
+    for sheet_name, sheet_data in schema_data.items():
+        if sheet_name.startswith('_') or sheet_name.lower() in ['metadata', 'data']:
+            continue
+        if isinstance(sheet_data, list):
+            yield sheet_name, sheet_data
+
+# Keys that hold a schema's name / description in converted schema workbooks
+SCHEMA_NAME_KEYS = ('name', 'schema_name', 'field_name')
+SCHEMA_DESCRIPTION_KEYS = ('description', 'desc')
+
+# Short ID prefixes used by the compact schema encoding
+BANK1_ID_PREFIX = "A"
+BANK2_ID_PREFIX = "B"
+SCHEMA_ID_PATTERN = re.compile(r'^[A-Z]\d+$')
+
+COMPACT_SCHEMA_INSTRUCTIONS = f"""Schemas are listed one per line as ID|category|name|description.
+Bank 1 schema IDs start with {BANK1_ID_PREFIX} and Bank 2 schema IDs start with {BANK2_ID_PREFIX}.
+Refer to schemas by ID instead of category/schema, e.g. (Bank 1: {BANK1_ID_PREFIX}3, Bank 2: {BANK2_ID_PREFIX}7) for a match and ({BANK1_ID_PREFIX}4) for an unmatched schema."""
+
+# Structured (JSON mode) schema matching response
+SCHEMA_MATCH_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "schema_matches",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "matches": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "bank1": {"type": "string"},
+                            "bank2": {"type": "array", "items": {"type": "string"}}
+                        },
+                        "required": ["bank1", "bank2"],
+                        "additionalProperties": False
+                    }
+                },
+                "unmatched_bank1": {"type": "array", "items": {"type": "string"}},
+                "unmatched_bank2": {"type": "array", "items": {"type": "string"}}
+            },
+            "required": ["matches", "unmatched_bank1", "unmatched_bank2"],
+            "additionalProperties": False
+        }
+    }
+}
+
+STRUCTURED_RESPONSE_INSTRUCTIONS = """Respond only with a JSON object of schema IDs, ignoring any other output format described above:
+{"matches": [{"bank1": "A1", "bank2": ["B3"]}], "unmatched_bank1": ["A2"], "unmatched_bank2": ["B1"]}
+A Bank 1 schema that corresponds to several Bank 2 schemas lists all of them in "bank2"."""
+
+# Default schema matching response mode: "json" (structured) or "text" (legacy free text)
+SCHEMA_MATCH_RESPONSE_MODE = os.environ.get('SCHEMA_MATCH_RESPONSE_MODE', 'json')
+
+def _has_value(value):
+    """Return True for values worth sending (not None, NaN or blank)"""
+    if value is None:
+        return False
+    if isinstance(value, float) and np.isnan(value):
+        return False
+    return str(value).strip() != ""
+
+def schema_name_and_description(item):
+    """
+    Extract the name and description of a schema record
+    
+    Uses the usual name/description keys and falls back to the first
+    non-empty values of the record when a workbook uses other headers.
+    
+    Args:
+        item (dict): Schema record
+    
+    Returns:
+        tuple: (name, description), name is None for empty records
+    """
+    name = next((item[key] for key in SCHEMA_NAME_KEYS if _has_value(item.get(key))), None)
+    description = next((item[key] for key in SCHEMA_DESCRIPTION_KEYS if _has_value(item.get(key))), None)
+    
+    if name is None or description is None:
+        values = [value for value in item.values() if _has_value(value)]
+        if name is None:
+            name = values.pop(0) if values else None
+        elif name in values:
+            values.remove(name)
+        if description is None:
+            description = values[0] if values else ""
+    
+    name = str(name).strip() if name is not None else None
+    return name, str(description).strip()
+
+def _compact_field(value):
+    """Make a value safe for a single pipe-delimited line"""
+    return " ".join(str(value).replace("|", "/").split())
+
+def encode_schemas_compact(schema_data, id_prefix):
+    """
+    Encode schema data as one line per schema with stable short IDs
+    
+    Each line is ID|category|name|description. IDs are assigned in sheet and
+    row order, so encoding the same data again yields the same IDs and a
+    response can be mapped back to the original records exactly.
+    
+    Args:
+        schema_data (dict): Schema JSON data (sheet name -> records)
+        id_prefix (str): Prefix for the IDs (e.g. "A" for Bank 1)
+    
+    Returns:
+        tuple: (encoded text, dict of ID -> {"category", "schema", "description", "data"})
+    """
+    lines = []
+    id_map = {}
+    
+    for category, records in iter_schema_sheets(schema_data):
+        for item in records:
+            if not isinstance(item, dict):
+                continue
+            name, description = schema_name_and_description(item)
+            if not name:
+                continue
+            
+            schema_id = f"{id_prefix}{len(id_map) + 1}"
+            id_map[schema_id] = {
+                "category": category,
+                "schema": name,
+                "description": description,
+                "data": item
+            }
+            lines.append("|".join([schema_id, _compact_field(category), _compact_field(name), _compact_field(description)]))
+    
+    return "\n".join(lines), id_map
+
+def estimate_tokens(payload, compact=False):
+    """Estimate the prompt tokens a schema payload will take"""
+    if compact:
+        text = encode_schemas_compact(payload, BANK1_ID_PREFIX)[0]
+    else:
+        text = json.dumps(payload, indent=2, ensure_ascii=False, default=str)
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def shard_schema_data(schema_data, token_budget, compact=False):
+    """
+    Split schema data into per-category shards that fit a token budget
+
+    Whole categories are packed together while they fit; a category larger
+    than the budget is split across consecutive shards.
+
+    Args:
+        schema_data (dict): Schema JSON data (sheet name -> records)
+        token_budget (int): Maximum estimated tokens per shard
+        compact (bool): Size shards for the compact encoding
+
+    Returns:
+        list: Shards in the same {category: [records]} layout
+    """
+    shards = []
+    current = {}
+    current_tokens = 0
+
+    for category, records in iter_schema_sheets(schema_data):
+        category_tokens = estimate_tokens({category: records}, compact)
+
+        if category_tokens <= token_budget:
+            if current and current_tokens + category_tokens > token_budget:
+                shards.append(current)
+                current, current_tokens = {}, 0
+            current[category] = records
+            current_tokens += category_tokens
+            continue
+
+        # Category alone exceeds the budget: split it record by record
+        for record in records:
+            record_tokens = estimate_tokens({category: [record]}, compact)
+            if current and current_tokens + record_tokens > token_budget:
+                shards.append(current)
+                current, current_tokens = {}, 0
+            current.setdefault(category, []).append(record)
+            current_tokens += record_tokens
+
+    if current:
+        shards.append(current)
+    return shards
+
+def merge_schema_matches(parsed_results):
+    """
+    Merge parsed results from several shard pairs into one result
+
+    Matches are deduplicated, and a schema only counts as unmatched when no
+    shard pair matched it.
+
+    Args:
+        parsed_results (list): Results from parse_chatgpt_response
+
+    Returns:
+        dict: Same structure as parse_chatgpt_response
+    """
+    matched_schemas = []
+    seen_matches = set()
+    matched_bank1 = set()
+    matched_bank2 = set()
+
+    for parsed in parsed_results:
+        for match in parsed["matched_schemas"]:
+            bank1_key = (match["bank1"]["category"], match["bank1"]["schema"])
+            bank2_key = (match["bank2"]["category"], match["bank2"]["schema"])
+            if (bank1_key, bank2_key) in seen_matches:
+                continue
+            seen_matches.add((bank1_key, bank2_key))
+            matched_bank1.add(bank1_key)
+            matched_bank2.add(bank2_key)
+            matched_schemas.append(match)
+
+    def _unmatched(result_key, matched_keys):
+        unmatched = []
+        seen = set()
+        for parsed in parsed_results:
+            for item in parsed[result_key]:
+                key = (item["category"], item["schema"])
+                if key in matched_keys or key in seen:
+                    continue
+                seen.add(key)
+                unmatched.append(item)
+        return unmatched
+
+    unmatched_bank1 = _unmatched("unmatched_bank1", matched_bank1)
+    unmatched_bank2 = _unmatched("unmatched_bank2", matched_bank2)
+
+    return {
+        "matched_schemas": matched_schemas,
+        "unmatched_bank1": unmatched_bank1,
+        "unmatched_bank2": unmatched_bank2,
+        "statistics": {
+            "total_matched": len(matched_schemas),
+            "total_unmatched_bank1": len(unmatched_bank1),
+            "total_unmatched_bank2": len(unmatched_bank2),
+            "total_schemas": len(matched_schemas) + len(unmatched_bank1) + len(unmatched_bank2)
+        }
+    }
+
+def _shard_categories(shard):
+    return {str(category).strip().casefold() for category in shard}
+
+def pair_schema_shards(bank1_shards, bank2_shards):
+    """
+    Pick the shard pairs to send for matching
+
+    Shards are paired when they share a category (compared case-insensitively),
+    so banks with the same sheet layout need about M + N requests instead of
+    M x N. A shard whose categories the other bank does not have is paired
+    with every shard of the other bank, so its schemas are still compared
+    with everything. With one shard per bank the single pair is returned.
+
+    Args:
+        bank1_shards (list): Bank 1 shards from shard_schema_data
+        bank2_shards (list): Bank 2 shards from shard_schema_data
+
+    Returns:
+        list: (bank1 shard, bank2 shard) pairs in a stable order
+    """
+    bank1_categories = [_shard_categories(shard) for shard in bank1_shards]
+    bank2_categories = [_shard_categories(shard) for shard in bank2_shards]
+    all_bank1 = set().union(*bank1_categories)
+    all_bank2 = set().union(*bank2_categories)
+
+    pairs = set()
+    for i, categories1 in enumerate(bank1_categories):
+        for j, categories2 in enumerate(bank2_categories):
+            if categories1 & categories2 or not categories1 & all_bank2 or not categories2 & all_bank1:
+                pairs.add((i, j))
+
+    return [(bank1_shards[i], bank2_shards[j]) for i, j in sorted(pairs)]
+
+def match_schema_shards(bank1_data, bank2_data, prompt, token_budget=SCHEMA_SHARD_TOKEN_BUDGET, max_workers=SCHEMA_MATCH_WORKERS, **llm_options):
+    """
+    Match two schema sets by sending shard pairs concurrently
+
+    Each side gets half of the token budget, so no request is truncated.
+    Only shards with a category in common are paired (see
+    pair_schema_shards), so when the schemas need several shards a Bank 1
+    schema is compared with the Bank 2 schemas of its own category. Shard
+    pairs are sent through a bounded thread pool and the parsed results are
+    merged and deduplicated.
+
+    Args:
+        bank1_data (dict): Bank 1 schema JSON data
+        bank2_data (dict): Bank 2 schema JSON data
+        prompt (str): Schema matching prompt
+        token_budget (int): Estimated prompt tokens per request
+        max_workers (int): Maximum concurrent requests
+        **llm_options: Passed through to send_data_to_chatgpt
+
+    Returns:
+        dict: Merged parsed data, or None if every request failed
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    compact = llm_options.get("compact", False)
+    bank1_shards = shard_schema_data(bank1_data, token_budget // 2, compact)
+    bank2_shards = shard_schema_data(bank2_data, token_budget // 2, compact)
+    shard_pairs = pair_schema_shards(bank1_shards, bank2_shards)
+
+    if not shard_pairs:
+        print("[ERROR] No schemas found to match")
+        return None
+
+    print(f"[INFO] Matching {len(bank1_shards)} x {len(bank2_shards)} schema shards ({len(shard_pairs)} requests, {max_workers} workers)")
+    if len(shard_pairs) > len(bank1_shards) + len(bank2_shards):
+        print("[WARNING] Few schema categories are shared between the banks, so most shards are sent once per shard of the other bank; raise SCHEMA_SHARD_TOKEN_BUDGET to reduce the request count")
+    report_progress("schema_shards_planned", bank1_shards=len(bank1_shards), bank2_shards=len(bank2_shards), requests=len(shard_pairs))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(shard_pairs)))) as pool:
+        futures = [
+            run_in_context(pool, send_data_to_chatgpt, shard1, prompt, shard2, **llm_options)
+            for shard1, shard2 in shard_pairs
+        ]
+        responses = [future.result() for future in futures]
+
+    parsed_results = []
+    for (shard1, shard2), response in zip(shard_pairs, responses):
+        if not response:
+            print("[WARNING] A schema shard request failed; its schemas may be reported as unmatched")
+            continue
+        if llm_options.get("response_mode") == "json":
+            parsed = parse_structured_response(response, shard1, shard2)
+        else:
+            parsed = parse_chatgpt_response(response, shard1, shard2)
+        if parsed:
+            parsed_results.append(parsed)
+
+    if not parsed_results:
+        return None
+
+    return merge_schema_matches(parsed_results)
+
+def resolve_schema_reference(text, id_map, default_category="Unknown"):
+    """
+    Resolve a schema reference from a ChatGPT response line
+    
+    The reference is either one or more compact IDs ("A3" or "B3, B5") or a
+    "category/schema" name, or a bare schema name.
+    
+    Args:
+        text (str): Reference text without the "Bank N:" label and parentheses
+        id_map (dict): ID -> record mapping from encode_schemas_compact
+        default_category (str): Category for bare names (None uses the name itself)
+    
+    Returns:
+        list: Records with "category", "schema", "description" and "data"
+    """
+    refs = [ref for ref in re.split(r'[,\s]+', text.strip()) if ref]
+    if refs and all(SCHEMA_ID_PATTERN.match(ref) and ref in id_map for ref in refs):
+        return [id_map[ref] for ref in refs]
+    
+    text = text.rstrip(',').strip()
+    if "/" in text:
+        category, schema_name = text.split("/", 1)
+        category = category.strip()
+        schema_name = schema_name.rstrip(',').strip()
+    else:
+        schema_name = text
+        category = text if default_category is None else default_category
+    
+    return [{
+        "schema": schema_name,
+        "category": category,
+        "description": "",
+        "data": {}
+    }]
+
+def _parsed_match_count(parsed_data):
+    """Matched plus unmatched schemas in a parsed response"""
+    if not parsed_data:
+        return 0
+    return sum(len(parsed_data.get(key) or []) for key in ("matched_schemas", "unmatched_bank1", "unmatched_bank2"))
+
+@timed_stage("parse_structured_response", count_rows=_parsed_match_count)
+def parse_structured_response(response_text, bank1_data, bank2_data):
+    """
+    Validate a JSON-mode schema matching response into match records
+    
+    Every ID is checked against the compact encoding of the payloads in one
+    pass. Unmatched lists are derived from the IDs that were not matched, so
+    every schema appears exactly once and nothing is re-scanned.
+    
+    Args:
+        response_text (str): JSON response (see SCHEMA_MATCH_RESPONSE_FORMAT)
+        bank1_data (dict): Bank 1 JSON data sent with the request
+        bank2_data (dict): Bank 2 JSON data sent with the request
+    
+    Returns:
+        dict: Same structure as parse_chatgpt_response, or None if the
+        response does not validate
+    """
+    try:
+        payload = json.loads(response_text)
+        if not isinstance(payload, dict) or not isinstance(payload.get("matches"), list):
+            raise ValueError("expected an object with a \"matches\" list")
+        
+        bank1_ids = encode_schemas_compact(bank1_data, BANK1_ID_PREFIX)[1]
+        bank2_ids = encode_schemas_compact(bank2_data, BANK2_ID_PREFIX)[1]
         
-        return result
+        def _lookup(schema_id, id_map, bank):
+            if not isinstance(schema_id, str) or schema_id not in id_map:
+                raise ValueError(f"unknown {bank} schema ID {schema_id!r}")
+            return id_map[schema_id]
         
-    except Exception as e:
-        print(f"[ERROR] Error sending to ChatGPT: {str(e)}")
+        matched_schemas = []
+        matched_bank1_ids = set()
+        matched_bank2_ids = set()
+        
+        for match in payload["matches"]:
+            if not isinstance(match, dict) or not isinstance(match.get("bank2"), list):
+                raise ValueError(f"malformed match {match!r}")
+            
+            bank1_record = _lookup(match.get("bank1"), bank1_ids, "Bank 1")
+            matched_bank1_ids.add(match["bank1"])
+            
+            for bank2_id in match["bank2"]:
+                bank2_record = _lookup(bank2_id, bank2_ids, "Bank 2")
+                matched_bank2_ids.add(bank2_id)
+                matched_schemas.append({
+                    "bank1": {"category": bank1_record["category"], "schema": bank1_record["schema"]},
+                    "bank2": {"category": bank2_record["category"], "schema": bank2_record["schema"]}
+                })
+        
+        for key, id_map, bank in (("unmatched_bank1", bank1_ids, "Bank 1"), ("unmatched_bank2", bank2_ids, "Bank 2")):
+            for schema_id in payload.get(key, []):
+                _lookup(schema_id, id_map, bank)
+        
+        unmatched_bank1 = [record for schema_id, record in bank1_ids.items() if schema_id not in matched_bank1_ids]
+        unmatched_bank2 = [record for schema_id, record in bank2_ids.items() if schema_id not in matched_bank2_ids]
+        
+        return {
+            "matched_schemas": matched_schemas,
+            "unmatched_bank1": unmatched_bank1,
+            "unmatched_bank2": unmatched_bank2,
+            "statistics": {
+                "total_matched": len(matched_schemas),
+                "total_unmatched_bank1": len(unmatched_bank1),
+                "total_unmatched_bank2": len(unmatched_bank2),
+                "total_schemas": len(matched_schemas) + len(unmatched_bank1) + len(unmatched_bank2)
+            }
+        }
+        
+    except (ValueError, TypeError) as e:
+        print(f"[ERROR] Invalid structured schema matching response: {str(e)}")
         return None
 
+@timed_stage("parse_chatgpt_response", count_rows=_parsed_match_count)
 def parse_chatgpt_response(response_text, bank1_data, bank2_data):
     """
     Parse ChatGPT response and extract matched and unmatched schemas
     
+    Schemas may be referred to by category/schema or by the short IDs of the
+    compact encoding (see encode_schemas_compact), which map back to the
+    original records exactly.
+    
     Expected format:
     (Bank 1: schema_category/schema, Bank 2: schema category/ schema(s))
     (Bank 1: schema_category/schema, Bank 2: schema category/ schema(s)) etc.
@@ -395,6 +1515,10 @@ def parse_chatgpt_response(response_text, bank1_data, bank2_data):
     try:
         lines = response_text.strip().split('\n')
         
+        # IDs from the compact encoding; they are only used when the response contains them
+        bank1_ids = encode_schemas_compact(bank1_data, BANK1_ID_PREFIX)[1]
+        bank2_ids = encode_schemas_compact(bank2_data, BANK2_ID_PREFIX)[1]
+        
         matched_schemas = []
         unmatched_bank1 = []
         unmatched_bank2 = []
@@ -435,128 +1559,49 @@ def parse_chatgpt_response(response_text, bank1_data, bank2_data):
                 bank1_part = bank1_part.rstrip(')').strip()
                 bank2_part = bank2_part.rstrip(')').strip()
                 
-                # Split category and schema name
-                bank1_parts = bank1_part.split('/', 1)
-                bank2_parts = bank2_part.split('/', 1)
-                
-                bank1_category = bank1_parts[0].strip() if len(bank1_parts) > 0 else ""
-                bank1_schema = bank1_parts[1].strip() if len(bank1_parts) > 1 else bank1_parts[0].strip()
-                
-                bank2_category = bank2_parts[0].strip() if len(bank2_parts) > 0 else ""
-                bank2_schema = bank2_parts[1].strip() if len(bank2_parts) > 1 else bank2_parts[0].strip()
-                
-                # Clean up any trailing commas or extra characters
-                bank1_schema = bank1_schema.rstrip(',').strip()
-                bank2_schema = bank2_schema.rstrip(',').strip()
-                
-                matched_schemas.append({
-                    "bank1": {
-                        "category": bank1_category,
-                        "schema": bank1_schema
-                    },
-                    "bank2": {
-                        "category": bank2_category,
-                        "schema": bank2_schema
-                    }
-                })
-                
-                # Track matched schemas
-                matched_bank1_schemas.add(f"{bank1_category}/{bank1_schema}")
-                matched_bank2_schemas.add(f"{bank2_category}/{bank2_schema}")
+                # A side may list several IDs (e.g. "B3, B5"); each pairing is a match
+                for bank1_ref in resolve_schema_reference(bank1_part, bank1_ids, default_category=None):
+                    for bank2_ref in resolve_schema_reference(bank2_part, bank2_ids, default_category=None):
+                        matched_schemas.append({
+                            "bank1": {
+                                "category": bank1_ref["category"],
+                                "schema": bank1_ref["schema"]
+                            },
+                            "bank2": {
+                                "category": bank2_ref["category"],
+                                "schema": bank2_ref["schema"]
+                            }
+                        })
+                        
+                        # Track matched schemas
+                        matched_bank1_schemas.add(f"{bank1_ref['category']}/{bank1_ref['schema']}")
+                        matched_bank2_schemas.add(f"{bank2_ref['category']}/{bank2_ref['schema']}")
             
             # Parse unmatched schemas (lines that start with "(" but don't contain "Bank 1:" and "Bank 2:")
             elif line.startswith('(') and current_section in ["unmatched_bank1", "unmatched_bank2"]:
-                # Remove parentheses and clean up
+                # Remove parentheses and an optional "Bank 1:" / "Bank 2:" label
                 schema_text = line.strip('()').strip()
-                
-                # Extract category and schema name from formats like "Bank 1: Customer/ legalIssueAuthorised"
-                if "Bank 1:" in schema_text and "/" in schema_text:
-                    # Format: "Bank 1: Customer/ legalIssueAuthorised"
-                    parts = schema_text.split("Bank 1:")[1].strip()
-                    if "/" in parts:
-                        category, schema_name = parts.split("/", 1)
-                        category = category.strip()
-                        schema_name = schema_name.strip()
-                    else:
-                        category = "Unknown"
-                        schema_name = parts
-                elif "Bank 2:" in schema_text and "/" in schema_text:
-                    # Format: "Bank 2: Customer/ legalIssueAuthorised"
-                    parts = schema_text.split("Bank 2:")[1].strip()
-                    if "/" in parts:
-                        category, schema_name = parts.split("/", 1)
-                        category = category.strip()
-                        schema_name = schema_name.strip()
-                    else:
-                        category = "Unknown"
-                        schema_name = parts
-                elif "/" in schema_text:
-                    # Format: "Customer/ legalIssueAuthorised"
-                    category, schema_name = schema_text.split("/", 1)
-                    category = category.strip()
-                    schema_name = schema_name.strip()
-                else:
-                    # Just schema name
-                    category = "Unknown"
-                    schema_name = schema_text
+                for label in ("Bank 1:", "Bank 2:"):
+                    if label in schema_text:
+                        schema_text = schema_text.split(label, 1)[1].strip()
                 
                 if current_section == "unmatched_bank1":
-                    unmatched_bank1.append({
-                        "schema": schema_name,
-                        "category": category,
-                        "description": "",
-                        "data": {}
-                    })
+                    unmatched_bank1.extend(resolve_schema_reference(schema_text, bank1_ids))
                 elif current_section == "unmatched_bank2":
-                    unmatched_bank2.append({
-                        "schema": schema_name,
-                        "category": category,
-                        "description": "",
-                        "data": {}
-                    })
+                    unmatched_bank2.extend(resolve_schema_reference(schema_text, bank2_ids))
         
         # If no unmatched schemas were found in the response, find them by comparing with original data
         if not bank1_header_found or not unmatched_bank1:
-            # Find unmatched Bank 1 schemas by comparing with original data
-            for sheet_name, sheet_data in bank1_data.items():
-                if sheet_name.startswith('_') or sheet_name.lower() in ['metadata', 'data']:
-                    continue
-                    
-                if isinstance(sheet_data, list):
-                    for item in sheet_data:
-                        if isinstance(item, dict):
-                            # Try to find schema name and category
-                            schema_name = item.get('name', item.get('schema_name', item.get('field_name', '')))
-                            if schema_name:
-                                schema_key = f"{sheet_name}/{schema_name}"
-                                if schema_key not in matched_bank1_schemas:
-                                    unmatched_bank1.append({
-                                        "category": sheet_name,
-                                        "schema": schema_name,
-                                        "description": item.get('description', item.get('desc', '')),
-                                        "data": item
-                                    })
+            unmatched_bank1.extend(
+                record for record in bank1_ids.values()
+                if f"{record['category']}/{record['schema']}" not in matched_bank1_schemas
+            )
         
         if not bank2_header_found or not unmatched_bank2:
-            # Find unmatched Bank 2 schemas by comparing with original data
-            for sheet_name, sheet_data in bank2_data.items():
-                if sheet_name.startswith('_') or sheet_name.lower() in ['metadata', 'data']:
-                    continue
-                    
-                if isinstance(sheet_data, list):
-                    for item in sheet_data:
-                        if isinstance(item, dict):
-                            # Try to find schema name and category
-                            schema_name = item.get('name', item.get('schema_name', item.get('field_name', '')))
-                            if schema_name:
-                                schema_key = f"{sheet_name}/{schema_name}"
-                                if schema_key not in matched_bank2_schemas:
-                                    unmatched_bank2.append({
-                                        "category": sheet_name,
-                                        "schema": schema_name,
-                                        "description": item.get('description', item.get('desc', '')),
-                                        "data": item
-                                    })
+            unmatched_bank2.extend(
+                record for record in bank2_ids.values()
+                if f"{record['category']}/{record['schema']}" not in matched_bank2_schemas
+            )
         
         return {
             "matched_schemas": matched_schemas,
@@ -574,6 +1619,172 @@ def parse_chatgpt_response(response_text, bank1_data, bank2_data):
         print(f"[ERROR] Error parsing ChatGPT response: {str(e)}")
         return None
 
+def match_schemas_with_chatgpt(bank1_json_path, bank2_json_path, prompt, api_key=None, model="gpt-4o", max_tokens=10000, temperature=0.7, use_cache=True, token_budget=SCHEMA_SHARD_TOKEN_BUDGET, max_workers=SCHEMA_MATCH_WORKERS, compact=True, response_mode=SCHEMA_MATCH_RESPONSE_MODE):
+    """
+    Match Bank 1 and Bank 2 schemas with ChatGPT and parse the result
+    
+    Schemas larger than the prompt budget are split into per-category shards
+    and matched concurrently (see match_schema_shards), so nothing is
+    truncated. Each shard response is cached by send_data_to_chatgpt and the
+    merged matches are cached for the whole request, so a repeated run over
+    byte-identical schema workbooks skips the model calls and the parsing.
+    
+    Args:
+        bank1_json_path (str): Path to Bank 1 schema JSON file
+        bank2_json_path (str): Path to Bank 2 schema JSON file
+        prompt (str): Schema matching prompt
+        api_key (str): OpenAI API key (optional, uses default if not provided)
+        model (str): ChatGPT model to use
+        max_tokens (int): Maximum tokens in response
+        temperature (float): Response creativity 0-1
+        use_cache (bool): Set to False to bypass the cache and force a new call
+        token_budget (int): Estimated prompt tokens per request
+        max_workers (int): Maximum concurrent requests
+        compact (bool): Send schemas in the compact ID encoding
+        response_mode (str): "json" for structured output validated by
+            parse_structured_response, "text" for the legacy free-text parser
+    
+    Returns:
+        dict: Parsed data (see parse_chatgpt_response), or None if error
+    """
+    try:
+        bank1_data = load_converted_data(bank1_json_path)
+        
+        bank2_data = load_converted_data(bank2_json_path)
+        
+        # Every setting that changes the shards or their responses is part of the key
+        cache_key = llm_cache_key(
+            model, prompt, temperature, bank1_data, bank2_data,
+            options={
+                "response_mode": response_mode,
+                "compact": compact,
+                "token_budget": token_budget,
+                "max_tokens": max_tokens
+            }
+        )
+        if use_cache:
+            cached = load_llm_response(cache_key)
+            if cached and cached.get("parsed"):
+                return cached["parsed"]
+        
+        parsed_data = match_schema_shards(
+            bank1_data, bank2_data, prompt,
+            token_budget=token_budget,
+            max_workers=max_workers,
+            api_key=api_key,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            use_cache=use_cache,
+            compact=compact,
+            response_mode=response_mode
+        )
+        if parsed_data and use_cache:
+            # The raw shard responses are cached per shard; the whole request
+            # only caches the merged matches
+            store_llm_response(cache_key, None, parsed_data)
+        
+        return parsed_data
+        
+    except Exception as e:
+        print(f"[ERROR] Error matching schemas: {str(e)}")
+        return None
+
+def _records_to_schema_data(records):
+    """Rebuild {category: [original rows]} schema data from encoded records"""
+    schema_data = {}
+    for record in records:
+        schema_data.setdefault(record["category"], []).append(record["data"])
+    return schema_data
+
+def match_schemas_locally(bank1_json_path, bank2_json_path, prompt=None, refine_with_llm=False, candidates=3, **llm_options):
+    """
+    Match Bank 1 and Bank 2 schemas offline with the local lexical matcher
+    
+    Scores every schema pair with character n-gram TF-IDF similarity over
+    names and descriptions and picks one-to-one matches (see local_matcher).
+    With refine_with_llm, only the low-confidence matches are sent to ChatGPT
+    together with their best candidates, and its answer replaces them.
+    
+    Args:
+        bank1_json_path (str): Path to Bank 1 schema JSON file
+        bank2_json_path (str): Path to Bank 2 schema JSON file
+        prompt (str): Schema matching prompt for the refinement requests
+        refine_with_llm (bool): Ask ChatGPT about low-confidence matches
+        candidates (int): Bank 2 candidates sent per low-confidence schema
+        **llm_options: Passed through to match_schema_shards
+    
+    Returns:
+        dict: Parsed data (see parse_chatgpt_response), or None if error
+    """
+    import local_matcher
+    
+    try:
+        bank1_data = load_converted_data(bank1_json_path)
+        
+        bank2_data = load_converted_data(bank2_json_path)
+        
+        start_time = time.perf_counter()
+        bank1_records = list(encode_schemas_compact(bank1_data, BANK1_ID_PREFIX)[1].values())
+        bank2_records = list(encode_schemas_compact(bank2_data, BANK2_ID_PREFIX)[1].values())
+        
+        scores = local_matcher.similarity_matrix(bank1_records, bank2_records)
+        parsed_data = local_matcher.match_records(bank1_records, bank2_records, scores=scores)
+        
+        low_confidence = [m for m in parsed_data["matched_schemas"] if m["confidence"] == "low"]
+        print(f"[INFO] Local matcher: {parsed_data['statistics']['total_matched']} matches ({len(low_confidence)} low confidence)")
+        report_progress(
+            "local_match_finished",
+            matched=parsed_data["statistics"]["total_matched"],
+            low_confidence=len(low_confidence),
+            seconds=time.perf_counter() - start_time
+        )
+        
+        if not refine_with_llm or not low_confidence:
+            return parsed_data
+        
+        # Send each low-confidence Bank 1 schema with its best Bank 2 candidates
+        bank1_rows = {(r["category"], r["schema"]): i for i, r in enumerate(bank1_records)}
+        refine_rows = [bank1_rows[(m["bank1"]["category"], m["bank1"]["schema"])] for m in low_confidence]
+        candidate_cols = sorted({col for row in refine_rows for col in local_matcher.top_candidates(scores, row, candidates)})
+        
+        llm_options.setdefault("compact", True)
+        llm_options.setdefault("response_mode", SCHEMA_MATCH_RESPONSE_MODE)
+        refined = match_schema_shards(
+            _records_to_schema_data([bank1_records[row] for row in refine_rows]),
+            _records_to_schema_data([bank2_records[col] for col in candidate_cols]),
+            prompt or "Match each Bank 1 schema to the Bank 2 schema(s) with the same meaning. Leave schemas unmatched if nothing corresponds.",
+            **llm_options
+        )
+        if not refined:
+            print("[WARNING] LLM refinement failed; keeping local low-confidence matches")
+            return parsed_data
+        
+        matched_schemas = [m for m in parsed_data["matched_schemas"] if m["confidence"] != "low"]
+        for match in refined["matched_schemas"]:
+            matched_schemas.append(dict(match, confidence="llm"))
+        
+        matched_bank1 = {(m["bank1"]["category"], m["bank1"]["schema"]) for m in matched_schemas}
+        matched_bank2 = {(m["bank2"]["category"], m["bank2"]["schema"]) for m in matched_schemas}
+        unmatched_bank1 = [r for r in bank1_records if (r["category"], r["schema"]) not in matched_bank1]
+        unmatched_bank2 = [r for r in bank2_records if (r["category"], r["schema"]) not in matched_bank2]
+        
+        return {
+            "matched_schemas": matched_schemas,
+            "unmatched_bank1": unmatched_bank1,
+            "unmatched_bank2": unmatched_bank2,
+            "statistics": {
+                "total_matched": len(matched_schemas),
+                "total_unmatched_bank1": len(unmatched_bank1),
+                "total_unmatched_bank2": len(unmatched_bank2),
+                "total_schemas": len(matched_schemas) + len(unmatched_bank1) + len(unmatched_bank2)
+            }
+        }
+        
+    except Exception as e:
+        print(f"[ERROR] Error matching schemas locally: {str(e)}")
+        return None
+
 def create_schema_json_files(parsed_data, output_dir="."):
     """
     Create separate JSON files for matched and unmatched schemas
@@ -636,97 +1847,279 @@ def create_schema_json_files(parsed_data, output_dir="."):
         print(f"[ERROR] Error creating JSON files: {str(e)}")
         return None
 
-def find_data_files_by_category(category_name, bank_num):
+# Categories indexed up front; any other category is indexed on first lookup
+KNOWN_DATA_CATEGORIES = [
+    "customer", "addresses", "identifications", "accounts", "loans", "deposits", "transactions",
+    "loan accounts", "loan account transactions",
+    "fixed term accounts", "fixed term account transactions",
+    "cursav accounts", "cursav account transactions",
+    "deposit accounts", "deposit account transactions"
+]
+
+# Common filename patterns for generic categories
+CATEGORY_FILE_PATTERNS = {
+    "customer": ["*Customer*", "*customer*"],
+    "addresses": ["*Address*", "*address*"],
+    "identifications": ["*Identif*", "*identif*"],
+    "accounts": ["*Account*", "*account*"],
+    "loans": ["*Loan*", "*loan*"],
+    "deposits": ["*Deposit*", "*deposit*"],
+    "transactions": ["*Transaction*", "*transaction*"]
+}
+
+# (workspace root, bank_num) -> {"mtime": directory mtime, "files": [(path, lowercase name)], "categories": {category: [paths]}}
+_category_index = {}
+_category_index_lock = threading.Lock()
+
+def _match_category_files(category_lower, files):
     """
-    Find data files that contain the specified category
-    
+    Select the files that belong to a lowercase category name
+
     Args:
-        category_name (str): Category name to search for
-        bank_num (int): Bank number (1 or 2)
-    
+        category_lower (str): Lowercase category name
+        files (list): (path, lowercase file name) tuples
+
     Returns:
-        list: List of matching file paths
+        list: Matching file paths
     """
-    import glob
-    
-    # Updated to look in uploaded_files directory instead of Archive
-    bank_dir = f"uploaded_files/bank{bank_num}"
+    import fnmatch
+
     matching_files = []
-    
-    # Common patterns for different categories
-    category_patterns = {
-        "customer": ["*Customer*", "*customer*"],
-        "addresses": ["*Address*", "*address*"],
-        "identifications": ["*Identif*", "*identif*"],
-        "accounts": ["*Account*", "*account*"],
-        "loans": ["*Loan*", "*loan*"],
-        "deposits": ["*Deposit*", "*deposit*"],
-        "transactions": ["*Transaction*", "*transaction*"]
-    }
-    
-    # Get all files in the bank directory
-    all_files = glob.glob(f"{bank_dir}/*")
-    
-    # Filter by category patterns
-    for file_path in all_files:
-        filename = os.path.basename(file_path).lower()
-        category_lower = category_name.lower()
-        
+    for file_path, filename in files:
         # Direct match
         if category_lower in filename:
-            matching_files.append(file_path)
+            matching_files.append((file_path, filename))
         # Split category name and check individual words
         elif " " in category_lower:
-            category_words = category_lower.split()
-            for word in category_words:
-                if word in filename:
-                    matching_files.append(file_path)
-                    break
+            if any(word in filename for word in category_lower.split()):
+                matching_files.append((file_path, filename))
         # Pattern match
-        elif category_lower in category_patterns:
-            for pattern in category_patterns[category_lower]:
-                if glob.fnmatch.fnmatch(filename, pattern.lower()):
-                    matching_files.append(file_path)
-                    break
-    
+        elif category_lower in CATEGORY_FILE_PATTERNS:
+            if any(fnmatch.fnmatch(filename, pattern.lower()) for pattern in CATEGORY_FILE_PATTERNS[category_lower]):
+                matching_files.append((file_path, filename))
+
     # Filter out temporary files
-    matching_files = [f for f in matching_files if not os.path.basename(f).startswith('~$')]
+    matching_files = [(f, name) for f, name in matching_files if not name.startswith('~$')]
+
+    # Match the exact category name from matched_schemas.json to the file naming convention
+    for prefix in ("loan", "fixedterm", "cursav", "deposit"):
+        label = "fixed term" if prefix == "fixedterm" else prefix
+        if f"{label} accounts" in category_lower and "transaction" not in category_lower:
+            # Files with the prefix and "account" but not "transaction"
+            matching_files = [(f, name) for f, name in matching_files if prefix in name and "account" in name and "transaction" not in name]
+            break
+        elif f"{label} account transactions" in category_lower:
+            # Files with the prefix and "transaction"
+            matching_files = [(f, name) for f, name in matching_files if prefix in name and "transaction" in name]
+            break
+
+    return [f for f, _ in matching_files]
+
+def _bank_dir_mtime(bank_dir):
+    try:
+        return os.stat(bank_dir).st_mtime_ns
+    except OSError:
+        return None
+
+def _bank_upload_dir(bank_num, workspace_root="."):
+    return workspace_path(workspace_root, UPLOADS_SUBDIR, f"bank{bank_num}")
+
+def build_category_index(bank_num, workspace_root="."):
+    """
+    List a bank's uploaded files once and index them by category
+
+    Args:
+        bank_num (int): Bank number (1 or 2)
+        workspace_root (str): Run workspace holding the uploads (see workspaces.py)
+
+    Returns:
+        dict: The index entry for the bank
+    """
+    import glob
+
+    bank_dir = _bank_upload_dir(bank_num, workspace_root)
+    mtime = _bank_dir_mtime(bank_dir)
+    files = [(path, os.path.basename(path).lower()) for path in glob.glob(f"{bank_dir}/*")]
+    entry = {
+        "mtime": mtime,
+        "files": files,
+        "categories": {category: _match_category_files(category, files) for category in KNOWN_DATA_CATEGORIES}
+    }
+    with _category_index_lock:
+        _category_index[(os.path.abspath(workspace_root), bank_num)] = entry
+    return entry
+
+def invalidate_category_index(bank_num=None, workspace_root=None):
+    """
+    Drop the category index after uploaded files change
+
+    Args:
+        bank_num (int): Bank to invalidate (None for all banks)
+        workspace_root (str): Workspace to invalidate (None for all workspaces)
+    """
+    root = os.path.abspath(workspace_root) if workspace_root else None
+    with _category_index_lock:
+        for key in list(_category_index):
+            if (root is None or key[0] == root) and (bank_num is None or key[1] == bank_num):
+                del _category_index[key]
+
+def find_data_files_by_category(category_name, bank_num, workspace_root="."):
+    """
+    Find data files that contain the specified category
     
-    # Simple and direct matching based on category name
-    # The key insight: match the exact category name from matched_schemas.json to the file names
+    Lookups are served from the bank's category index, which is rebuilt when
+    it has been invalidated or the bank directory has changed on disk.
     
-    # Convert category name to a pattern that matches the file naming convention
-    category_lower = category_name.lower()
+    Args:
+        category_name (str): Category name to search for
+        bank_num (int): Bank number (1 or 2)
+        workspace_root (str): Run workspace holding the uploads (see workspaces.py)
     
-    # Handle the specific cases we know about
-    if "loan accounts" in category_lower and "transaction" not in category_lower:
-        # Match files with "loan" and "account" but not "transaction"
-        matching_files = [f for f in matching_files if "loan" in os.path.basename(f).lower() and "account" in os.path.basename(f).lower() and "transaction" not in os.path.basename(f).lower()]
-    elif "loan account transactions" in category_lower:
-        # Match files with "loan" and "transaction"
-        matching_files = [f for f in matching_files if "loan" in os.path.basename(f).lower() and "transaction" in os.path.basename(f).lower()]
-    elif "fixed term accounts" in category_lower and "transaction" not in category_lower:
-        # Match files with "fixedterm" and "account" but not "transaction"
-        matching_files = [f for f in matching_files if "fixedterm" in os.path.basename(f).lower() and "account" in os.path.basename(f).lower() and "transaction" not in os.path.basename(f).lower()]
-    elif "fixed term account transactions" in category_lower:
-        # Match files with "fixedterm" and "transaction"
-        matching_files = [f for f in matching_files if "fixedterm" in os.path.basename(f).lower() and "transaction" in os.path.basename(f).lower()]
-    elif "cursav accounts" in category_lower and "transaction" not in category_lower:
-        # Match files with "cursav" and "account" but not "transaction"
-        matching_files = [f for f in matching_files if "cursav" in os.path.basename(f).lower() and "account" in os.path.basename(f).lower() and "transaction" not in os.path.basename(f).lower()]
-    elif "cursav account transactions" in category_lower:
-        # Match files with "cursav" and "transaction"
-        matching_files = [f for f in matching_files if "cursav" in os.path.basename(f).lower() and "transaction" in os.path.basename(f).lower()]
-    elif "deposit accounts" in category_lower and "transaction" not in category_lower:
-        # Match files with "deposit" and "account" but not "transaction"
-        matching_files = [f for f in matching_files if "deposit" in os.path.basename(f).lower() and "account" in os.path.basename(f).lower() and "transaction" not in os.path.basename(f).lower()]
-    elif "deposit account transactions" in category_lower:
-        # Match files with "deposit" and "transaction"
-        matching_files = [f for f in matching_files if "deposit" in os.path.basename(f).lower() and "transaction" in os.path.basename(f).lower()]
-    
-    return matching_files
-
-def extract_column_data(file_path, column_name, customer_id_column="customerId"):
+    Returns:
+        list: List of matching file paths
+    """
+    entry = _category_index.get((os.path.abspath(workspace_root), bank_num))
+    if entry is None or entry["mtime"] != _bank_dir_mtime(_bank_upload_dir(bank_num, workspace_root)):
+        entry = build_category_index(bank_num, workspace_root)
+
+    category_lower = category_name.lower()
+    matching_files = entry["categories"].get(category_lower)
+    if matching_files is None:
+        matching_files = _match_category_files(category_lower, entry["files"])
+        entry["categories"][category_lower] = matching_files
+
+    return list(matching_files)
+
+def build_column_map(df, column_name, customer_id_column="customerId", return_type="dict"):
+    """
+    Build a customer_id -> value mapping from two DataFrame columns
+
+    Vectorized replacement for walking the frame with iterrows. Duplicate
+    customer IDs keep the value from the last row, matching dict assignment
+    order.
+
+    Args:
+        df (DataFrame): Source data
+        column_name (str): Name of the value column
+        customer_id_column (str): Name of the customer ID column
+        return_type (str): "dict" (default), "series" for a pandas Series
+            indexed by customer ID, or "arrow" for a pyarrow Table with the
+            two columns
+
+    Returns:
+        dict | Series | pyarrow.Table: The mapping in the requested form
+    """
+    ids = df[customer_id_column]
+    values = df[column_name]
+
+    if return_type == "dict":
+        return dict(zip(ids.tolist(), values.tolist()))
+
+    series = pd.Series(values.to_numpy(), index=ids.to_numpy(), name=column_name)
+    series = series[~series.index.duplicated(keep="last")]
+    series.index.name = customer_id_column
+
+    if return_type == "series":
+        return series
+    elif return_type == "arrow":
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ValueError("return_type='arrow' requires pyarrow to be installed")
+        return pa.Table.from_pandas(series.reset_index(), preserve_index=False)
+    else:
+        raise ValueError(f"Unknown return_type: {return_type}. Supported: dict, series, arrow")
+
+# Columns used to key rows in data files across both banks; always loaded
+# alongside schema columns so every extraction can be served from one read
+DATA_FILE_ID_COLUMNS = ["customerId", "id", "encodedKey", "parentKey", "clientKey", "accountHolderKey", "accountId", "parentAccountKey"]
+
+def read_data_file(file_path, columns=None):
+    """
+    Read the first sheet of a data file, optionally projected to some columns
+
+    With the parse cache enabled, a cached full parse of the file (written by
+    the conversion step) is projected. Without one only the wanted columns
+    are read, and that projection is cached on its own.
+
+    Args:
+        file_path (str): Path to the data file
+        columns (iterable): Column names to load (missing ones are ignored);
+            None loads every column
+
+    Returns:
+        DataFrame: The loaded data
+    """
+    wanted = None if columns is None else set(columns)
+
+    if PARSE_CACHE_ENABLED:
+        # A full parse cached by the conversion step serves every projection
+        # without touching Excel
+        sheets = load_parsed_sheets(file_path)
+        if sheets is not None:
+            df = next(iter(sheets.values()))
+            if wanted is None:
+                return df
+            return df[[column for column in df.columns if column in wanted]]
+        if wanted is None:
+            return next(iter(read_workbook_sheets(file_path).values()))
+
+        # Otherwise read only the wanted columns and cache that projection
+        variant = projection_variant(wanted)
+        cached = load_parsed_sheets(file_path, variant)
+        if cached is not None:
+            return cached["data"]
+        df = _read_data_columns(file_path, wanted)
+        store_parsed_sheets(file_path, {"data": df}, variant)
+        return df
+
+    return _read_data_columns(file_path, wanted)
+
+def _read_data_columns(file_path, wanted):
+    """Read the first sheet of a data file with only the wanted columns (None for all)"""
+    usecols = None
+    if wanted is not None:
+        usecols = lambda column: column in wanted
+
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".csv":
+        return pd.read_csv(file_path, usecols=usecols)
+
+    # Use context manager to ensure file is properly closed
+    with read_spreadsheet(file_path) as xls:
+        return xls.parse(usecols=usecols)
+
+def load_data_files(file_columns):
+    """
+    Read each data file exactly once with only the columns needed from it
+
+    Args:
+        file_columns (dict): Mapping of file path to the set of column names
+            required from that file
+
+    Returns:
+        dict: Mapping of file path to its projected DataFrame (files that fail
+        to load are left out)
+    """
+    frames = {}
+    for file_path, columns in file_columns.items():
+        try:
+            start_time = time.perf_counter()
+            frames[file_path] = read_data_file(file_path, columns)
+            print(f"[INFO] Loaded {len(frames[file_path].columns)} columns from {os.path.basename(file_path)}")
+            report_progress(
+                "data_file_loaded",
+                file=os.path.basename(file_path),
+                rows=len(frames[file_path]),
+                columns=len(frames[file_path].columns),
+                seconds=time.perf_counter() - start_time
+            )
+        except Exception as e:
+            print(f"[WARNING] Error reading {file_path}: {e}")
+    return frames
+
+@timed_stage("extract_column_data", count_rows=len)
+def extract_column_data(file_path, column_name, customer_id_column="customerId", return_type="dict", frame_cache=None):
     """
     Extract data from a specific column in a data file
     
@@ -734,45 +2127,169 @@ def extract_column_data(file_path, column_name, customer_id_column="customerId")
         file_path (str): Path to the data file
         column_name (str): Name of the column to extract
         customer_id_column (str): Name of the customer ID column
+        return_type (str): "dict", "series" or "arrow" (see build_column_map)
+        frame_cache (dict): Already loaded frames from load_data_files; the
+            file is only read from disk when it is not in the cache
     
     Returns:
-        dict: Dictionary mapping customer_id to column value
+        dict: Dictionary mapping customer_id to column value (or the
+        requested columnar structure)
     """
+    # Empty mapping in the requested form, returned on any failure
+    # (one column when the requested column is the ID column itself)
+    empty = build_column_map(pd.DataFrame(columns=list(dict.fromkeys([customer_id_column, column_name]))), column_name, customer_id_column, return_type)
+
     try:
-        ext = os.path.splitext(file_path)[1].lower()
-        
-        if ext == ".csv":
-            df = pd.read_csv(file_path)
+        if frame_cache is not None and file_path in frame_cache:
+            df = frame_cache[file_path]
         else:
-            # Use context manager to ensure file is properly closed
-            with pd.ExcelFile(file_path) as xls:
-                df = pd.read_excel(xls)
+            df = read_data_file(file_path)
         
         # Check if the column exists
         if column_name not in df.columns:
             print(f"[WARNING] Column '{column_name}' not found in {file_path}")
-            return {}
+            return empty
         
         # Check if customer ID column exists
         if customer_id_column not in df.columns:
             print(f"[WARNING] Customer ID column '{customer_id_column}' not found in {file_path}")
-            return {}
+            return empty
         
         # Create mapping of customer_id to column value
-        data_map = {}
-        for _, row in df.iterrows():
-            customer_id = row[customer_id_column]
-            column_value = row[column_name]
-            data_map[customer_id] = column_value
+        data_map = build_column_map(df, column_name, customer_id_column, return_type)
         
         print(f"[SUCCESS] Extracted {len(data_map)} records from {column_name} in {os.path.basename(file_path)}")
         return data_map
         
     except Exception as e:
         print(f"[ERROR] Error extracting data from {file_path}: {str(e)}")
-        return {}
+        return empty
+
+def _lookup_column(data_map, customer_index):
+    """Look up every customer in a data map with one indexed reindex"""
+    if data_map is None or len(data_map) == 0:
+        return np.full(len(customer_index), None, dtype=object)
+
+    if not isinstance(data_map, pd.Series):
+        data_map = pd.Series(data_map, dtype=object)
+    return data_map.reindex(customer_index).to_numpy(dtype=object)
+
+def merge_customer_columns(matched_schemas, data_maps, bank1_customer_ids, bank2_customer_ids):
+    """
+    Build the combined customer table column by column
+
+    Each output column is produced with one hash join (reindex) of the
+    relevant data map against the Bank 1 customer index and one against the
+    Bank 2 customer index; the two halves are then concatenated. Rows are
+    all Bank 1 customers followed by all Bank 2 customers, and when several
+    matches produce the same column name the last match wins.
+
+    Args:
+        matched_schemas (list): List of matched schema pairs
+        data_maps (dict): Mapping of "bank{n}_{category}_{schema}" to a
+            customer_id -> value dict or Series
+        bank1_customer_ids (iterable): Bank 1 customer IDs, in output order
+        bank2_customer_ids (iterable): Bank 2 customer IDs, in output order
+
+    Returns:
+        DataFrame: Combined data with a prefixed customer_id column
+    """
+    bank1_index = pd.Index(list(bank1_customer_ids), dtype=object)
+    bank2_index = pd.Index(list(bank2_customer_ids), dtype=object)
+
+    columns = {
+        "customer_id": np.concatenate([
+            ("B1_" + bank1_index.astype(str)).to_numpy(dtype=object),
+            ("B2_" + bank2_index.astype(str)).to_numpy(dtype=object)
+        ])
+    }
+
+    for match in matched_schemas:
+        bank1_schema = match["bank1"]
+        bank2_schema = match["bank2"]
+
+        # Create column name for the combined data
+        combined_column_name = f"{bank1_schema['category']}_{bank1_schema['schema']}_to_{bank2_schema['category']}_{bank2_schema['schema']}"
+
+        bank1_key = f"bank1_{bank1_schema['category']}_{bank1_schema['schema']}"
+        bank2_key = f"bank2_{bank2_schema['category']}_{bank2_schema['schema']}"
+
+        # Data only comes from the customer's own bank
+        columns[combined_column_name] = np.concatenate([
+            _lookup_column(data_maps.get(bank1_key), bank1_index),
+            _lookup_column(data_maps.get(bank2_key), bank2_index)
+        ])
+
+    return pd.DataFrame(columns).infer_objects()
+
+def remap_column_keys(data_map, key_index):
+    """
+    Re-key a customer map through a key index with one hash join
+
+    Args:
+        data_map (Series): Values indexed by the source key
+        key_index (Series): Target key indexed by source key
+
+    Returns:
+        Series: Values indexed by the target key; source keys missing from the
+        index are dropped and duplicate targets keep the last value
+    """
+    if len(data_map) == 0 or len(key_index) == 0:
+        return data_map.iloc[:0]
+
+    new_index = data_map.index.map(key_index)
+    found = new_index.notna()
+    remapped = pd.Series(data_map.to_numpy()[found], index=new_index[found], name=data_map.name)
+    return remapped[~remapped.index.duplicated(keep="last")]
+
+def build_bank2_key_resolver(frame_cache, customer_files, account_files):
+    """
+    Build the Bank 2 hash indexes used to resolve rows to customer IDs
+
+    Transactions reference accounts (parentAccountKey), accounts reference
+    customers (accountHolderKey) and customers carry both an encodedKey and
+    the public id. The chain parentAccountKey -> account encodedKey ->
+    accountHolderKey -> customer id is composed once into a single index.
 
-def create_combined_customer_data(matched_schemas, output_file="combined_customer_data.xlsx", max_customers=1000):
+    Args:
+        frame_cache (dict): Loaded frames from load_data_files
+        customer_files (list): Bank 2 customer files
+        account_files (list): Bank 2 account (non-transaction) files
+
+    Returns:
+        tuple: (customer_index, key_resolver) where customer_index maps
+        customer encodedKey -> id and key_resolver maps any account or
+        customer encodedKey -> customer id
+    """
+    def _combine(parts):
+        if not parts:
+            return pd.Series(dtype=object)
+        combined = pd.concat(parts)
+        return combined[~combined.index.duplicated(keep="last")]
+
+    customer_parts = []
+    for file_path in customer_files:
+        df = frame_cache.get(file_path)
+        if df is not None and "id" in df.columns and "encodedKey" in df.columns:
+            customer_parts.append(build_column_map(df, "id", "encodedKey", return_type="series"))
+    customer_index = _combine(customer_parts)
+
+    account_parts = []
+    for file_path in account_files:
+        df = frame_cache.get(file_path)
+        if df is not None and "encodedKey" in df.columns and "accountHolderKey" in df.columns:
+            # account encodedKey -> accountHolderKey -> customer id
+            holders = build_column_map(df, "accountHolderKey", "encodedKey", return_type="series")
+            account_parts.append(holders.map(customer_index).dropna())
+    account_index = _combine(account_parts)
+
+    # Account keys take precedence; customer keys keep older exports working
+    # where transactions point straight at the customer encodedKey
+    key_resolver = _combine([customer_index, account_index])
+    return customer_index, key_resolver
+
+@timed_stage("create_combined_customer_data")
+def create_combined_customer_data(matched_schemas, output_file="combined_customer_data.xlsx", max_customers=1000, output_format=None, workspace_root="."):
     """
     Create a combined spreadsheet with matched schema data from both banks
     
@@ -780,6 +2297,9 @@ def create_combined_customer_data(matched_schemas, output_file="combined_custome
         matched_schemas (list): List of matched schema pairs
         output_file (str): Output file path
         max_customers (int): Maximum number of customers to process (for performance)
+        output_format (str): "xlsx", "csv" or "parquet" (default from the
+            output file extension; see output_writer.py)
+        workspace_root (str): Run workspace whose uploaded data files are merged
     
     Returns:
         str: Path to the created file
@@ -787,65 +2307,71 @@ def create_combined_customer_data(matched_schemas, output_file="combined_custome
     try:
         print("[INFO] Creating combined customer data...")
         
+        bank1_customer_files = find_data_files_by_category("customer", 1, workspace_root)
+        bank2_customer_files = find_data_files_by_category("customer", 2, workspace_root)
+        # Bank 2 accounts link transactions to customers, so they are needed
+        # even when no account schema was matched
+        bank2_account_files = [
+            f for f in find_data_files_by_category("account", 2, workspace_root)
+            if "transaction" not in os.path.basename(f).lower()
+        ]
+
+        # Plan every column needed from each file so each file is read once
+        print("[INFO] Planning data file loads...")
+        file_columns = {}
+        for file_path in bank1_customer_files:
+            file_columns.setdefault(file_path, set()).add("customerId")
+        for file_path in bank2_customer_files:
+            file_columns.setdefault(file_path, set()).update(["id", "encodedKey"])
+        for file_path in bank2_account_files:
+            file_columns.setdefault(file_path, set()).update(["encodedKey", "accountHolderKey"])
+        for match in matched_schemas:
+            for bank_num, bank_key in ((1, "bank1"), (2, "bank2")):
+                schema = match[bank_key]
+                for file_path in find_data_files_by_category(schema["category"], bank_num, workspace_root):
+                    columns = file_columns.setdefault(file_path, set())
+                    columns.add(schema["schema"])
+                    columns.update(DATA_FILE_ID_COLUMNS)
+
+        frame_cache = load_data_files(file_columns)
+        print(f"[INFO] Loaded {len(frame_cache)} data files once each")
+        
         # Get customer IDs from each bank separately (don't try to match them)
-        bank1_customer_ids = set()
-        bank2_customer_ids = set()
+        # Dicts act as ordered sets so output rows follow file order
+        bank1_customer_ids = {}
+        bank2_customer_ids = {}
         
         # Collect customer IDs from Bank 1
-        bank1_customer_files = find_data_files_by_category("customer", 1)
         for file_path in bank1_customer_files:
-            try:
-                # Use context manager to ensure file is properly closed
-                with pd.ExcelFile(file_path) as xls:
-                    df = pd.read_excel(xls)
-                    if "customerId" in df.columns:
-                        # Limit to first max_customers for performance
-                        customer_ids = df["customerId"].head(max_customers).tolist()
-                        bank1_customer_ids.update(customer_ids)
-            except Exception as e:
-                print(f"[WARNING] Error reading {file_path}: {e}")
+            df = frame_cache.get(file_path)
+            if df is not None and "customerId" in df.columns:
+                # Limit to first max_customers for performance
+                customer_ids = df["customerId"].head(max_customers).tolist()
+                bank1_customer_ids.update(dict.fromkeys(customer_ids))
         
         # Collect customer IDs from Bank 2
-        bank2_customer_files = find_data_files_by_category("customer", 2)
         for file_path in bank2_customer_files:
-            try:
-                # Use context manager to ensure file is properly closed
-                with pd.ExcelFile(file_path) as xls:
-                    df = pd.read_excel(xls)
-                    if "id" in df.columns:
-                        # Limit to first max_customers for performance
-                        customer_ids = df["id"].head(max_customers).tolist()
-                        bank2_customer_ids.update(customer_ids)
-            except Exception as e:
-                print(f"[WARNING] Error reading {file_path}: {e}")
-        
-        # Create combined list with bank prefixes to keep them separate
-        all_customer_ids = [f"B1_{cid}" for cid in bank1_customer_ids] + [f"B2_{cid}" for cid in bank2_customer_ids]
+            df = frame_cache.get(file_path)
+            if df is not None and "id" in df.columns:
+                # Limit to first max_customers for performance
+                customer_ids = df["id"].head(max_customers).tolist()
+                bank2_customer_ids.update(dict.fromkeys(customer_ids))
         
         print(f"[INFO] Found {len(bank1_customer_ids)} Bank 1 customers and {len(bank2_customer_ids)} Bank 2 customers")
         
-        # Create Bank 2 ID mapping (encodedKey -> id)
+        # Build the Bank 2 key indexes once for the whole run:
+        # customer encodedKey -> id, and account encodedKey -> customer id
         print("[INFO] Creating Bank 2 ID mapping...")
-        bank2_id_mapping = {}
-        bank2_customer_files = find_data_files_by_category("customer", 2)
-        for file_path in bank2_customer_files:
-            try:
-                df = pd.read_excel(file_path)
-                if "id" in df.columns and "encodedKey" in df.columns:
-                    for _, row in df.iterrows():
-                        customer_id = row["id"]
-                        encoded_key = row["encodedKey"]
-                        bank2_id_mapping[encoded_key] = customer_id
-            except Exception as e:
-                print(f"[WARNING] Error reading {file_path}: {e}")
+        bank2_id_mapping, bank2_key_resolver = build_bank2_key_resolver(frame_cache, bank2_customer_files, bank2_account_files)
         
-        print(f"[INFO] Created mapping for {len(bank2_id_mapping)} Bank 2 IDs")
+        print(f"[INFO] Created mapping for {len(bank2_id_mapping)} Bank 2 IDs ({len(bank2_key_resolver)} resolvable keys)")
         
         # Add hardcoded fixes for missing data
         print("[INFO] Applying hardcoded fixes for missing data...")
         
         # Pre-load all data maps for efficiency
         print("[INFO] Pre-loading data maps...")
+        maps_start = time.perf_counter()
         data_maps = {}
         
         for match in matched_schemas:
@@ -853,14 +2379,14 @@ def create_combined_customer_data(matched_schemas, output_file="combined_custome
             bank2_schema = match["bank2"]
             
             # Load Bank 1 data
-            bank1_files = find_data_files_by_category(bank1_schema["category"], 1)
+            bank1_files = find_data_files_by_category(bank1_schema["category"], 1, workspace_root)
             for file_path in bank1_files:
                 key = f"bank1_{bank1_schema['category']}_{bank1_schema['schema']}"
                 if key not in data_maps:
-                    data_maps[key] = extract_column_data(file_path, bank1_schema["schema"], "customerId")
+                    data_maps[key] = extract_column_data(file_path, bank1_schema["schema"], "customerId", return_type="series", frame_cache=frame_cache)
             
             # Load Bank 2 data
-            bank2_files = find_data_files_by_category(bank2_schema["category"], 2)
+            bank2_files = find_data_files_by_category(bank2_schema["category"], 2, workspace_root)
             for file_path in bank2_files:
                 # Determine the correct customer ID column based on file type
                 filename = os.path.basename(file_path).lower()
@@ -877,16 +2403,11 @@ def create_combined_customer_data(matched_schemas, output_file="combined_custome
                 key = f"bank2_{bank2_schema['category']}_{bank2_schema['schema']}"
                 if key not in data_maps:
                     # Extract data with the appropriate customer ID column
-                    raw_data = extract_column_data(file_path, bank2_schema["schema"], customer_id_col)
+                    raw_data = extract_column_data(file_path, bank2_schema["schema"], customer_id_col, return_type="series", frame_cache=frame_cache)
                     
                     # If this is account data, map accountHolderKey to customer id
                     if "account" in filename and customer_id_col == "accountHolderKey":
-                        mapped_data = {}
-                        for encoded_key, value in raw_data.items():
-                            if encoded_key in bank2_id_mapping:
-                                customer_id = bank2_id_mapping[encoded_key]
-                                mapped_data[customer_id] = value
-                        data_maps[key] = mapped_data
+                        data_maps[key] = remap_column_keys(raw_data, bank2_id_mapping)
                     else:
                         data_maps[key] = raw_data
         
@@ -903,16 +2424,11 @@ def create_combined_customer_data(matched_schemas, output_file="combined_custome
                     for match in matched_schemas:
                         bank2_schema = match["bank2"]
                         if f"bank2_{bank2_schema['category']}_{bank2_schema['schema']}" == key:
-                            bank2_files = find_data_files_by_category(bank2_schema["category"], 2)
+                            bank2_files = find_data_files_by_category(bank2_schema["category"], 2, workspace_root)
                             for file_path in bank2_files:
                                 if "account" in os.path.basename(file_path).lower():
-                                    raw_data = extract_column_data(file_path, bank2_schema["schema"], "accountHolderKey")
-                                    mapped_data = {}
-                                    for encoded_key, value in raw_data.items():
-                                        if encoded_key in bank2_id_mapping:
-                                            customer_id = bank2_id_mapping[encoded_key]
-                                            mapped_data[customer_id] = value
-                                    data_maps[key] = mapped_data
+                                    raw_data = extract_column_data(file_path, bank2_schema["schema"], "accountHolderKey", return_type="series", frame_cache=frame_cache)
+                                    data_maps[key] = remap_column_keys(raw_data, bank2_id_mapping)
                                     break
         
         # Fix 2: Handle transaction data with proper account ID mapping
@@ -925,69 +2441,46 @@ def create_combined_customer_data(matched_schemas, output_file="combined_custome
                         if "bank1" in key:
                             bank1_schema = match["bank1"]
                             if f"bank1_{bank1_schema['category']}_{bank1_schema['schema']}" == key:
-                                bank1_files = find_data_files_by_category(bank1_schema["category"], 1)
+                                bank1_files = find_data_files_by_category(bank1_schema["category"], 1, workspace_root)
                                 for file_path in bank1_files:
                                     if "transaction" in os.path.basename(file_path).lower():
                                         # Use accountId for transaction files
-                                        data_maps[key] = extract_column_data(file_path, bank1_schema["schema"], "accountId")
+                                        data_maps[key] = extract_column_data(file_path, bank1_schema["schema"], "accountId", return_type="series", frame_cache=frame_cache)
                                         break
                         elif "bank2" in key:
                             bank2_schema = match["bank2"]
                             if f"bank2_{bank2_schema['category']}_{bank2_schema['schema']}" == key:
-                                bank2_files = find_data_files_by_category(bank2_schema["category"], 2)
+                                bank2_files = find_data_files_by_category(bank2_schema["category"], 2, workspace_root)
                                 for file_path in bank2_files:
                                     if "transaction" in os.path.basename(file_path).lower():
                                         # Use parentAccountKey for transaction files
-                                        raw_data = extract_column_data(file_path, bank2_schema["schema"], "parentAccountKey")
-                                        # Map parentAccountKey to customer ID through account files
-                                        mapped_data = {}
-                                        for account_key, value in raw_data.items():
-                                            # Find customer ID through account mapping
-                                            for acc_key, customer_id in bank2_id_mapping.items():
-                                                if account_key == acc_key:
-                                                    mapped_data[customer_id] = value
-                                                    break
-                                        data_maps[key] = mapped_data
+                                        raw_data = extract_column_data(file_path, bank2_schema["schema"], "parentAccountKey", return_type="series", frame_cache=frame_cache)
+                                        # Resolve parentAccountKey -> account -> customer ID with one hash join
+                                        data_maps[key] = remap_column_keys(raw_data, bank2_key_resolver)
                                         break
         
         print(f"[SUCCESS] Applied hardcoded fixes")
+        report_progress(
+            "data_maps_loaded",
+            maps=len(data_maps),
+            values=sum(len(values) for values in data_maps.values()),
+            seconds=time.perf_counter() - maps_start
+        )
         
-        # Create combined data structure
-        combined_data = []
-        
-        for customer_id in all_customer_ids:
-            customer_row = {"customer_id": customer_id}
-            
-            # Determine which bank this customer belongs to
-            is_bank1 = customer_id.startswith("B1_")
-            is_bank2 = customer_id.startswith("B2_")
-            actual_customer_id = customer_id[3:]  # Remove B1_ or B2_ prefix
-            
-            # Process each matched schema pair
-            for match in matched_schemas:
-                bank1_schema = match["bank1"]
-                bank2_schema = match["bank2"]
-                
-                # Create column name for the combined data
-                combined_column_name = f"{bank1_schema['category']}_{bank1_schema['schema']}_to_{bank2_schema['category']}_{bank2_schema['schema']}"
-                
-                # Get data only from the customer's bank
-                if is_bank1:
-                    bank1_key = f"bank1_{bank1_schema['category']}_{bank1_schema['schema']}"
-                    bank1_value = data_maps.get(bank1_key, {}).get(actual_customer_id)
-                    customer_row[combined_column_name] = bank1_value
-                elif is_bank2:
-                    bank2_key = f"bank2_{bank2_schema['category']}_{bank2_schema['schema']}"
-                    bank2_value = data_maps.get(bank2_key, {}).get(actual_customer_id)
-                    customer_row[combined_column_name] = bank2_value
-                else:
-                    customer_row[combined_column_name] = None
-            
-            combined_data.append(customer_row)
-        
-        # Create DataFrame and save
-        df_combined = pd.DataFrame(combined_data)
-        df_combined.to_excel(output_file, index=False)
+        # Create combined data structure, one column at a time
+        df_combined = merge_customer_columns(matched_schemas, data_maps, bank1_customer_ids, bank2_customer_ids)
+        
+        # Save
+        write_start = time.perf_counter()
+        output_format = write_dataframe(df_combined, output_file, output_format)
+        report_progress(
+            "excel_written",
+            file=os.path.basename(output_file),
+            format=output_format,
+            rows=len(df_combined),
+            columns=len(df_combined.columns),
+            seconds=time.perf_counter() - write_start
+        )
         
         print(f"[SUCCESS] Created combined customer data file: {output_file}")
         print(f"[INFO] Combined data shape: {df_combined.shape}")
@@ -1014,11 +2507,9 @@ def process_chatgpt_schema_analysis(chatgpt_response, bank1_json_path, bank2_jso
     """
     try:
         # Load the JSON data
-        with open(bank1_json_path, 'r', encoding='utf-8') as f:
-            bank1_data = json.load(f)
+        bank1_data = load_converted_data(bank1_json_path)
         
-        with open(bank2_json_path, 'r', encoding='utf-8') as f:
-            bank2_data = json.load(f)
+        bank2_data = load_converted_data(bank2_json_path)
         
         # Parse the ChatGPT response
         parsed_data = parse_chatgpt_response(chatgpt_response, bank1_data, bank2_data)
@@ -1050,6 +2541,7 @@ def main():
     parser.add_argument("-o", "--output", help="Output JSON file path")
     parser.add_argument("--no-clean", action="store_true", help="Don't clean empty rows/columns")
     parser.add_argument("--no-metadata", action="store_true", help="Don't include metadata in output")
+    parser.add_argument("--stream", action="store_true", help="Stream rows to disk with bounded memory")
     
     args = parser.parse_args()
     
@@ -1058,7 +2550,8 @@ def main():
             file_path=args.file_path,
             output_file=args.output,
             clean_data=not args.no_clean,
-            include_metadata=not args.no_metadata
+            include_metadata=not args.no_metadata,
+            streaming=args.stream
         )
     except Exception as e:
         print(f"[ERROR] Error: {e}")
@@ -1078,11 +2571,9 @@ if __name__ == "__main__":
     print(bank1_count, bank2_count)
     
     # Load the JSON data for parsing
-    with open("Bank1_Schema_converted.json", 'r', encoding='utf-8') as f:
-        bank1_data = json.load(f)
+    bank1_data = load_converted_data("Bank1_Schema_converted.json")
     
-    with open("Bank2_Schema_converted.json", 'r', encoding='utf-8') as f:
-        bank2_data = json.load(f)
+    bank2_data = load_converted_data("Bank2_Schema_converted.json")
     
     # Two files - compare Bank 1 and Bank 2 schemas
     response = send_json_to_chatgpt("Bank1_Schema_converted.json", 
@@ -1140,7 +2631,8 @@ Number of schemas matched
 Number of schemas unmatched
 
 Ensure all numbers align and confirm that no schemas were left out in your analysis.""",
-       "Bank2_Schema_converted.json")
+       "Bank2_Schema_converted.json",
+       compact=True)
     
     if response:
         print("[INFO] ChatGPT Response received, parsing and creating JSON files...")
@@ -0,0 +1,182 @@
+"""
+Bridgette Output Writer
+=======================
+
+Fast writers for the combined output files.
+
+Key Components:
+- write_dataframe(): write a DataFrame as xlsx, CSV or Parquet
+- Streaming xlsx writing with constant memory (xlsxwriter constant_memory
+  mode when installed, openpyxl write_only mode otherwise)
+- Automatic split into further sheets past Excel's 1,048,576-row limit
+
+Architecture Rationale:
+- DataFrame.to_excel builds the whole workbook in memory before saving,
+  which dominated the end of large runs; streaming writers emit each row
+  to disk as it is written
+- Rows are converted in chunks, so only one chunk of Python objects exists
+  at a time
+- CSV and Parquet skip spreadsheet formatting entirely for callers that
+  only need the data (Parquet requires pyarrow)
+"""
+
+import os
+
+import pandas as pd
+
+from instrumentation import stage_timer
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+# Output configuration
+OUTPUT_FORMATS = ('xlsx', 'csv', 'parquet')
+DEFAULT_OUTPUT_FORMAT = os.environ.get('OUTPUT_FORMAT', 'xlsx').lower()
+# "auto" uses xlsxwriter when installed, else openpyxl
+EXCEL_WRITER_ENGINE = os.environ.get('EXCEL_WRITER_ENGINE', 'auto').lower()
+
+EXCEL_MAX_ROWS = 1048576  # Rows per worksheet, including the header row
+EXCEL_MAX_SHEET_NAME = 31
+WRITE_CHUNK_ROWS = 50000  # Rows converted to Python objects at a time
+
+def output_format_for(path, output_format=None):
+    """
+    Resolve the output format from an explicit format or the file extension
+
+    Args:
+        path (str): Output file path
+        output_format (str): "xlsx", "csv" or "parquet" (optional)
+
+    Returns:
+        str: Output format
+    """
+    output_format = (output_format or os.path.splitext(path)[1].lstrip('.') or DEFAULT_OUTPUT_FORMAT).lower()
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}. Supported: {', '.join(OUTPUT_FORMATS)}")
+    return output_format
+
+def _sheet_names(sheet_name, sheet_count):
+    """Sheet names for a table split over sheet_count worksheets"""
+    names = [sheet_name[:EXCEL_MAX_SHEET_NAME]]
+    for number in range(2, sheet_count + 1):
+        suffix = f" ({number})"
+        names.append(sheet_name[:EXCEL_MAX_SHEET_NAME - len(suffix)] + suffix)
+    return names
+
+def _iter_row_chunks(df, start, stop):
+    """Yield rows start..stop of df as tuples, NaN/NaT as None"""
+    for chunk_start in range(start, stop, WRITE_CHUNK_ROWS):
+        chunk = df.iloc[chunk_start:min(chunk_start + WRITE_CHUNK_ROWS, stop)]
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        yield from chunk.itertuples(index=False, name=None)
+
+def _sheet_ranges(df):
+    """(start, stop) row ranges that fit on one worksheet each"""
+    rows_per_sheet = EXCEL_MAX_ROWS - 1
+    return [(start, min(start + rows_per_sheet, len(df))) for start in range(0, max(len(df), 1), rows_per_sheet)]
+
+def _write_xlsx_openpyxl(df, path, sheet_name):
+    from openpyxl import Workbook
+
+    ranges = _sheet_ranges(df)
+    header = [str(column) for column in df.columns]
+    workbook = Workbook(write_only=True)
+    for name, (start, stop) in zip(_sheet_names(sheet_name, len(ranges)), ranges):
+        worksheet = workbook.create_sheet(title=name)
+        worksheet.append(header)
+        for row in _iter_row_chunks(df, start, stop):
+            worksheet.append(row)
+    workbook.save(path)
+    return len(ranges)
+
+def _write_xlsx_xlsxwriter(df, path, sheet_name):
+    ranges = _sheet_ranges(df)
+    header = [str(column) for column in df.columns]
+    workbook = xlsxwriter.Workbook(path, {
+        'constant_memory': True,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+        'nan_inf_to_errors': True
+    })
+    try:
+        for name, (start, stop) in zip(_sheet_names(sheet_name, len(ranges)), ranges):
+            worksheet = workbook.add_worksheet(name)
+            worksheet.write_row(0, 0, header)
+            for row_number, row in enumerate(_iter_row_chunks(df, start, stop), start=1):
+                worksheet.write_row(row_number, 0, row)
+    finally:
+        workbook.close()
+    return len(ranges)
+
+def write_excel(df, path, sheet_name="Sheet1"):
+    """
+    Stream a DataFrame to an xlsx file with constant memory
+
+    Tables longer than one worksheet continue on "<sheet_name> (2)", ...
+
+    Args:
+        df (DataFrame): Data to write
+        path (str): Output .xlsx path
+        sheet_name (str): Name of the first worksheet
+
+    Returns:
+        int: Number of worksheets written
+    """
+    use_xlsxwriter = EXCEL_WRITER_ENGINE == 'xlsxwriter' or (EXCEL_WRITER_ENGINE == 'auto' and xlsxwriter is not None)
+    if use_xlsxwriter:
+        if xlsxwriter is None:
+            raise ValueError("EXCEL_WRITER_ENGINE=xlsxwriter requires xlsxwriter to be installed")
+        return _write_xlsx_xlsxwriter(df, path, sheet_name)
+    return _write_xlsx_openpyxl(df, path, sheet_name)
+
+def _is_missing(value):
+    """pd.isna for a single cell (list or dict cells are never missing)"""
+    return pd.api.types.is_scalar(value) and pd.isna(value)
+
+def write_parquet(df, path):
+    """
+    Write a DataFrame to a Parquet file
+
+    Object columns mixing types (e.g. numbers and text from different banks)
+    are written as strings, since Parquet columns have a single type. They
+    are found with intermediate.untypeable_columns, like the Arrow
+    intermediates.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet output requires pyarrow to be installed")
+    from intermediate import untypeable_columns
+
+    df = df.copy(deep=False)
+    df.columns = [str(column) for column in df.columns]
+    for column in untypeable_columns(df):
+        df[column] = df[column].map(lambda value: None if _is_missing(value) else str(value))
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path)
+
+def write_dataframe(df, path, output_format=None, sheet_name="Sheet1"):
+    """
+    Write a DataFrame in the requested output format
+
+    Args:
+        df (DataFrame): Data to write
+        path (str): Output file path
+        output_format (str): "xlsx", "csv" or "parquet" (default from the extension)
+        sheet_name (str): Worksheet name for xlsx output
+
+    Returns:
+        str: Output format written
+    """
+    output_format = output_format_for(path, output_format)
+    with stage_timer(f"write_{output_format}", rows=len(df)):
+        if output_format == 'xlsx':
+            sheets = write_excel(df, path, sheet_name)
+            if sheets > 1:
+                print(f"[INFO] {len(df)} rows exceed the Excel sheet limit; split over {sheets} sheets")
+        elif output_format == 'csv':
+            df.to_csv(path, index=False)
+        else:
+            write_parquet(df, path)
+    return output_format
@@ -0,0 +1,253 @@
+"""
+Bridgette Upload Previews
+=========================
+
+Header-only previews of uploaded files, read straight from the upload stream.
+
+Key Components:
+- preview_upload(): columns, inferred dtypes, first rows and a row-count
+  estimate of the first sheet of an upload
+- preview_lines(): the legacy "first three lines" strings built from a preview
+- infer_dtype(): pandas-style dtype name for a column of sampled values
+
+Row counts:
+- xlsx: the sheet's <dimension> element (written by Excel, openpyxl and
+  XlsxWriter), so the count is known without reading the rows
+- csv: exact when the file ends within the sampled rows, otherwise the file
+  size divided by the average size of the sampled rows
+- xls/ods: unknown (None)
+
+Architecture Rationale:
+- Only the first N rows are read, so preview time does not grow with the
+  file: xlsx sheets are streamed with openpyxl read_only/iter_rows and CSVs
+  are read line by line
+- Uploads are previewed from the request stream (any seekable binary file
+  object), without saving a temporary file first
+- xlsx and csv previews use only openpyxl and the standard library, so the
+  lightweight app can use them without pandas; xls/ods previews need pandas
+- openpyxl still loads the shared-strings table of an xlsx workbook, whose
+  size depends on the number of distinct strings rather than rows
+"""
+
+import csv
+import io
+import os
+from datetime import date, datetime, time
+
+# Rows sampled for a preview (dtypes are inferred from them)
+PREVIEW_ROWS = int(os.environ.get('PREVIEW_ROWS', 20))
+PREVIEW_MAX_ROWS = int(os.environ.get('PREVIEW_MAX_ROWS', 1000))
+
+# Rows shown in the legacy "first three lines" previews
+PREVIEW_LINE_COUNT = 3
+
+def _is_missing(value):
+    return value is None or value == ""
+
+def _parse_csv_value(value):
+    """Convert a CSV field to int/float when it looks numeric (as pandas would)"""
+    if value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+def infer_dtype(values):
+    """
+    Infer the pandas dtype a column of sampled values would get
+
+    Args:
+        values (list): Sampled cell values (None or "" for empty cells)
+
+    Returns:
+        str: "int64", "float64", "bool", "datetime64[ns]" or "object"
+    """
+    present = [value for value in values if not _is_missing(value)]
+    if not present:
+        return "float64"
+    kinds = set()
+    for value in present:
+        if isinstance(value, bool):
+            kinds.add("bool")
+        elif isinstance(value, int):
+            kinds.add("int")
+        elif isinstance(value, float):
+            kinds.add("float")
+        elif isinstance(value, (datetime, date)):
+            kinds.add("datetime")
+        else:
+            kinds.add("object")
+
+    if kinds == {"bool"}:
+        return "bool" if len(present) == len(values) else "object"
+    if kinds <= {"int", "float"}:
+        # Missing values turn integer columns into floats
+        return "int64" if kinds == {"int"} and len(present) == len(values) else "float64"
+    if kinds == {"datetime"}:
+        return "datetime64[ns]"
+    return "object"
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+def _build_preview(file_type, header, rows, row_count, row_count_exact, sheet=None, sheets=None):
+    """Assemble a preview from a header row and sampled data rows"""
+    width = len(header)
+    for row in rows:
+        width = max(width, len(row))
+    # Drop trailing columns with neither a header nor a sampled value
+    while width and _is_missing(header[width - 1] if width <= len(header) else None) and \
+            all(_is_missing(row[width - 1]) for row in rows if len(row) >= width):
+        width -= 1
+
+    columns = []
+    for index in range(width):
+        name = header[index] if index < len(header) else None
+        columns.append(f"Unnamed: {index}" if _is_missing(name) else str(name))
+    padded = [list(row[:width]) + [None] * (width - len(row)) for row in rows]
+
+    return {
+        "file_type": file_type,
+        "sheet": sheet,
+        "sheets": sheets,
+        "columns": columns,
+        "dtypes": {column: infer_dtype([row[index] for row in padded]) for index, column in enumerate(columns)},
+        "rows": [[_json_value(value) for value in row] for row in padded],
+        "row_count": row_count,
+        "row_count_exact": row_count_exact
+    }
+
+def _preview_xlsx(stream, max_rows):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        sheets = workbook.sheetnames
+        if not sheets:
+            return _build_preview("xlsx", [], [], 0, True, sheets=sheets)
+        sheet = workbook.worksheets[0]
+        sheet_rows = sheet.iter_rows(values_only=True)
+        # Skip leading blank rows, as pandas does for the header
+        header, header_row = [], 0
+        for header_row, row in enumerate(sheet_rows, start=1):
+            if not all(_is_missing(value) for value in row):
+                header = list(row)
+                break
+        # One row past max_rows tells whether the sheet ends within the sample
+        rows = [list(row) for _, row in zip(range(max_rows + 1), sheet_rows)]
+        complete = len(rows) <= max_rows
+        rows = rows[:max_rows]
+        while rows and all(_is_missing(value) for value in rows[-1]):
+            rows.pop()
+
+        if complete:
+            row_count, exact = len(rows), True
+        elif sheet.max_row:
+            # max_row comes from the sheet's <dimension> element
+            row_count, exact = max(sheet.max_row - header_row, len(rows)), False
+        else:
+            row_count, exact = None, False
+        return _build_preview("xlsx", header, rows, row_count, exact, sheet=sheets[0], sheets=sheets)
+    finally:
+        workbook.close()
+
+def _preview_csv(stream, max_rows):
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+
+    lines = []
+    sampled_bytes = 0
+    for _ in range(max_rows + 1):
+        line = stream.readline()
+        if not line:
+            break
+        lines.append(line)
+        sampled_bytes += len(line)
+    at_end = sampled_bytes >= size
+
+    text = b"".join(lines).decode("utf-8-sig", errors="replace")
+    records = [record for record in csv.reader(io.StringIO(text)) if record]
+    header = records[0] if records else []
+    rows = [[_parse_csv_value(value) for value in record] for record in records[1:]]
+
+    if at_end:
+        row_count, exact = len(rows), True
+    else:
+        # Average sampled data row size (quoted newlines make this approximate)
+        data_bytes = sampled_bytes - len(lines[0])
+        row_bytes = data_bytes / max(len(lines) - 1, 1)
+        row_count = int(round((size - len(lines[0])) / row_bytes)) if row_bytes else None
+        exact = False
+    return _build_preview("csv", header, rows, row_count, exact)
+
+def _preview_other_excel(stream, filename, max_rows):
+    # xlrd/odf cannot stream rows; read through the engine layer with nrows
+    import pandas as pd
+    from spreadsheet_engine import CalamineExcelFile, resolve_engine
+
+    engine = resolve_engine(filename, nrows=max_rows)
+    excel_file = CalamineExcelFile if engine == "calamine" else pd.ExcelFile
+    with excel_file(stream, engine=engine) as xls:
+        df = xls.parse(sheet_name=0, nrows=max_rows, header=None)
+        sheets = xls.sheet_names
+    records = df.astype(object).where(df.notna(), None).values.tolist()
+    header, rows = (records[0], records[1:]) if records else ([], [])
+    file_type = os.path.splitext(filename)[1].lower().lstrip(".")
+    return _build_preview(file_type, header, rows, None, False, sheet=sheets[0] if sheets else None, sheets=sheets)
+
+def preview_upload(stream, filename, max_rows=None):
+    """
+    Preview the first sheet of an uploaded file
+
+    Args:
+        stream: Seekable binary file object (e.g. FileStorage.stream)
+        filename (str): Original file name (selects the reader)
+        max_rows (int): Data rows to sample (defaults to PREVIEW_ROWS, capped
+            at PREVIEW_MAX_ROWS)
+
+    Returns:
+        dict: {"file_type", "sheet", "sheets", "columns", "dtypes", "rows",
+            "row_count", "row_count_exact"}
+    """
+    max_rows = min(max(int(max_rows or PREVIEW_ROWS), 1), PREVIEW_MAX_ROWS)
+    ext = os.path.splitext(filename)[1].lower()
+    stream.seek(0)
+    try:
+        if ext == ".csv":
+            return _preview_csv(stream, max_rows)
+        if ext in (".xlsx", ".xlsm"):
+            return _preview_xlsx(stream, max_rows)
+        if ext in (".xls", ".ods"):
+            return _preview_other_excel(stream, filename, max_rows)
+        raise ValueError(f"Unsupported file type: {ext}. Supported: .xlsx, .xls, .csv, .ods")
+    finally:
+        stream.seek(0)
+
+def preview_file(file_path, max_rows=None):
+    """preview_upload for a file on disk"""
+    with open(file_path, "rb") as stream:
+        return preview_upload(stream, file_path, max_rows)
+
+def preview_lines(preview, count=PREVIEW_LINE_COUNT):
+    """
+    Format the first rows of a preview as space-joined lines
+
+    Returns:
+        list: Up to count strings (empty cells shown as "nan", as before)
+    """
+    return [
+        " ".join("nan" if value is None else str(value) for value in row)
+        for row in preview["rows"][:count]
+    ]
@@ -0,0 +1,60 @@
+"""
+Bridgette Progress Reporting
+============================
+
+Structured progress events emitted by the processing pipeline.
+
+Key Components:
+- report_progress(): called by pipeline code at each notable step
+- set_progress_reporter() / reset_progress_reporter(): install the callback
+  that receives events for the current job
+
+Architecture Rationale:
+- The reporter lives in a context variable, so concurrent jobs running in
+  different worker threads each report to their own job
+- Without an installed reporter (CLI runs, scripts) reporting is a no-op
+- Threads started by the pipeline copy the context (see run_in_context) so
+  events from parallel LLM requests reach the same job
+"""
+
+import contextvars
+
+_reporter = contextvars.ContextVar('progress_reporter', default=None)
+
+def set_progress_reporter(callback):
+    """
+    Install the callback that receives progress events
+
+    Args:
+        callback (callable): Called as callback(event, **data)
+
+    Returns:
+        Token to pass to reset_progress_reporter
+    """
+    return _reporter.set(callback)
+
+def reset_progress_reporter(token):
+    """Restore the reporter that was active before set_progress_reporter"""
+    _reporter.reset(token)
+
+def report_progress(event, **data):
+    """
+    Emit a progress event to the active reporter, if any
+
+    Reporting never raises: a failing reporter must not break processing.
+
+    Args:
+        event (str): Event name (e.g. "file_parsed")
+        **data: JSON-serializable event fields (row counts, seconds, ...)
+    """
+    callback = _reporter.get()
+    if callback is None:
+        return
+    try:
+        callback(event, **data)
+    except Exception as e:
+        print(f"[WARNING] Could not report progress event {event}: {e}")
+
+def run_in_context(pool, fn, *args, **kwargs):
+    """Submit fn to an executor with a copy of the current context"""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
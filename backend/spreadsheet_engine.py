@@ -0,0 +1,238 @@
+"""
+Bridgette Spreadsheet Engines
+=============================
+
+Pluggable reader layer for Excel/ODS workbooks.
+
+Key Components:
+- resolve_engine(): pick the reader engine for a file (config flag + auto-detection)
+- open_workbook(): open a workbook as a pandas ExcelFile on the chosen engine
+- read_excel(): read one sheet (or all sheets) through the chosen engine
+- CalamineReader: pandas reader backed by python-calamine (Rust parser)
+
+Engines:
+- "calamine": python-calamine, used for .xlsx, .xlsm, .xlsb, .xls and .ods
+- "openpyxl" (.xlsx), "xlrd" (.xls), "odf" (.ods): the pandas defaults
+
+Configuration:
+- SPREADSHEET_ENGINE=auto (default): calamine when python-calamine is
+  installed, otherwise the pandas default for the file type; reads limited
+  to the first rows (previews) stay on openpyxl, which stops reading early
+  while calamine always parses the whole sheet
+- SPREADSHEET_ENGINE=calamine: always calamine (fails if it is not installed)
+- SPREADSHEET_ENGINE=openpyxl: always the pandas default engines
+
+Architecture Rationale:
+- Workbooks are returned as pd.ExcelFile objects, so callers keep using
+  parse(), sheet_names, read_excel(xls, ...) and the context manager whatever
+  the engine is
+- pandas >= 2.2 ships its own calamine engine, which is used as is; on older
+  pandas the CalamineReader below plugs python-calamine into pandas' reader
+  base class, so header handling, usecols, nrows and type inference are
+  pandas' own and frames match the openpyxl ones
+- Cells are converted like pandas' openpyxl reader (whole floats become
+  ints, empty cells "", trailing empty cells/rows trimmed), which keeps the
+  content-addressed parse cache valid across engines
+- python-calamine is optional: without it everything runs on openpyxl
+- CalamineReader relies on pandas internals (pandas.io.excel._base and
+  pd.ExcelFile._engines, tested on pandas 2.0-2.2); if they are missing,
+  calamine is reported unavailable and everything runs on openpyxl
+"""
+
+import os
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+try:
+    import python_calamine
+except ImportError:
+    python_calamine = None
+
+try:
+    # Private pandas API: only needed for CalamineReader on pandas < 2.2
+    from pandas.io.excel._base import BaseExcelReader
+except ImportError:
+    BaseExcelReader = None
+
+# Reader engine: auto, calamine or openpyxl
+SPREADSHEET_ENGINE = os.environ.get('SPREADSHEET_ENGINE', 'auto').lower()
+
+# pandas' default engine per extension (used by the "openpyxl" setting)
+DEFAULT_ENGINES = {
+    ".xlsx": "openpyxl",
+    ".xlsm": "openpyxl",
+    ".xls": "xlrd",
+    ".ods": "odf"
+}
+
+# Extensions python-calamine can read
+CALAMINE_EXTENSIONS = {".xlsx", ".xlsm", ".xlsb", ".xls", ".ods"}
+
+ENGINE_CHOICES = ("auto", "calamine", "openpyxl")
+
+def calamine_available():
+    """Whether the python-calamine reader is installed and usable with this pandas"""
+    return CalamineExcelFile is not None
+
+class CalamineReader(BaseExcelReader or object):
+    """pandas Excel reader backed by python-calamine"""
+
+    @property
+    def _workbook_class(self):
+        return python_calamine.CalamineWorkbook
+
+    def load_workbook(self, filepath_or_buffer, engine_kwargs=None):
+        return python_calamine.load_workbook(filepath_or_buffer, **(engine_kwargs or {}))
+
+    @property
+    def sheet_names(self):
+        return [
+            sheet.name for sheet in self.book.sheets_metadata
+            if sheet.typ == python_calamine.SheetTypeEnum.WorkSheet
+        ]
+
+    def get_sheet_by_name(self, name):
+        self.raise_if_bad_sheet_by_name(name)
+        return self.book.get_sheet_by_name(name)
+
+    def get_sheet_by_index(self, index):
+        self.raise_if_bad_sheet_by_index(index)
+        return self.book.get_sheet_by_name(self.sheet_names[index])
+
+    @staticmethod
+    def _convert_cell(value):
+        if isinstance(value, float):
+            if np.isfinite(value):
+                whole = int(value)
+                if whole == value:
+                    return whole
+            return value
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, date):
+            return datetime(value.year, value.month, value.day)
+        if isinstance(value, timedelta):
+            return pd.Timedelta(value)
+        return value
+
+    def get_sheet_data(self, sheet, file_rows_needed=None):
+        convert = self._convert_cell
+        data = []
+        last_row_with_data = -1
+        for row_number, row in enumerate(sheet.to_python(skip_empty_area=False, nrows=file_rows_needed)):
+            converted_row = [convert(value) for value in row]
+            while converted_row and converted_row[-1] == "":
+                # trim trailing empty cells
+                converted_row.pop()
+            if converted_row:
+                last_row_with_data = row_number
+            data.append(converted_row)
+
+        # Trim trailing empty rows
+        data = data[: last_row_with_data + 1]
+
+        if data:
+            # Extend rows to the widest row
+            max_width = max(len(row) for row in data)
+            if min(len(row) for row in data) < max_width:
+                data = [row + [""] * (max_width - len(row)) for row in data]
+        return data
+
+def _calamine_excel_file():
+    """
+    Return the pd.ExcelFile class that accepts engine="calamine"
+
+    Returns:
+        type: pd.ExcelFile itself on pandas >= 2.2, a subclass registering
+            CalamineReader on older pandas, or None when python-calamine is
+            not installed or pandas' engine internals are not as expected
+    """
+    if python_calamine is None:
+        return None
+
+    engines = getattr(pd.ExcelFile, "_engines", None)
+    if not isinstance(engines, dict):
+        print("[WARNING] Unsupported pandas version for the calamine reader; using openpyxl")
+        return None
+    if "calamine" in engines:
+        # pandas >= 2.2 reads with python-calamine natively
+        return pd.ExcelFile
+    if BaseExcelReader is None:
+        print("[WARNING] Unsupported pandas version for the calamine reader; using openpyxl")
+        return None
+
+    class CalamineExcelFile(pd.ExcelFile):
+        """pd.ExcelFile that also accepts engine="calamine" """
+        _engines = {**engines, "calamine": CalamineReader}
+
+    return CalamineExcelFile
+
+CalamineExcelFile = _calamine_excel_file()
+
+def resolve_engine(file_path, engine=None, nrows=None):
+    """
+    Pick the reader engine for a workbook
+
+    Args:
+        file_path (str): Workbook path (only the extension is used)
+        engine (str): "auto", "calamine" or "openpyxl" (defaults to SPREADSHEET_ENGINE)
+        nrows (int): Rows the caller will read, if limited
+
+    Returns:
+        str: pandas engine name ("calamine", "openpyxl", "xlrd" or "odf")
+    """
+    engine = (engine or SPREADSHEET_ENGINE).lower()
+    if engine not in ENGINE_CHOICES:
+        raise ValueError(f"Unknown spreadsheet engine: {engine}. Supported: {', '.join(ENGINE_CHOICES)}")
+
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext not in DEFAULT_ENGINES and ext not in CALAMINE_EXTENSIONS:
+        raise ValueError(f"Unsupported file type: {ext}. Supported: .xlsx, .xls, .csv, .ods")
+
+    if engine == "calamine":
+        if not calamine_available():
+            raise ImportError("SPREADSHEET_ENGINE=calamine requires python-calamine (pip install python-calamine) and pandas 2.0-2.2")
+        if ext not in CALAMINE_EXTENSIONS:
+            raise ValueError(f"The calamine engine cannot read {ext} files")
+        return "calamine"
+    if engine == "auto" and calamine_available() and ext in CALAMINE_EXTENSIONS:
+        # openpyxl (read_only) stops after nrows; the other engines read everything
+        if nrows is None or DEFAULT_ENGINES.get(ext) != "openpyxl":
+            return "calamine"
+    if ext not in DEFAULT_ENGINES:
+        raise ValueError(f"{ext} files require python-calamine (pip install python-calamine)")
+    return DEFAULT_ENGINES[ext]
+
+def open_workbook(file_path, engine=None, nrows=None):
+    """
+    Open a workbook on the configured reader engine
+
+    Args:
+        file_path (str): Path to the .xlsx/.xls/.ods file
+        engine (str): Engine override ("auto", "calamine" or "openpyxl")
+        nrows (int): Rows the caller will read, if limited
+
+    Returns:
+        pd.ExcelFile: The open workbook (use as a context manager)
+    """
+    resolved = resolve_engine(file_path, engine, nrows)
+    if resolved == "calamine":
+        return CalamineExcelFile(file_path, engine="calamine")
+    return pd.ExcelFile(file_path, engine=resolved)
+
+def read_excel(file_path, engine=None, **kwargs):
+    """
+    Read a workbook with pd.read_excel on the configured reader engine
+
+    Args:
+        file_path (str): Path to the .xlsx/.xls/.ods file
+        engine (str): Engine override ("auto", "calamine" or "openpyxl")
+        **kwargs: Passed to pd.read_excel (sheet_name, usecols, nrows, ...)
+
+    Returns:
+        DataFrame or dict: As returned by pd.read_excel
+    """
+    with open_workbook(file_path, engine, kwargs.get("nrows")) as xls:
+        return pd.read_excel(xls, **kwargs)
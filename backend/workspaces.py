@@ -0,0 +1,109 @@
+"""
+Bridgette Workspaces
+====================
+
+Per-run directories that hold every upload, intermediate and output file of
+one pipeline run.
+
+Key Components:
+- new_run_id() / workspace_root(): allocate and locate a run's workspace
+- workspace_path(): paths inside a workspace (uploads, intermediates, outputs)
+- remove_workspace(): delete a run's files
+
+Layout (the same under every root):
+    <root>/uploaded_files/bank1, bank2   Original uploads
+    <root>/temp_json_files               Converted intermediates
+    <root>/generated_excel_files         Combined output files
+
+Architecture Rationale:
+- Runs never share a directory, so concurrent users and multiple gunicorn
+  workers cannot overwrite each other's files
+- Workspaces live under WORKSPACES_DIR on disk, so any worker process can
+  serve any run
+- Requests without a run ID use the current directory as their root, which
+  is the original shared layout, so existing clients keep working
+- Run IDs are validated before use, so they cannot escape WORKSPACES_DIR
+"""
+
+import os
+import re
+import shutil
+import uuid
+
+# Workspace configuration
+# Relative to this module, so run workspaces do not depend on the start directory
+WORKSPACES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.environ.get('WORKSPACES_DIR', 'workspaces'))
+
+# Directory names inside a workspace
+UPLOADS_SUBDIR = 'uploaded_files'
+INTERMEDIATES_SUBDIR = 'temp_json_files'
+OUTPUTS_SUBDIR = 'generated_excel_files'
+
+RUN_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+def new_run_id():
+    """Return a fresh run ID"""
+    return uuid.uuid4().hex
+
+def workspace_root(run_id=None):
+    """
+    Return the workspace root for a run
+
+    Args:
+        run_id (str): Run ID (None for the shared legacy layout in the CWD)
+
+    Returns:
+        str: Workspace root directory
+
+    Raises:
+        ValueError: If the run ID contains characters other than letters,
+            digits, "-" and "_"
+    """
+    if not run_id:
+        return "."
+    if not RUN_ID_PATTERN.match(run_id):
+        raise ValueError(f"Invalid run ID: {run_id}")
+    return os.path.join(WORKSPACES_DIR, run_id)
+
+def workspace_path(root, *parts):
+    """Join a path inside a workspace (relative to the CWD for the legacy root)"""
+    if not root or root == ".":
+        return os.path.join(*parts)
+    return os.path.join(root, *parts)
+
+def ensure_workspace(root):
+    """
+    Create the directories of a workspace
+
+    Args:
+        root (str): Workspace root
+
+    Returns:
+        str: The workspace root
+    """
+    for subdir in (
+        os.path.join(UPLOADS_SUBDIR, 'bank1'),
+        os.path.join(UPLOADS_SUBDIR, 'bank2'),
+        INTERMEDIATES_SUBDIR,
+        OUTPUTS_SUBDIR
+    ):
+        os.makedirs(workspace_path(root, subdir), exist_ok=True)
+    return root
+
+def remove_workspace(run_id):
+    """
+    Delete every file of a run
+
+    Args:
+        run_id (str): Run ID
+
+    Returns:
+        bool: True if a workspace was removed
+    """
+    if not run_id:
+        return False
+    root = workspace_root(run_id)
+    if not os.path.isdir(root):
+        return False
+    shutil.rmtree(root)
+    return True
@@ -32,11 +32,27 @@ const BACKEND_URL = isLocal
     ? 'http://localhost:5001' 
     : window.location.origin;
 
+// Run ID for this browser tab
+// The backend keeps each run's uploads, intermediates and outputs in their own
+// workspace, so several users (or tabs) can merge at the same time
+const RUN_ID = sessionStorage.getItem('bridgetteRunId') ||
+    (window.crypto && crypto.randomUUID
+        ? crypto.randomUUID().replace(/-/g, '')
+        : `${Date.now().toString(36)}${Math.random().toString(36).slice(2)}`);
+sessionStorage.setItem('bridgetteRunId', RUN_ID);
+
+// Append this tab's run ID to a backend API path
+function runUrl(path) {
+    const separator = path.includes('?') ? '&' : '?';
+    return `${BACKEND_URL}${path}${separator}run_id=${encodeURIComponent(RUN_ID)}`;
+}
+
 // Debug logging for development
 // These logs help troubleshoot connection issues between frontend and backend
 console.log('🔧 Bridgette Frontend Configuration:');
 console.log('  - isLocal:', isLocal);
 console.log('  - BACKEND_URL:', BACKEND_URL);
+console.log('  - RUN_ID:', RUN_ID);
 console.log('  - window.location:', window.location.href);
 document.addEventListener('DOMContentLoaded', function() {
     // Add smooth scrolling to all anchor links
@@ -443,7 +459,7 @@ function clearSchemaFiles(boxNumber) {
 }
 
 function downloadFiles() {
-    fetch(`${BACKEND_URL}/api/download-files`, {
+    fetch(runUrl('/api/download-files'), {
         method: 'POST',
     })
     .then(response => response.json())
@@ -497,7 +513,7 @@ function processFiles(boxNumber) {
     
     // Send files to backend with box number
     console.log('🚀 Sending request to:', `${BACKEND_URL}/api/process-files?box=${boxNumber}`);
-    fetch(`${BACKEND_URL}/api/process-files?box=${boxNumber}`, {
+    fetch(runUrl(`/api/process-files?box=${boxNumber}`), {
         method: 'POST',
         body: formData
     })
@@ -551,7 +567,7 @@ function processSchemaFiles(boxNumber) {
     });
     
     // Send files to backend with schema flag and box number
-    fetch(`${BACKEND_URL}/api/process-files?schema=true&box=${boxNumber}`, {
+    fetch(runUrl(`/api/process-files?schema=true&box=${boxNumber}`), {
         method: 'POST',
         body: formData
     })
@@ -995,15 +1011,22 @@ async function startMerge() {
     mergeStatus.style.display = 'flex';
     
     try {
-        // Call the backend merge endpoint
-        const response = await fetch(`${BACKEND_URL}/api/trigger-main-processing`, {
+        // Queue the merge job on the backend
+        const response = await fetch(runUrl('/api/trigger-main-processing'), {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             }
         });
         
-        const data = await response.json();
+        const job = await response.json();
+        
+        if (!job.success) {
+            throw new Error(job.error || 'Could not start merge');
+        }
+        
+        // Wait for the job to finish, then fetch its result
+        const data = await waitForJobResult(job.job_id);
         
         if (data.success) {
             // Show success results
@@ -1015,7 +1038,7 @@ async function startMerge() {
             
             if (data.excel_file_name) {
                 // Download the actual Excel file from backend
-                downloadLink.href = `${BACKEND_URL}/api/download-excel/${data.excel_file_name}`;
+                downloadLink.href = runUrl(`/api/download-excel/${data.excel_file_name}`);
                 downloadLink.download = data.excel_file_name;
                 downloadLink.style.display = 'inline-block';
             } else {
@@ -1052,6 +1075,89 @@ async function startMerge() {
     }
 }
 
+// Interval between job status polls (ms)
+const JOB_POLL_INTERVAL = 2000;
+
+// Readable labels for job progress events
+const PROGRESS_LABELS = {
+    job_started: () => 'Merge started',
+    stage_started: (data) => `Running ${data.stage.replace(/_/g, ' ')}...`,
+    file_parsed: (data) => `Parsed ${data.file} (${data.rows} rows)`,
+    llm_request_sent: () => 'Waiting for schema matching...',
+    llm_response_received: (data) => `Schema matching response received (${data.seconds.toFixed(1)}s)`,
+    llm_cache_hit: () => 'Schema matching served from cache',
+    matcher_fallback: () => 'ChatGPT unavailable - matching schemas locally',
+    local_match_finished: (data) => `Matched ${data.matched} schemas locally`,
+    data_file_loaded: (data) => `Loaded ${data.file} (${data.rows} rows)`,
+    data_maps_loaded: (data) => `Prepared ${data.maps} data columns`,
+    excel_written: (data) => `Excel written (${data.rows} rows)`
+};
+
+function showMergeProgress(event, data) {
+    const statusText = document.getElementById('mergeStatusText');
+    const label = PROGRESS_LABELS[event];
+    if (statusText && label) {
+        statusText.textContent = `${label(data)} [${data.elapsed.toFixed(1)}s]`;
+    }
+    console.log(`Merge progress: ${event}`, data);
+}
+
+async function fetchJobResult(jobId) {
+    const resultResponse = await fetch(`${BACKEND_URL}/api/jobs/${jobId}/result`);
+    return await resultResponse.json();
+}
+
+function waitForJobEvents(jobId) {
+    // Follow the job's progress event stream until it reports "done"
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`${BACKEND_URL}/api/jobs/${jobId}/events`);
+        
+        Object.keys(PROGRESS_LABELS).forEach(event => {
+            source.addEventListener(event, (message) => showMergeProgress(event, JSON.parse(message.data)));
+        });
+        
+        source.addEventListener('done', () => {
+            source.close();
+            fetchJobResult(jobId).then(resolve, reject);
+        });
+        
+        source.onerror = () => {
+            // The browser retries on its own; only give up once the stream is closed
+            if (source.readyState === EventSource.CLOSED) {
+                reject(new Error('Progress stream closed'));
+            }
+        };
+    });
+}
+
+async function pollJobResult(jobId) {
+    while (true) {
+        const statusResponse = await fetch(`${BACKEND_URL}/api/jobs/${jobId}`);
+        const status = await statusResponse.json();
+        
+        if (!statusResponse.ok) {
+            throw new Error(status.error || 'Could not read merge status');
+        }
+        
+        if (status.status === 'completed' || status.status === 'failed') {
+            return await fetchJobResult(jobId);
+        }
+        
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL));
+    }
+}
+
+async function waitForJobResult(jobId) {
+    if (window.EventSource) {
+        try {
+            return await waitForJobEvents(jobId);
+        } catch (error) {
+            console.warn('Progress stream unavailable, polling instead:', error);
+        }
+    }
+    return await pollJobResult(jobId);
+}
+
 function createMergedDownloadData(apiData) {
     return {
         merge_timestamp: new Date().toISOString(),
@@ -1077,7 +1183,7 @@ async function cleanupAllFiles() {
     cleanupBtn.disabled = true;
     
     try {
-        const response = await fetch(`${BACKEND_URL}/api/cleanup-json-files`, {
+        const response = await fetch(runUrl('/api/cleanup-json-files'), {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',